@@ -0,0 +1,157 @@
+"""
+Cached payload for the ``analytics_data`` endpoint.
+
+The JSON payload is stored in Django's cache under a versioned key.  Any
+Shipment/Order save or delete bumps the version once its transaction
+commits, so the next poll recomputes (bumping any earlier would let a
+concurrent poll cache the pre-commit data under the new version).
+``ANALYTICS_CACHE_TIMEOUT`` bounds how stale an entry can get for changes
+that don't go through signals (queryset updates, raw SQL).
+The stored ETag/Last-Modified let polling browsers get 304s straight from
+the cache.
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import metrics, rollups
+from .models import Order, Shipment
+
+VERSION_KEY = 'analytics:version'
+
+
+def cache_timeout():
+    return getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # seed from the clock so a lost version key can't resurrect old entries
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def bump_version_on_commit():
+    """
+    Bump the version once the current transaction commits (nothing happens
+    if it rolls back), so no reader can cache data the commit is about to
+    replace under the new version.
+    """
+    transaction.on_commit(bump_version, robust=True)
+
+
+@receiver(post_save, sender=Shipment)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Shipment)
+@receiver(post_delete, sender=Order)
+def invalidate_analytics(sender, **kwargs):
+    bump_version_on_commit()
+
+
+def compute_payload():
+    """
+    Build the analytics dict:
+      - shipments_by_date (last 7 days)
+      - orders_by_status
+      - avg delivery time (last 30 days, in seconds)
+    """
+    today = timezone.localdate()
+    days  = [today - timedelta(days=i) for i in range(6, -1, -1)]
+    per_day = rollups.daily_counts('shipment', days[0], today)
+    shipments_by_date = [
+        {'date': d.strftime("%Y-%m-%d"), 'count': per_day.get(d, 0)}
+        for d in days
+    ]
+    orders_by_status = list(
+        Order.objects
+             .values('status')
+             .annotate(count=Count('id'))
+             .order_by('status')
+    )
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    avg_delta = Shipment.objects.filter(
+        date_delivered__gte=thirty_days_ago
+    ).annotate(
+        delivery_time=ExpressionWrapper(
+            F('date_delivered') - F('date_created'),
+            output_field=DurationField()
+        )
+    ).aggregate(avg=Avg('delivery_time'))['avg']
+    avg_seconds = avg_delta.total_seconds() if avg_delta else None
+
+    return {
+        'shipments_by_date':    shipments_by_date,
+        'orders_by_status':     orders_by_status,
+        'avg_delivery_seconds': avg_seconds,
+    }
+
+
+def _payload_key(version):
+    # the day is part of the key so the 7-day window rolls over at midnight
+    return f"analytics:payload:{version}:{timezone.localdate().isoformat()}"
+
+
+def _make_entry(payload):
+    body = json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True)
+    return {
+        'payload':       payload,
+        'etag':          hashlib.md5(body.encode()).hexdigest(),
+        'last_modified': timezone.now().replace(microsecond=0),
+    }
+
+
+def get_cached():
+    """
+    Return the cache entry {'payload', 'etag', 'last_modified'}, computing
+    and storing it on a miss.
+    """
+    key = _payload_key(get_version())
+    entry = cache.get(key)
+    metrics.cache_lookup('analytics', entry is not None)
+    if entry is None:
+        entry = _make_entry(compute_payload())
+        cache.set(key, entry, timeout=cache_timeout())
+    return entry
+
+
+async def aget_cached():
+    """
+    ``get_cached`` for async views.  Hits never leave the event loop; a
+    miss runs ``compute_payload`` in the ORM's thread, as the rollup
+    readers it shares with the dashboard are synchronous.
+    """
+    key = _payload_key(await aget_version())
+    entry = await cache.aget(key)
+    metrics.cache_lookup('analytics', entry is not None)
+    if entry is None:
+        entry = _make_entry(await sync_to_async(compute_payload)())
+        await cache.aset(key, entry, timeout=cache_timeout())
+    return entry
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class LogisticsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'logistics_app'
+
+    def ready(self):
+        # register signal receivers
+        from . import (  # noqa: F401
+            analytics, autocomplete, changes, instrumentation, live, roles, rollups, search, sqlite,
+            totals, tracking, utilisation,
+        )
@@ -0,0 +1,161 @@
+"""
+Async versions of the public tracking page, the analytics JSON and the
+read-only API, plus the live SSE feed, which only exists here.
+
+urls.py serves these instead of the sync views when ``ASYNC_VIEWS`` is on,
+which sports_logistics/asgi.py does by default; WSGI deployments keep the
+sync views.  Under ASGI a slow client then costs a suspended coroutine
+rather than a worker thread.  Database access goes through Django's async
+ORM API and cache access through the async cache API.
+
+The API views only take the common read path (JSON GET of a list or one
+object, with ``cursor``, ``page_size`` and ``fields``); anything else --
+writes, ``?search=``, the browsable API, non-session auth -- is handed to
+the regular DRF viewset, so behaviour is identical either way.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.request import Request
+
+from . import analytics, live, pagination, tracking
+from .fastpath import UnsupportedField, ValuesPlan
+from .renderers import FastJSONRenderer
+
+JSON = 'application/json'
+
+
+async def _resolve_user(request):
+    # templates read request.user; load it here rather than lazily (and
+    # synchronously) during rendering
+    request.user = await request.auser()
+    return request.user
+
+
+# ====================================
+# Shipment Tracking
+# ====================================
+async def track_shipment(request):
+    """Async ``views.track_shipment``; same templates and lookups (see tracking.afind)."""
+    term = (request.GET.get('tracking_number') or "").strip()
+    shipments = await tracking.afind(term) if term else []
+    await _resolve_user(request)
+
+    if len(shipments) == 1:
+        return render(request, 'logistics_app/track_shipment_detail.html', {
+            'shipment': shipments[0]
+        })
+
+    return render(request, 'logistics_app/track_shipment_list.html', {
+        'shipments':   shipments,
+        'search_term': term,
+    })
+
+
+# ====================================
+# Analytics
+# ====================================
+@login_required
+@cache_control(private=True, no_cache=True)
+async def analytics_data(request):
+    """Async ``views.analytics_data``, including its ETag/Last-Modified handling."""
+    entry = await analytics.aget_cached()
+    etag = quote_etag(entry['etag'])
+    last_modified = int(entry['last_modified'].timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse(entry['payload'])
+    response.headers.setdefault('ETag', etag)
+    response.headers.setdefault('Last-Modified', http_date(last_modified))
+    return response
+
+
+@login_required
+async def live_feed(request):
+    """Server-Sent Events: shipment status transitions and counters (see live.py)."""
+    response = StreamingHttpResponse(live.stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # don't let nginx buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ====================================
+# Read-only API
+# ====================================
+FAST_PARAMS = {pagination.CURSOR_PARAM, pagination.PAGE_SIZE_PARAM, 'fields', 'format'}
+
+
+def _takes_fast_path(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if not set(request.GET) <= FAST_PARAMS or request.GET.get('format', 'json') != 'json':
+        return False
+    # browsers asking for HTML get DRF's browsable API
+    return 'text/html' not in request.headers.get('Accept', '')
+
+
+def _not_found(detail):
+    return HttpResponse(FastJSONRenderer().render({'detail': detail}), status=404, content_type=JSON)
+
+
+def api_view(viewset, detail=False):
+    """
+    Async view for ``viewset``'s list (or detail) route, falling back to
+    the viewset itself for everything the fast path doesn't cover.
+    """
+    actions = (
+        {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+        if detail else {'get': 'list', 'post': 'create'}
+    )
+    model = viewset.queryset.model
+    sync_view = sync_to_async(viewset.as_view(
+        actions, basename=model._meta.model_name, detail=detail,
+        suffix='Instance' if detail else 'List',
+    ))
+    allow = ', '.join([m.upper() for m in actions] + ['HEAD', 'OPTIONS'])
+    keyset = [f.lstrip('-') for f in viewset.keyset_ordering]
+
+    @csrf_exempt
+    async def view(request, **kwargs):
+        if not _takes_fast_path(request) or not (await request.auser()).is_authenticated:
+            return await sync_view(request, **kwargs)
+        drf_request = Request(request)
+        try:
+            plan = ValuesPlan(viewset.serializer_class(context={'request': drf_request}))
+        except UnsupportedField:
+            return await sync_view(request, **kwargs)
+        queryset = viewset.queryset.prefetch_related(None)
+
+        if detail:
+            row = await queryset.values(*plan.columns()).filter(pk=kwargs['pk']).afirst()
+            if row is None:
+                return _not_found(f"No {model._meta.object_name} matches the given query.")
+            data = (await plan.arender([row]))[0]
+        else:
+            try:
+                page = await pagination.apaginate(
+                    queryset.values(*plan.columns(keyset)), viewset.keyset_ordering,
+                    cursor=request.GET.get(pagination.CURSOR_PARAM),
+                    page_size=pagination.page_size_from(request.GET),
+                )
+            except pagination.InvalidCursor:
+                return _not_found("Invalid cursor.")
+            data = {
+                'next':     pagination.cursor_link(request, page.next_cursor),
+                'previous': pagination.cursor_link(request, page.previous_cursor),
+                'results':  await plan.arender(page.object_list),
+            }
+
+        response = HttpResponse(FastJSONRenderer().render(data), content_type=JSON)
+        response['Allow'] = allow
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    return view
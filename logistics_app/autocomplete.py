@@ -0,0 +1,157 @@
+"""
+AJAX autocomplete for the foreign-key and many-to-many selects.
+
+The shipment and order forms used to render every Item / Event / User as an
+``<option>``, so their page weight grew with those tables.  The widgets
+here render only the selected values; select2 fetches the rest from
+``AutocompleteView`` as the user types:
+
+  - the lookup is a case-insensitive *prefix* match on one column, ordered
+    by that column, which SQLite answers with a range scan on the
+    ``COLLATE NOCASE`` indexes from migration 0009 and stops after a page
+    (``LIKE 'ab%'`` can use such an index; ``'%ab%'`` cannot);
+  - a page is ``max_results + 1`` rows to tell whether there is more -- no
+    COUNT over the matches, as a Paginator would do;
+  - responses are cached per (queryset, term, page) for
+    ``AUTOCOMPLETE_CACHE_TIMEOUT`` seconds.  Saving or deleting a row of
+    the model bumps its generation, so new choices show up straight away.
+    The generations live in ``SELECT2_CACHE_BACKEND`` next to the widget
+    registrations, which every worker process must share; the pages
+    themselves stay in the local default cache.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.db.models.functions import Collate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.utils.crypto import get_random_string
+from django_select2.forms import ModelSelect2MultipleWidget, ModelSelect2Widget
+from django_select2.views import AutoResponseView
+
+from .models import Event, Item, UserProfile
+
+PAGE_PARAM = 'page'
+
+
+def cache_timeout():
+    return getattr(settings, 'AUTOCOMPLETE_CACHE_TIMEOUT', 300)
+
+
+def ordering(field):
+    """Sort key matching the NOCASE prefix index, so the page needs no sort."""
+    if connection.vendor == 'sqlite':
+        return Collate(field, 'NOCASE')
+    return field
+
+
+# ——————————————————————————————————————————————————————
+# Widgets
+# ——————————————————————————————————————————————————————
+class AutocompleteMixin:
+    """
+    ModelSelect2 widget searching ``search_field`` by prefix through
+    ``AutocompleteView``.  The choices are the form field's queryset, so
+    limiting the field (e.g. delivery people by role) limits the search.
+    """
+    search_field = None
+    max_results  = 20
+
+    def __init__(self, attrs=None, **kwargs):
+        kwargs.setdefault('data_view', 'autocomplete')
+        kwargs.setdefault('search_fields', [f'{self.search_field}__istartswith'])
+        attrs = {'class': 'form-control', 'data-minimum-input-length': 1, **(attrs or {})}
+        super().__init__(attrs=attrs, **kwargs)
+
+    def filter_queryset(self, request, term, queryset=None, **dependent_fields):
+        if queryset is None:
+            queryset = self.get_queryset()
+        term = term.strip()
+        if term:
+            # the whole term as one prefix; select2's default splits it into
+            # words OR'ed across fields, which no single index can answer
+            queryset = queryset.filter(**{f'{self.search_field}__istartswith': term})
+        return queryset.order_by(ordering(self.search_field), 'pk')
+
+
+class ItemWidget(AutocompleteMixin, ModelSelect2MultipleWidget):
+    search_field = 'name'
+
+
+class EventWidget(AutocompleteMixin, ModelSelect2Widget):
+    search_field = 'name'
+
+
+class UserWidget(AutocompleteMixin, ModelSelect2Widget):
+    search_field = 'username'
+
+
+# ——————————————————————————————————————————————————————
+# JSON view
+# ——————————————————————————————————————————————————————
+def _generation_key(model):
+    return f'autocomplete:gen:{model._meta.label_lower}'
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'SELECT2_CACHE_BACKEND', 'default')]
+
+
+def generation(model):
+    return _shared_cache().get(_generation_key(model)) or '0'
+
+
+def bump_generation(model):
+    _shared_cache().set(_generation_key(model), get_random_string(8), timeout=None)
+
+
+class AutocompleteView(LoginRequiredMixin, AutoResponseView):
+    """Select2's ``{results, more}`` for a widget rendered on one of our forms."""
+
+    def get(self, request, *args, **kwargs):
+        self.widget = self.get_widget_or_404()
+        term = request.GET.get('term', '').strip()
+        try:
+            page = max(int(request.GET.get(PAGE_PARAM, 1)), 1)
+        except ValueError:
+            page = 1
+
+        model = self.queryset.model
+        # the widget's queryset varies (e.g. a shipment's current delivery
+        # person is always a choice), so it is part of the key
+        query = hashlib.md5(str(self.queryset.query).encode()).hexdigest()
+        key = f'autocomplete:{model._meta.label_lower}:{generation(model)}:{query}:{page}:{term.lower()}'
+        data = cache.get(key)
+        if data is None:
+            data = self.page(term, page)
+            cache.set(key, data, timeout=cache_timeout())
+        return JsonResponse(data)
+
+    def page(self, term, page):
+        size = self.widget.max_results
+        start = (page - 1) * size
+        rows = list(self.widget.filter_queryset(self.request, term, self.queryset)[start:start + size + 1])
+        return {
+            'results': [self.widget.result_from_instance(obj, self.request) for obj in rows[:size]],
+            'more':    len(rows) > size,
+        }
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_choices(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return      # every login saves the user; nothing a choice shows changed
+    # a role change alters which users are delivery people
+    bump_generation(User if sender is UserProfile else sender)
@@ -0,0 +1,92 @@
+"""
+Helpers shared by the benchmark commands: latency summaries, run metadata
+and JSON result files that can be diffed between commits.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.utils.module_loading import import_string
+
+
+def percentiles(samples):
+    """p50/p95/p99 (and mean/max) of ``samples``, in the samples' unit."""
+    if not samples:
+        return {'p50': None, 'p95': None, 'p99': None, 'mean': None, 'max': None}
+    if len(samples) == 1:
+        cuts = samples * 99
+    else:
+        cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {
+        'p50':  cuts[49],
+        'p95':  cuts[94],
+        'p99':  cuts[98],
+        'mean': statistics.fmean(samples),
+        'max':  max(samples),
+    }
+
+
+def git_revision():
+    try:
+        out = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5, check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+    return out.stdout.strip() or 'unknown'
+
+
+def metadata(**extra):
+    return {
+        'revision':  git_revision(),
+        'timestamp': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+        'python':    platform.python_version(),
+        'django':    django.get_version(),
+        'platform':  sys.platform,
+        **extra,
+    }
+
+
+def session_key_for(user):
+    """Create a logged-in session for ``user``; returns the key for the cookie."""
+    store = import_string(f'{settings.SESSION_ENGINE}.SessionStore')()
+    store[SESSION_KEY]         = str(user.pk)
+    store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    store[HASH_SESSION_KEY]    = user.get_session_auth_hash()
+    store.save()
+    return store.session_key
+
+
+def write_results(path, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, sort_keys=True, default=str) + '\n')
+    return path
+
+
+def load_results(path):
+    return json.loads(Path(path).read_text())
+
+
+def compare(old, new, metric='p95'):
+    """
+    Per-endpoint ``(name, old, new, ratio)`` for ``metric``; endpoints
+    missing from either run are skipped.
+    """
+    rows = []
+    for name, result in new.get('endpoints', {}).items():
+        before = old.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        a, b = before['latency_ms'].get(metric), result['latency_ms'].get(metric)
+        if a and b is not None:
+            rows.append((name, a, b, b / a))
+    return rows
@@ -0,0 +1,40 @@
+"""
+Bookkeeping for bulk writes.
+
+``bulk_create`` / ``bulk_update`` don't send post_save, so the receivers
+that keep rollups, the search index and the caches in sync never run.
+Bulk write paths call these helpers once per batch instead.
+"""
+from . import analytics, live, rollups, search, tracking
+
+
+def shipments_created(shipments):
+    """Call after ``Shipment.objects.bulk_create(shipments)``."""
+    if not shipments:
+        return
+    rollups.record_created_many('shipment', ((s.date_created, s.status) for s in shipments))
+    search.get_backend().index_many(shipments)
+    # a code may have been looked up (and cached as missing) before it existed
+    tracking.evict_on_commit(s.tracking_number for s in shipments)
+    analytics.bump_version_on_commit()
+    live.publish_on_commit([live.transition(s, None) for s in shipments])
+
+
+def shipments_updated(shipments, old_statuses):
+    """
+    Call after ``Shipment.objects.bulk_update(shipments, ...)``;
+    ``old_statuses`` maps pk -> status before the update.
+    """
+    if not shipments:
+        return
+    rollups.record_status_changes('shipment', (
+        (s.date_created, old_statuses[s.pk], s.status) for s in shipments
+    ))
+    for s in shipments:
+        s._rollup_status = s.status
+    search.get_backend().index_many(shipments)
+    tracking.evict_on_commit(s.tracking_number for s in shipments)
+    analytics.bump_version_on_commit()
+    live.publish_on_commit([
+        live.transition(s, old_statuses[s.pk]) for s in shipments if s.status != old_statuses[s.pk]
+    ])
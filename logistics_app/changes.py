@@ -0,0 +1,255 @@
+"""
+Delta-sync change feeds: ``/api/<resource>/changes/?since=<cursor>``.
+
+Shipment, Order and Event carry an indexed ``updated_at``; deletes leave a
+``Tombstone``.  A feed page is the next ``page_size`` rows and tombstones
+after the cursor in ``(timestamp, kind, id)`` order -- two range scans on
+the ``updated_at`` / tombstone indexes -- so a poll costs O(changes since
+the last poll), not O(table).  The response carries the cursor to resume
+from; it only moves forward, and a poll with nothing new returns it
+unchanged.
+
+Two details keep the cursor from skipping changes:
+
+  - ``updated_at`` is taken in Python before the row is written, so a save
+    that commits a moment after a later one could land *behind* a cursor
+    that already passed it.  Feeds therefore hold back anything newer than
+    ``CHANGES_SETTLE_SECONDS``.
+  - Writes that bypass ``auto_now`` (``bulk_update``, queryset ``update()``,
+    M2M changes, SET_NULL cascades) bump ``updated_at`` explicitly; see the
+    receivers below and serializers.ShipmentListSerializer.
+
+Tombstones older than ``CHANGES_RETENTION_DAYS`` are pruned by
+``manage.py prune_tombstones``, which records the newest one it removed per
+feed (``TombstoneWatermark``).  A cursor at or before that mark may have
+missed a delete, so it gets 410 Gone and the client has to re-sync from
+scratch (no ``since``).  An old cursor is otherwise fine -- a fully synced
+client of a table nobody writes to keeps handing back the cursor of the
+last change it saw.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max, Q
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from . import pagination
+from .fastpath import UnsupportedField, ValuesPlan
+from .models import Event, Order, Shipment, Tombstone, TombstoneWatermark
+
+SINCE_PARAM = 'since'
+
+FEEDS = {
+    Shipment: 'shipment',
+    Order:    'order',
+    Event:    'event',
+}
+
+# tie-break between a row and a tombstone with the same timestamp
+ROW, DELETED = 0, 1
+
+
+def settle_seconds():
+    return getattr(settings, 'CHANGES_SETTLE_SECONDS', 2)
+
+
+def retention():
+    return timedelta(days=getattr(settings, 'CHANGES_RETENTION_DAYS', 30))
+
+
+class CursorExpired(Exception):
+    pass
+
+
+# ——————————————————————————————————————————————————————
+# Cursors
+# ——————————————————————————————————————————————————————
+def encode_cursor(position):
+    when, kind, pk = position
+    raw = json.dumps([when.isoformat(), kind, pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """``(timestamp, kind, id)``, or None for an empty token."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        when, kind, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        when = parse_datetime(when)
+        if when is None or timezone.is_naive(when) or kind not in (ROW, DELETED):
+            raise ValueError(token)
+        return when, kind, int(pk)
+    except Exception as exc:
+        raise pagination.InvalidCursor(token) from exc
+
+
+def _after(ts_field, id_field, kind, cursor):
+    """Filter for entries of ``kind`` positioned after ``cursor``."""
+    if cursor is None:
+        return Q()
+    when, cursor_kind, pk = cursor
+    if kind < cursor_kind:
+        return Q(**{f'{ts_field}__gt': when})
+    if kind > cursor_kind:
+        return Q(**{f'{ts_field}__gte': when})
+    # written as a range plus an exclusion (not an OR) so it stays an index range scan
+    return Q(**{f'{ts_field}__gte': when}) & ~Q(**{ts_field: when, f'{id_field}__lte': pk})
+
+
+# ——————————————————————————————————————————————————————
+# Reading a feed
+# ——————————————————————————————————————————————————————
+class ChangePage:
+    def __init__(self, rows, deleted, cursor, has_more):
+        self.rows     = rows       # changed rows (``.values()`` dicts or instances)
+        self.deleted  = deleted    # ids deleted
+        self.cursor   = cursor     # position to resume from
+        self.has_more = has_more
+
+
+def _field(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def read(queryset, cursor, limit, now=None):
+    """
+    The next ``limit`` changes to ``queryset``'s model after ``cursor``.
+    ``queryset`` may be a ``.values()`` queryset that includes ``pk`` and
+    ``updated_at``.
+    """
+    now = now or timezone.now()
+    if cursor is not None and is_expired(FEEDS[queryset.model], cursor, now):
+        raise CursorExpired
+    horizon = now - timedelta(seconds=settle_seconds())
+
+    rows = (queryset.filter(_after('updated_at', 'pk', ROW, cursor), updated_at__lte=horizon)
+                    .order_by('updated_at', 'pk')[:limit + 1])
+    tombstones = (Tombstone.objects
+                  .filter(_after('deleted_at', 'id', DELETED, cursor),
+                          model=FEEDS[queryset.model], deleted_at__lte=horizon)
+                  .order_by('deleted_at', 'id')
+                  .values_list('deleted_at', 'id', 'object_id')[:limit + 1])
+
+    entries = sorted(
+        [((_field(r, 'updated_at'), ROW, _field(r, 'pk')), r) for r in rows]
+        + [((when, DELETED, pk), object_id) for when, pk, object_id in tombstones],
+        key=lambda entry: entry[0],
+    )
+    page = entries[:limit]
+    return ChangePage(
+        rows     = [item for (_, kind, _), item in page if kind == ROW],
+        deleted  = [item for (_, kind, _), item in page if kind == DELETED],
+        cursor   = page[-1][0] if page else cursor,
+        has_more = len(entries) > limit,
+    )
+
+
+def is_expired(feed, cursor, now):
+    """Whether tombstones after ``cursor`` may have been pruned from ``feed``."""
+    # pruning only removes tombstones older than the retention window, so
+    # a cursor inside it needs no lookup
+    if cursor[0] >= now - retention():
+        return False
+    mark = TombstoneWatermark.objects.filter(model=feed).values_list('pruned_through', flat=True).first()
+    return mark is not None and cursor[0] <= mark
+
+
+@transaction.atomic
+def prune_tombstones(now=None):
+    """
+    Delete tombstones past the retention window and move each feed's
+    watermark up to the newest one deleted; returns how many.
+    """
+    expired = Tombstone.objects.filter(deleted_at__lt=(now or timezone.now()) - retention())
+    for feed, newest in expired.values_list('model').annotate(newest=Max('deleted_at')).order_by():
+        mark, created = TombstoneWatermark.objects.get_or_create(model=feed, defaults={'pruned_through': newest})
+        if not created and mark.pruned_through < newest:
+            mark.pruned_through = newest
+            mark.save(update_fields=['pruned_through'])
+    deleted, _ = expired.delete()
+    return deleted
+
+
+class ChangeFeedMixin:
+    """Viewset mixin adding the ``changes`` list route."""
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Rows changed and ids deleted since ``?since=`` (omit it for a full
+        sync), oldest first, ``?page_size=`` at a time.  Poll again with the
+        returned ``cursor``; ``has_more`` means the next page is ready now.
+        """
+        try:
+            cursor = decode_cursor(request.query_params.get(SINCE_PARAM))
+        except pagination.InvalidCursor:
+            raise ValidationError({SINCE_PARAM: ["Invalid cursor."]})
+
+        queryset = self.get_queryset().prefetch_related(None)
+        try:
+            plan = ValuesPlan(self.get_serializer())
+            queryset = queryset.values(*plan.columns(['updated_at']))
+        except UnsupportedField:
+            plan = None
+
+        try:
+            page = read(queryset, cursor, pagination.page_size_from(request.query_params))
+        except CursorExpired:
+            return Response(
+                {'detail': "Cursor is older than the change history; re-sync without 'since'."},
+                status=status.HTTP_410_GONE,
+            )
+        return Response({
+            'results':  plan.render(page.rows) if plan else self.get_serializer(page.rows, many=True).data,
+            'deleted':  page.deleted,
+            'cursor':   encode_cursor(page.cursor) if page.cursor else None,
+            'has_more': page.has_more,
+        })
+
+
+# ——————————————————————————————————————————————————————
+# Keep updated_at and the tombstones in step
+# ——————————————————————————————————————————————————————
+@receiver(post_delete, sender=Shipment)
+@receiver(post_delete, sender=Order)
+@receiver(post_delete, sender=Event)
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=FEEDS[sender], object_id=instance.pk, deleted_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Order.items.through)
+def touch_orders_on_items_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        orders = Order.objects.filter(pk=instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        orders = Order.objects.filter(pk__in=pk_set or ())
+    elif action == 'pre_clear':
+        # item.orders.clear(): pk_set isn't provided, and afterwards there'd
+        # be no way to tell which orders had the item
+        orders = Order.objects.filter(items=instance.pk)
+    else:
+        return
+    orders.update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Event)
+@receiver(pre_delete, sender=User)
+def touch_shipments_losing_a_reference(sender, instance, **kwargs):
+    # the SET_NULL on Shipment.event / delivery_person is a queryset update
+    field = 'event' if sender is Event else 'delivery_person'
+    Shipment.objects.filter(**{field: instance}).update(updated_at=timezone.now())
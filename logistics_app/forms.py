@@ -1,9 +1,21 @@
 from django import forms
 from django.contrib.auth.models import User
-from django_select2.forms import Select2TagWidget
+from django.db.models import Q
+from .autocomplete import EventWidget, ItemWidget, UserWidget
 from .models import Shipment, Order, Event, UserProfile, Warehouse
 import uuid
 
+DELIVERY_ROLE = 'delivery_person'
+
+
+def delivery_people(also=None):
+    """Active users who can be assigned a shipment (plus user id ``also``)."""
+    people = Q(is_active=True, profile__role=DELIVERY_ROLE)
+    if also is not None:
+        people |= Q(pk=also)
+    return User.objects.filter(people)
+
+
 # -----------------------------------
 # Shipment Form (tracking hidden)
 # -----------------------------------
@@ -32,19 +44,65 @@ class ShipmentForm(forms.ModelForm):
             'origin': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Origin'}),
             'destination': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Destination'}),
             'contents': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
-            'event': forms.Select(attrs={'class': 'form-control'}),
-            'delivery_person': forms.Select(attrs={'class': 'form-control'}),
+            'event': EventWidget(attrs={'data-placeholder': 'Search events…'}),
+            'delivery_person': UserWidget(attrs={'data-placeholder': 'Search delivery people…'}),
         }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # keep a current assignee selectable even if their role has since changed
+        self.fields['delivery_person'].queryset = delivery_people(also=self.instance.delivery_person_id)
         # ensure datetime widget matches instance formatting
         if self.instance and self.instance.date_delivered:
             self.initial['date_delivered'] = self.instance.date_delivered.strftime('%Y-%m-%dT%H:%M')
 
 
 # -----------------------------------
-# Order Form (excludes order_date)
+# CSV import (see importers.py)
+# -----------------------------------
+class PreloadedModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField that resolves ids from a dict loaded once per batch,
+    instead of one query per clean().
+    """
+    def __init__(self, queryset, objects, **kwargs):
+        super().__init__(queryset, **kwargs)
+        self.objects = objects
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objects[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+
+
+class ShipmentRowForm(ShipmentForm):
+    """ShipmentForm rules for one CSV row; FK ids come from preloaded dicts."""
+    def __init__(self, *args, events=None, people=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, objects in (('event', events), ('delivery_person', people)):
+            field = self.fields[name]
+            self.fields[name] = PreloadedModelChoiceField(
+                field.queryset, objects or {}, required=field.required,
+            )
+
+
+class ShipmentUploadForm(forms.Form):
+    file = forms.FileField(
+        label='Manifest (CSV)',
+        help_text='Columns: origin, destination, status, date_delivered, contents, event, delivery_person',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control-file', 'accept': '.csv'}),
+    )
+
+
+# -----------------------------------
+# Order Form (excludes order_date; total_price is computed)
 # -----------------------------------
 class OrderForm(forms.ModelForm):
     class Meta:
@@ -55,14 +113,12 @@ class OrderForm(forms.ModelForm):
             'status',
             'customer',
             'items',
-            'total_price',
         ]
         widgets = {
             'order_number': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Leave blank to auto‑generate'}),
             'status': forms.Select(attrs={'class': 'form-control'}),
-            'customer': forms.Select(attrs={'class': 'form-control'}),
-            'items': Select2TagWidget(attrs={'class': 'form-control'}),
-            'total_price': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+            'customer': UserWidget(attrs={'data-placeholder': 'Search customers…'}),
+            'items': ItemWidget(attrs={'data-placeholder': 'Search items…'}),
         }
 
     def clean(self):
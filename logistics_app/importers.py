@@ -0,0 +1,111 @@
+"""
+Streaming CSV import for shipment manifests.
+
+Rows are read one at a time with ``csv.DictReader``, validated with the
+ShipmentForm rules and written with ``bulk_create`` in batches of
+``SHIPMENT_IMPORT_BATCH_SIZE``, each batch in its own transaction.
+Tracking numbers for a batch are generated up front with a single
+collision check, so inserts never need per-row retries.
+"""
+import csv
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from . import bulk
+from .forms import ShipmentRowForm, delivery_people
+from .models import Event, Shipment, generate_tracking_numbers
+
+REQUIRED_COLUMNS = ('origin', 'destination')
+
+
+def default_batch_size():
+    return getattr(settings, 'SHIPMENT_IMPORT_BATCH_SIZE', 1000)
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors  = []      # [(line number, {field: [messages]})]
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        return self.created + len(self.errors)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def _ids(rows, column):
+    ids = set()
+    for _, row in rows:
+        try:
+            ids.add(int(row.get(column) or ''))
+        except ValueError:
+            pass
+    return ids
+
+
+def _import_batch(rows, result):
+    events = Event.objects.in_bulk(_ids(rows, 'event'))
+    people = delivery_people().in_bulk(_ids(rows, 'delivery_person'))
+
+    shipments = []
+    for line, row in rows:
+        data = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        data['status'] = data.get('status') or 'PENDING'
+        form = ShipmentRowForm(data, events=events, people=people)
+        if form.is_valid():
+            shipments.append(form.save(commit=False))
+        else:
+            result.errors.append((line, {f: list(msgs) for f, msgs in form.errors.items()}))
+    if not shipments:
+        return
+
+    for attempt in range(2):
+        for shipment, code in zip(shipments, generate_tracking_numbers(len(shipments))):
+            shipment.tracking_number = code
+        try:
+            with transaction.atomic():
+                Shipment.objects.bulk_create(shipments)
+                bulk.shipments_created(shipments)
+            break
+        except IntegrityError:
+            # a concurrent writer took one of our codes; draw a fresh set once
+            if attempt:
+                raise
+    result.created += len(shipments)
+
+
+def import_shipments(fileobj, batch_size=None, on_batch=None):
+    """
+    Import shipments from a text-mode CSV file object and return an
+    ImportResult.  ``on_batch(result)`` is called after every batch.
+    """
+    batch_size = batch_size or default_batch_size()
+    result = ImportResult()
+    reader = csv.DictReader(fileobj)
+
+    header  = [name.strip() for name in reader.fieldnames or []]
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        result.errors.append((1, {'__all__': [f"Missing column(s): {', '.join(missing)}"]}))
+        return result
+
+    # header is line 1
+    rows = enumerate(reader, start=2)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        _import_batch(batch, result)
+        result.elapsed = time.monotonic() - result.started
+        if on_batch:
+            on_batch(result)
+    result.elapsed = time.monotonic() - result.started
+    return result
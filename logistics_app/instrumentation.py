@@ -0,0 +1,189 @@
+"""
+Per-request performance instrumentation.
+
+``RequestTimingMiddleware`` counts SQL queries and DB time through an
+execute wrapper on every connection (no DEBUG query logging needed), picks up
+template render time from ``TimedDjangoTemplates``, and reports everything
+as a ``Server-Timing`` header plus one structured log line per request on
+the ``logistics_app.perf`` logger.  Views whose query count exceeds their
+entry in ``settings.QUERY_BUDGETS`` log a warning.  A plain URL name sets
+the budget for reads (GET/HEAD); writes are only checked against entries
+keyed by ``(url_name, method)``, since creating or bulk-updating rows
+costs queries per row.
+
+The wrapper is installed once per connection and reports to the current
+request's ``RequestStats`` through a context variable, so queries run by
+async views (in the ORM's executor threads, which have their own
+connections) are counted too.  The middleware runs natively in both
+sync and async handlers.
+"""
+import contextvars
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics
+
+logger = logging.getLogger('logistics_app.perf')
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries       = 0
+        self.db_time       = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+def current_stats():
+    """RequestStats of the request being handled, or None."""
+    return _current.get()
+
+
+def _dispatch(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install(connection):
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+@receiver(connection_created)
+def _install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+# ——————————————————————————————————————————————————————
+# Template timing
+# ——————————————————————————————————————————————————————
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their render time."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+# ——————————————————————————————————————————————————————
+# Middleware
+# ——————————————————————————————————————————————————————
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def query_budget(url_name, method):
+    """The query budget for ``method`` on the view named ``url_name``, or None."""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if (url_name, method) in budgets:
+        return budgets[(url_name, method)]
+    if method not in ('GET', 'HEAD'):
+        return None
+    return budgets.get(url_name, getattr(settings, 'DEFAULT_QUERY_BUDGET', None))
+
+
+class RequestTimingMiddleware:
+    sync_capable  = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        # connections opened before this module was imported
+        for conn in connections.all(initialized_only=True):
+            install(conn)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - start)
+
+    def finish(self, request, response, stats, total):
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.url_name if match else None
+        record = {
+            'method':   request.method,
+            'path':     request.path,
+            'view':     url_name,
+            'status':   response.status_code,
+            'queries':  stats.queries,
+            'db_ms':    _ms(stats.db_time),
+            'tpl_ms':   _ms(stats.template_time),
+            'total_ms': _ms(total),
+        }
+        request.perf = record
+        metrics.observe_request(record, total)
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={record["db_ms"]};desc="{stats.queries} queries"',
+                f'tpl;dur={record["tpl_ms"]}',
+                f'view;dur={record["total_ms"]}',
+            ])
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record), extra={'perf': record})
+        budget = query_budget(url_name, request.method)
+        if budget is not None and stats.queries > budget:
+            logger.warning(
+                "Query budget exceeded: %s ran %d queries (budget %d)",
+                url_name or request.path, stats.queries, budget,
+                extra={'perf': record},
+            )
+        return response
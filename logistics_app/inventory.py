@@ -0,0 +1,103 @@
+"""
+Stock reservations.
+
+Placing an order takes one unit of each of its items off
+``Item.quantity_in_stock``.  Reading the stock, checking it and saving the
+decremented value (read-modify-write) loses updates when two orders for
+the same item race, and sells stock that is no longer there.  ``reserve()``
+makes the check and the decrement one statement instead:
+
+    UPDATE item SET quantity_in_stock = quantity_in_stock - n
+     WHERE id IN (...) AND quantity_in_stock >= n
+
+one per distinct ``n`` in the request (a single UPDATE for an order).
+The database serialises the UPDATEs, so there is nothing to lock or retry
+in Python.  If fewer rows match than were asked for, some item is short
+and the savepoint rolls back: an order's items are reserved all together
+or not at all, and the caller's enclosing transaction (creating the order)
+fails with it.  The warehouses stocking the items have their utilisation
+counters adjusted in the same transaction.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from . import utilisation
+from .models import Item
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages):
+        super().__init__(shortages)
+        # [{'item', 'name', 'requested', 'available'}]; unknown items have
+        # name None and nothing available
+        self.shortages = shortages
+
+    def __str__(self):
+        return "Not enough stock: " + ", ".join(
+            f"{s['name'] or s['item']} ({s['requested']} requested, {s['available']} left)"
+            for s in self.shortages
+        )
+
+
+def units(items):
+    """Quantities for an order's items (Items or ids): one unit of each."""
+    return {getattr(item, 'pk', item): 1 for item in items}
+
+
+def _batches(quantities):
+    by_quantity = defaultdict(list)
+    for pk, n in quantities.items():
+        by_quantity[n].append(pk)
+    return sorted(by_quantity.items())
+
+
+def reserve(quantities):
+    """
+    Take ``quantities`` (item id -> units) out of stock, all or nothing.
+    Raises InsufficientStock, having reserved nothing, if any item is short.
+    """
+    quantities = {pk: n for pk, n in quantities.items() if n > 0}
+    try:
+        with transaction.atomic():
+            for n, ids in _batches(quantities):
+                updated = (Item.objects.filter(pk__in=ids, quantity_in_stock__gte=n)
+                                       .update(quantity_in_stock=F('quantity_in_stock') - n))
+                if updated != len(ids):
+                    raise InsufficientStock([])
+            utilisation.stock_changed({pk: -n for pk, n in quantities.items()})
+    except InsufficientStock:
+        raise InsufficientStock(shortages(quantities)) from None
+
+
+def release(quantities):
+    """Put ``quantities`` (item id -> units) back in stock."""
+    quantities = {pk: n for pk, n in quantities.items() if n > 0}
+    with transaction.atomic():
+        for n, ids in _batches(quantities):
+            Item.objects.filter(pk__in=ids).update(quantity_in_stock=F('quantity_in_stock') + n)
+        utilisation.stock_changed(quantities)
+
+
+def adjust(before, after):
+    """Reserve items added to an order and release the ones removed (ids)."""
+    with transaction.atomic():
+        reserve(units(set(after) - set(before)))
+        release(units(set(before) - set(after)))
+
+
+def stock_levels(ids):
+    return dict(Item.objects.filter(pk__in=ids).values_list('pk', 'quantity_in_stock'))
+
+
+def shortages(quantities):
+    """The items in ``quantities`` that current stock can't cover."""
+    stock = {pk: (name, qty) for pk, name, qty in
+             Item.objects.filter(pk__in=quantities).values_list('pk', 'name', 'quantity_in_stock')}
+    found = []
+    for pk, n in sorted(quantities.items()):
+        name, available = stock.get(pk, (None, 0))
+        if available < n:
+            found.append({'item': pk, 'name': name, 'requested': n, 'available': max(available, 0)})
+    return found
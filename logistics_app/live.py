@@ -0,0 +1,359 @@
+"""
+Live updates for the dashboards over Server-Sent Events.
+
+Shipment status transitions and the rollup counters are *pushed* to open
+dashboards instead of each page re-polling ``analytics_data``:
+
+  1. A Shipment/Order save schedules a publish for when its transaction
+     commits.  The writer reads the counters once (one indexed query on
+     StatCounter) and publishes a ``shipment`` message per transition plus
+     one ``counters`` message.
+  2. The message goes through a *channel* so every worker process gets it.
+  3. In each process one ``Broadcaster`` encodes it as SSE once and hands
+     the bytes to every open stream's queue from memory.
+
+So the database work per change is constant, however many dashboards are
+watching, and an idle dashboard costs none.  New streams are sent the
+latest ``counters`` message straight away, so a reconnecting browser is
+current without querying either.
+
+Channels (``LIVE_CHANNEL``):
+  LocalChannel        in-process only; enough for a single ASGI worker
+  UnixSocketChannel   a datagram socket per listening worker in
+                      ``LIVE_SOCKET_DIR``; publishers send to all of them
+  SQLitePollChannel   an append-only table in a side SQLite file
+                      (``LIVE_SQLITE_PATH``) polled by one thread per
+                      listening worker every ``LIVE_POLL_INTERVAL`` seconds
+
+Queryset ``update()`` and ``bulk_*`` bypass signals; the bulk write paths
+publish through bulk.py.
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import rollups
+from .models import Order, Shipment
+
+# messages replayed to new streams
+REPLAYED = ('counters',)
+
+# queued in place of a message to end a stream that fell too far behind
+_CLOSE = b''
+
+
+def encode(event, data):
+    """One SSE frame."""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n".encode()
+
+
+# ——————————————————————————————————————————————————————
+# In-process fan-out
+# ——————————————————————————————————————————————————————
+class Subscription:
+    """One open stream: a bounded queue owned by the stream's event loop."""
+
+    def __init__(self, loop, maxsize):
+        self.loop  = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, frame):
+        # runs on self.loop
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # a client this far behind reconnects and gets the latest counters
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_CLOSE)
+
+
+class Broadcaster:
+    def __init__(self, queue_size=100):
+        self.queue_size   = queue_size
+        self._subscribers = set()
+        self._latest      = {}
+        self._lock        = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """Register a stream; call from the event loop that will consume it."""
+        sub = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(sub)
+            replay = list(self._latest.values())
+        for frame in replay:
+            sub.put(frame)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def deliver(self, event, data):
+        """Fan a message out to every stream; safe to call from any thread."""
+        frame = encode(event, data)
+        with self._lock:
+            if event in REPLAYED:
+                self._latest[event] = frame
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.put, frame)
+            except RuntimeError:
+                # its event loop has shut down
+                self.unsubscribe(sub)
+
+
+# ——————————————————————————————————————————————————————
+# Cross-process channels
+# ——————————————————————————————————————————————————————
+class LocalChannel:
+    """Delivers within this process only."""
+
+    def __init__(self):
+        self._deliver = None
+
+    def listen(self, deliver):
+        self._deliver = deliver
+
+    def publish(self, event, data):
+        if self._deliver is not None:
+            self._deliver(event, data)
+
+
+def _dumps(event, data):
+    return json.dumps([event, data], cls=DjangoJSONEncoder)
+
+
+class UnixSocketChannel:
+    """
+    Each listening process binds ``live_<pid>.sock`` in ``LIVE_SOCKET_DIR``;
+    ``publish`` sends one datagram to every socket there and removes the
+    ones nobody is bound to any more (workers that have exited).
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or settings.LIVE_SOCKET_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self._listener = None
+
+    def listen(self, deliver):
+        if self._listener is not None:
+            return
+        path = self.directory / f'live_{os.getpid()}.sock'
+        path.unlink(missing_ok=True)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._listener.bind(str(path))
+
+        def receive():
+            while True:
+                payload = self._listener.recv(65536)
+                deliver(*json.loads(payload))
+
+        threading.Thread(target=receive, name='live-socket', daemon=True).start()
+
+    def publish(self, event, data):
+        payload = _dumps(event, data).encode()
+        for path in self.directory.glob('live_*.sock'):
+            try:
+                self._sender.sendto(payload, str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                path.unlink(missing_ok=True)
+            except BlockingIOError:
+                # that worker's receive buffer is full; it misses this one
+                pass
+
+
+class SQLitePollChannel:
+    """
+    Messages are appended to a table in a separate SQLite file (not the
+    application database, so polling never contends with its writers).
+    One thread per listening process reads new rows every
+    ``LIVE_POLL_INTERVAL`` seconds; rows older than the newest
+    ``LIVE_SQLITE_KEEP`` are pruned as new ones are written.
+    """
+
+    def __init__(self, path=None, interval=None, keep=None):
+        self.path     = str(path or settings.LIVE_SQLITE_PATH)
+        self.interval = interval if interval is not None else getattr(settings, 'LIVE_POLL_INTERVAL', 0.5)
+        self.keep     = keep if keep is not None else getattr(settings, 'LIVE_SQLITE_KEEP', 1000)
+        self._listening = False
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS live_message ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def listen(self, deliver):
+        if self._listening:
+            return
+        self._listening = True
+        with closing(self._connect()) as conn:
+            (last,) = conn.execute('SELECT coalesce(max(id), 0) FROM live_message').fetchone()
+
+        def poll(last):
+            with closing(self._connect()) as conn:
+                while True:
+                    time.sleep(self.interval)
+                    rows = conn.execute(
+                        'SELECT id, payload FROM live_message WHERE id > ? ORDER BY id', (last,)
+                    ).fetchall()
+                    for last, payload in rows:
+                        deliver(*json.loads(payload))
+
+        threading.Thread(target=poll, args=(last,), name='live-poll', daemon=True).start()
+
+    def publish(self, event, data):
+        with closing(self._connect()) as conn, conn:
+            row_id = conn.execute(
+                'INSERT INTO live_message (payload) VALUES (?)', (_dumps(event, data),)
+            ).lastrowid
+            conn.execute('DELETE FROM live_message WHERE id <= ?', (row_id - self.keep,))
+
+
+_broadcaster = None
+_channel = None
+_setup_lock = threading.Lock()
+
+
+def get_channel():
+    global _channel
+    if _channel is None:
+        with _setup_lock:
+            if _channel is None:
+                path = getattr(settings, 'LIVE_CHANNEL', 'logistics_app.live.LocalChannel')
+                _channel = import_string(path)()
+    return _channel
+
+
+def get_broadcaster():
+    """This process's Broadcaster, listening on the channel from first use."""
+    global _broadcaster
+    if _broadcaster is None:
+        channel = get_channel()
+        with _setup_lock:
+            if _broadcaster is None:
+                broadcaster = Broadcaster(getattr(settings, 'LIVE_QUEUE_SIZE', 100))
+                channel.listen(broadcaster.deliver)
+                _broadcaster = broadcaster
+    return _broadcaster
+
+
+def reset():
+    """Drop the broadcaster and channel (tests, or after changing LIVE_* settings)."""
+    global _broadcaster, _channel
+    _broadcaster = _channel = None
+
+
+async def stream(heartbeat=None):
+    """SSE body for one client: replayed state, then messages as they arrive."""
+    if heartbeat is None:
+        heartbeat = getattr(settings, 'LIVE_HEARTBEAT', 15)
+    broadcaster = get_broadcaster()
+    sub = broadcaster.subscribe()
+    try:
+        # EventSource reconnect delay (ms)
+        yield b'retry: 3000\n\n'
+        while True:
+            try:
+                frame = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                # comments keep proxies from closing an idle stream
+                frame = b': keepalive\n\n'
+            if frame == _CLOSE:
+                return
+            yield frame
+    finally:
+        broadcaster.unsubscribe(sub)
+
+
+# ——————————————————————————————————————————————————————
+# Publishing
+# ——————————————————————————————————————————————————————
+def current_counters():
+    keys = {
+        'shipments': [None] + [s for s, _ in Shipment.STATUS_CHOICES],
+        'orders':    [None] + [s for s, _ in Order.STATUS_CHOICES],
+    }
+    kinds = {'shipments': 'shipment', 'orders': 'order'}
+    values = rollups.counters(*(
+        rollups.counter_key(kinds[name], status) for name, statuses in keys.items() for status in statuses
+    ))
+    return {
+        name: {status or 'total': values[rollups.counter_key(kinds[name], status)] for status in statuses}
+        for name, statuses in keys.items()
+    }
+
+
+def transition(shipment, old_status):
+    return {
+        'id':              shipment.pk,
+        'tracking_number': shipment.tracking_number,
+        'from':            old_status,
+        'to':              shipment.status,
+        'at':              timezone.localtime(),
+    }
+
+
+def publish_on_commit(transitions=()):
+    """
+    Publish ``transitions`` (dicts from ``transition()``) and the current
+    counters once the current transaction commits; nothing is sent if it
+    rolls back.  A channel error (a locked side database, a dead socket) is
+    logged rather than raised: the write has committed by then, so the
+    request must not fail.
+    """
+    transaction.on_commit(lambda: publish(transitions), robust=True)
+
+
+def publish(transitions=()):
+    channel = get_channel()
+    for message in transitions:
+        channel.publish('shipment', message)
+    channel.publish('counters', current_counters())
+
+
+@receiver(pre_save, sender=Shipment)
+def remember_previous_status(sender, instance, raw=False, **kwargs):
+    # rollups resets _rollup_status in its post_save receiver
+    instance._live_status = getattr(instance, '_rollup_status', None)
+
+
+@receiver(post_save, sender=Shipment)
+def publish_shipment_change(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else instance._live_status
+    if created or (old is not None and old != instance.status):
+        publish_on_commit([transition(instance, old)])
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Shipment)
+@receiver(post_delete, sender=Order)
+def publish_counters_change(sender, raw=False, **kwargs):
+    if not raw:
+        publish_on_commit()
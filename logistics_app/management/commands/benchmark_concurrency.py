@@ -0,0 +1,245 @@
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+from logistics_app import benchmarking
+from logistics_app.models import Shipment
+
+BENCH_USER = 'benchmark'
+HOST = 'localhost'
+
+
+def _paths(codes):
+    return (
+        [f'/track/?tracking_number={c}' for c in codes]
+        + ['/analytics/data/', '/api/shipments/?page_size=20', '/api/events/?page_size=20']
+    )
+
+
+def _split(path):
+    path, _, query = path.partition('?')
+    return path, query
+
+
+# ——————————————————————————————————————————————————————
+# WSGI: a fixed pool of worker threads, like gunicorn --threads N
+# ——————————————————————————————————————————————————————
+def run_wsgi(app, paths, cookie, clients, threads, delay, duration, rng):
+    pool = ThreadPoolExecutor(max_workers=threads)
+
+    def serve(path):
+        path, query = _split(path)
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+            'SERVER_NAME': HOST, 'SERVER_PORT': '80', 'HTTP_HOST': HOST,
+            'HTTP_COOKIE': cookie, 'HTTP_ACCEPT': 'application/json',
+            'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        status = []
+        body = app(environ, lambda s, h, exc_info=None: status.append(int(s.split()[0])))
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        # a slow client: the worker thread is busy until the response is drained
+        time.sleep(delay)
+        return status[0]
+
+    samples, statuses, lock = [], {}, threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed):
+        local = random.Random(seed)
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            code = pool.submit(serve, local.choice(paths)).result()
+            with lock:
+                samples.append((time.perf_counter() - start) * 1000)
+                statuses[code] = statuses.get(code, 0) + 1
+
+    began = time.monotonic()
+    workers = [threading.Thread(target=client, args=(rng.random(),)) for _ in range(clients)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    pool.shutdown()
+    return samples, statuses, time.monotonic() - began
+
+
+# ——————————————————————————————————————————————————————
+# ASGI: one event loop, as under uvicorn/daphne
+# ——————————————————————————————————————————————————————
+def run_asgi(app, paths, cookie, clients, delay, duration, rng):
+    samples, statuses = [], {}
+
+    async def serve(path):
+        path, query = _split(path)
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': query.encode(), 'root_path': '',
+            'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode()),
+                        (b'accept', b'application/json')],
+            'client': ('127.0.0.1', 50000), 'server': (HOST, 80),
+        }
+        sent_request = False
+        status = []
+
+        async def receive():
+            nonlocal sent_request
+            if not sent_request:
+                sent_request = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Event().wait()      # no disconnect until cancelled
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                # a slow client: only this coroutine waits for the drain
+                await asyncio.sleep(delay)
+
+        await app(scope, receive, send)
+        return status[0]
+
+    async def client(seed):
+        local = random.Random(seed)
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            code = await serve(local.choice(paths))
+            samples.append((time.perf_counter() - start) * 1000)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    async def main():
+        await asyncio.gather(*(client(rng.random()) for _ in range(clients)))
+
+    began = time.monotonic()
+    deadline = began + duration
+    asyncio.run(main())
+    return samples, statuses, time.monotonic() - began
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare how many concurrent (slow) clients the WSGI deployment (sync "
+        "views, fixed thread pool) and the ASGI deployment (async views, one "
+        "event loop) sustain.  Each server runs in-process in its own "
+        "subprocess; clients hold each response for --client-delay seconds, "
+        "the way slow mobile connections do on event days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 32, 128])
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker threads")
+        parser.add_argument('--client-delay', type=float, default=0.2, help="Seconds to drain a response")
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds per run")
+        parser.add_argument('--slo', type=float, default=1000.0, help="p95 target in ms for the capacity summary")
+        parser.add_argument('--output', help="Write the JSON report here")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--child', choices=['wsgi', 'asgi'], help="Internal: run one server mode")
+        parser.add_argument('--clients', type=int, help="Internal: client count for --child")
+
+    def handle(self, *args, **opts):
+        if opts['child']:
+            return self.child(opts)
+
+        runs = {'wsgi': {}, 'asgi': {}}
+        for clients in opts['concurrency']:
+            for mode in runs:
+                result = self.spawn(mode, clients, opts)
+                runs[mode][clients] = result
+                lat = result['latency_ms']
+                self.stdout.write(
+                    f"{mode}  {clients:>5} clients  {result['throughput']:8.1f} req/s  "
+                    f"p50 {lat['p50']:8.1f}  p95 {lat['p95']:8.1f} ms  {result['statuses']}"
+                )
+
+        capacity = {
+            mode: max((c for c, r in results.items() if r['latency_ms']['p95'] <= opts['slo']), default=0)
+            for mode, results in runs.items()
+        }
+        self.stdout.write(self.style.SUCCESS(
+            f"Clients served within p95 ≤ {opts['slo']:.0f}ms: "
+            f"WSGI ({opts['threads']} threads) {capacity['wsgi']}, ASGI {capacity['asgi']}"
+        ))
+        if opts['output']:
+            path = benchmarking.write_results(opts['output'], {
+                'meta': benchmarking.metadata(
+                    threads=opts['threads'], client_delay=opts['client_delay'],
+                    duration=opts['duration'], slo_ms=opts['slo'],
+                ),
+                'runs': runs,
+                'capacity': capacity,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def spawn(self, mode, clients, opts):
+        env = dict(os.environ, DJANGO_ASYNC_VIEWS='1' if mode == 'asgi' else '0')
+        cmd = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_concurrency',
+            '--child', mode, '--clients', str(clients), '--threads', str(opts['threads']),
+            '--client-delay', str(opts['client_delay']), '--duration', str(opts['duration']),
+            '--seed', str(opts['seed']), '--skip-checks',
+        ]
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if proc.returncode:
+            raise CommandError(f"{mode} run failed:\n{proc.stderr}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def child(self, opts):
+        if settings.ASYNC_VIEWS != (opts['child'] == 'asgi'):
+            raise CommandError("DJANGO_ASYNC_VIEWS doesn't match the requested mode")
+        override_settings(ALLOWED_HOSTS=[HOST], DEBUG=False).enable()
+        for name in ('django.request', 'logistics_app.perf'):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+
+        rng = random.Random(opts['seed'])
+        user, created = User.objects.get_or_create(
+            username=BENCH_USER, defaults={'is_staff': True, 'is_superuser': True},
+        )
+        if created:
+            user.set_unusable_password()
+            user.save()
+        cookie = f"{settings.SESSION_COOKIE_NAME}={benchmarking.session_key_for(user)}"
+        codes = list(Shipment.objects.order_by('-id').values_list('tracking_number', flat=True)[:100])
+        paths = _paths(codes or ['SL00000000000000'])
+
+        if opts['child'] == 'wsgi':
+            app = import_string('sports_logistics.wsgi.application')
+            run = lambda clients, duration: run_wsgi(
+                app, paths, cookie, clients, opts['threads'], opts['client_delay'], duration, rng)
+        else:
+            app = import_string('sports_logistics.asgi.application')
+            run = lambda clients, duration: run_asgi(
+                app, paths, cookie, clients, opts['client_delay'], duration, rng)
+
+        run(min(opts['clients'], 4), 0.5)           # warm up caches and templates
+        # requests in flight at the deadline still finish, so use the real elapsed time
+        samples, statuses, elapsed = run(opts['clients'], opts['duration'])
+        self.stdout.write(json.dumps({
+            'clients':    opts['clients'],
+            'requests':   len(samples),
+            'elapsed':    elapsed,
+            'throughput': len(samples) / elapsed,
+            'latency_ms': benchmarking.percentiles(samples),
+            'statuses':   {str(k): v for k, v in sorted(statuses.items())},
+        }))
@@ -0,0 +1,131 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from logistics_app import benchmarking
+from logistics_app.models import Event, Order, Shipment
+
+BENCH_USER = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the main pages and API endpoints through the test client and "
+        "report p50/p95/p99 latency and query counts per endpoint.  Results "
+        "are written as JSON (benchmarks/<revision>.json by default) so runs "
+        "can be compared with --compare.  Use generate_fixture_data first for "
+        "production-sized tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', nargs='*', help="Endpoint names to run (default: all)")
+        parser.add_argument('--output', help="Result file (default: benchmarks/<revision>.json)")
+        parser.add_argument('--compare', help="Previous result file to diff p95 against")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts['seed'])
+        endpoints = self.endpoints(rng)
+        if opts['only']:
+            unknown = set(opts['only']) - set(endpoints)
+            if unknown:
+                raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}")
+            endpoints = {k: v for k, v in endpoints.items() if k in opts['only']}
+
+        client = Client()
+        client.force_login(self.bench_user())
+
+        results = {}
+        # the test client sends Host: testserver
+        with override_settings(ALLOWED_HOSTS=['testserver'], DEBUG=False):
+            for name, urls in endpoints.items():
+                results[name] = self.run(client, rng, urls, opts['warmup'], opts['iterations'])
+                self.report(name, results[name])
+
+        run = {
+            'meta': benchmarking.metadata(
+                iterations=opts['iterations'],
+                rows={m.__name__: m.objects.count() for m in (Shipment, Order, Event)},
+            ),
+            'endpoints': results,
+        }
+        path = benchmarking.write_results(
+            opts['output'] or f"benchmarks/{run['meta']['revision']}.json", run
+        )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+        if opts['compare']:
+            self.stdout.write(f"\np95 vs {opts['compare']}:")
+            old = benchmarking.load_results(opts['compare'])
+            for name, before, after, ratio in benchmarking.compare(old, run):
+                style = self.style.ERROR if ratio > 1.1 else self.style.SUCCESS if ratio < 0.9 else str
+                self.stdout.write(style(f"  {name:<22} {before:8.2f} → {after:8.2f} ms  ({ratio:.2f}x)"))
+
+    def bench_user(self):
+        user, created = User.objects.get_or_create(
+            username=BENCH_USER, defaults={'is_staff': True, 'is_superuser': True},
+        )
+        if created:
+            user.set_unusable_password()
+            user.save()
+        return user
+
+    def endpoints(self, rng):
+        """name -> list of URLs; each iteration picks one at random."""
+        # sample by id range; ORDER BY RANDOM() would scan the whole table
+        bounds = Shipment.objects.aggregate(lo=Min('id'), hi=Max('id'))
+        ids = [rng.randint(bounds['lo'], bounds['hi']) for _ in range(200)] if bounds['lo'] else []
+        codes = list(
+            Shipment.objects.filter(id__in=ids).values_list('tracking_number', flat=True)
+        ) or ['SL00000000000000']
+        return {
+            'dashboard':        [reverse('dashboard')],
+            'analytics_data':   [reverse('analytics_data')],
+            'track_exact':      [f"{reverse('track_shipment')}?tracking_number={c}" for c in codes],
+            'track_prefix':     [f"{reverse('track_shipment')}?tracking_number={c[:10]}" for c in codes],
+            'shipment_list':    [reverse('shipment_list')],
+            'shipment_search':  [f"{reverse('shipment_list')}?q={term}" for term in ('Croke', 'Depot', 'Balls')],
+            'order_list':       [reverse('order_list')],
+            'event_list':       [reverse('event_list')],
+            'api_shipments':    [reverse('shipment-list')],
+            'api_shipments_sparse': [f"{reverse('shipment-list')}?fields=id,tracking_number,status"],
+            'api_orders':       [reverse('order-list')],
+            'api_events':       [reverse('event-list')],
+        }
+
+    def run(self, client, rng, urls, warmup, iterations):
+        for _ in range(warmup):
+            client.get(rng.choice(urls))
+
+        latencies, queries, statuses = [], [], {}
+        for _ in range(iterations):
+            url = rng.choice(urls)
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - start
+            latencies.append(elapsed * 1000)
+            queries.append(len(ctx.captured_queries))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        return {
+            'latency_ms': benchmarking.percentiles(latencies),
+            'queries':    {'min': min(queries), 'max': max(queries), 'mean': sum(queries) / len(queries)},
+            'statuses':   {str(k): v for k, v in sorted(statuses.items())},
+        }
+
+    def report(self, name, result):
+        lat, q = result['latency_ms'], result['queries']
+        self.stdout.write(
+            f"{name:<22} p50 {lat['p50']:8.2f}  p95 {lat['p95']:8.2f}  p99 {lat['p99']:8.2f} ms  "
+            f"queries {q['min']}–{q['max']}  {result['statuses']}"
+        )
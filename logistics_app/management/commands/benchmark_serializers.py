@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from logistics_app.fastpath import ValuesPlan
+from logistics_app.models import Shipment, generate_tracking_numbers
+from logistics_app.renderers import FastJSONRenderer
+from logistics_app.serializers import ShipmentSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare API list serialization throughput: ModelSerializer vs the "
+        ".values() fast path, with the stock and the fast JSON renderer. "
+        "Benchmark rows are inserted in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=3, help="Best of N runs")
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        try:
+            with transaction.atomic():
+                self._seed(rows)
+                self._run(repeat)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, rows):
+        self.stdout.write(f"Seeding {rows:,} shipments…")
+        codes = generate_tracking_numbers(rows)
+        Shipment.objects.bulk_create(
+            (Shipment(tracking_number=code, origin=f'Depot {i % 50}', destination=f'Venue {i % 200}',
+                      contents='Kit bags', status='PENDING') for i, code in enumerate(codes)),
+            batch_size=2000,
+        )
+
+    def _time(self, fn, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(body)
+
+    def _run(self, repeat):
+        qs   = Shipment.objects.order_by('-date_created', '-id')
+        n    = qs.count()
+        plan = ValuesPlan(ShipmentSerializer())
+
+        cases = [
+            ("ModelSerializer + JSONRenderer",
+             lambda: JSONRenderer().render(ShipmentSerializer(qs, many=True).data)),
+            ("values() fast path + JSONRenderer",
+             lambda: JSONRenderer().render(plan.render(qs.values(*plan.columns())))),
+            ("values() fast path + FastJSONRenderer",
+             lambda: FastJSONRenderer().render(plan.render(qs.values(*plan.columns())))),
+        ]
+        baseline = None
+        for label, fn in cases:
+            elapsed, size = self._time(fn, repeat)
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"{label:<40} {elapsed:8.3f}s  {n / elapsed:>10,.0f} rows/s  "
+                f"{baseline / elapsed:5.1f}x  ({size / 1e6:.1f} MB)"
+            )
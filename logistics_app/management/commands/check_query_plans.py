@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from logistics_app import queryplans
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN QUERY PLAN on every hot query (see logistics_app/queryplans.py) "
+        "and fail if any of them full-scans a table or sorts with a temp b-tree. "
+        "Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Only these hot queries")
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(queryplans.HOT_QUERIES)
+        if unknown:
+            raise CommandError(f"Unknown hot query: {', '.join(sorted(unknown))}")
+        try:
+            with transaction.atomic():
+                user = User.objects.create_superuser('query-plan-check', password=None)
+                results = queryplans.check(user, options['names'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        failures = 0
+        for name, entries in results.items():
+            bad = [e for e in entries if e[2]]
+            failures += len(bad)
+            style = self.style.ERROR if bad else self.style.SUCCESS
+            self.stdout.write(style(f"{'FAIL' if bad else 'ok':<5}{name} ({len(entries)} queries)"))
+            for sql, plan, found in (entries if options['verbosity'] > 1 else bad):
+                self.stdout.write(f"    {sql}")
+                for line in plan:
+                    marker = '!!' if line in found else '  '
+                    self.stdout.write(f"    {marker} {line}")
+        if failures:
+            raise CommandError(f"{failures} hot queries regressed to a table scan or temp sort")
@@ -0,0 +1,42 @@
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logistics_app import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge the per-worker collapsed stacks in PROFILER_OUTPUT_DIR into one "
+        "<view>.collapsed file per view (input for flamegraph.pl or speedscope)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-o', '--output', help="Directory to write to (default: PROFILER_OUTPUT_DIR/merged)")
+        parser.add_argument('--view', action='append', help="Only these URL names")
+
+    def handle(self, *args, **options):
+        source = profiling.output_dir()
+        if not source.is_dir():
+            raise CommandError(f"No profiles in {source}")
+        target = Path(options['output'] or source / 'merged')
+        target.mkdir(parents=True, exist_ok=True)
+
+        merged = {}
+        for path in source.glob('*.collapsed'):
+            view = path.name.rsplit('.', 2)[0]
+            if options['view'] and view not in options['view']:
+                continue
+            stacks = merged.setdefault(view, Counter())
+            for line in path.read_text().splitlines():
+                stack, _, count = line.rpartition(' ')
+                if stack and count.isdigit():
+                    stacks[stack] += int(count)
+
+        for view, stacks in sorted(merged.items()):
+            out = target / f"{view}.collapsed"
+            out.write_text(profiling.render_collapsed(stacks))
+            self.stdout.write(f"{view}: {sum(stacks.values())} samples -> {out}")
+        if not merged:
+            self.stdout.write(self.style.WARNING("No samples found."))
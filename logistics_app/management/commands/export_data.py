@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logistics_app import exporters
+
+
+class Command(BaseCommand):
+    help = "Stream shipments, orders or events to CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(exporters.EXPORTS))
+        parser.add_argument('--format', dest='fmt', choices=exporters.FORMATS, default='csv')
+        parser.add_argument('--status', help="Only rows with this status (shipments/orders)")
+        parser.add_argument('--since', help="Created on/after this date or datetime")
+        parser.add_argument('--until', help="Created before this date or datetime")
+        parser.add_argument('--chunk-size', type=int, default=exporters.default_chunk_size())
+        parser.add_argument('-o', '--output', help="Output file (default: stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            since = exporters.parse_bound(options['since'])
+            until = exporters.parse_bound(options['until'])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        rows = exporters.export_rows(
+            options['name'], status=options['status'], since=since, until=until,
+            chunk_size=options['chunk_size'],
+        )
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in exporters.render(options['name'], rows, options['fmt']):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,230 @@
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from logistics_app import rollups, search, utilisation
+from logistics_app.models import (
+    Delivery, Event, Item, Order, Payment, Shipment, UserProfile, Warehouse,
+)
+
+CATEGORIES = ['Footwear', 'Balls', 'Apparel', 'Training', 'Medical', 'Signage', 'Broadcast', 'Catering']
+VENUES = [
+    'Croke Park', 'Aviva Stadium', 'Thomond Park', 'Semple Stadium', 'Pearse Stadium',
+    'Tallaght Stadium', 'Dalymount Park', 'RDS Arena', 'Páirc Uí Chaoimh', 'Casement Park',
+]
+DEPOTS = ['Dublin Port', 'Cork Depot', 'Shannon Hub', 'Galway Depot', 'Belfast Depot', 'Athlone Hub']
+
+SHIPMENT_STATUSES = (['DELIVERED'] * 60) + (['IN_TRANSIT'] * 25) + (['PENDING'] * 15)
+ORDER_STATUSES    = (['DELIVERED'] * 55) + (['SHIPPED'] * 25) + (['PENDING'] * 20)
+
+
+@contextmanager
+def historical_timestamps(*fields):
+    """Let bulk_create keep explicit values for auto_now_add fields."""
+    saved = [(f, f.auto_now_add) for f in fields]
+    for f, _ in saved:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, value in saved:
+            f.auto_now_add = value
+
+
+def chunks(total, size):
+    start = 0
+    while start < total:
+        yield start, min(size, total - start)
+        start += size
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate production-scale synthetic data with bulk_create: users, events, "
+        "items, warehouses, shipments (with deliveries) and orders (with items and "
+        "payments). Rollups, warehouse utilisation and the search index are rebuilt "
+        "afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shipments',  type=int, default=1_000_000)
+        parser.add_argument('--orders',     type=int, default=500_000)
+        parser.add_argument('--items',      type=int, default=5_000)
+        parser.add_argument('--users',      type=int, default=20_000)
+        parser.add_argument('--events',     type=int, default=300)
+        parser.add_argument('--warehouses', type=int, default=40)
+        parser.add_argument('--days',       type=int, default=365, help="History spread over this many days")
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        # seeds the data distributions; usernames, order numbers and tracking
+        # codes differ on every run, so the command can be run again
+        parser.add_argument('--seed',       type=int, default=42)
+
+    def handle(self, *args, **opts):
+        self.rng   = random.Random(opts['seed'])
+        self.run   = uuid.uuid4().hex[:8]
+        self.now   = timezone.now()
+        self.days  = opts['days']
+        self.batch = opts['batch_size']
+        started = time.monotonic()
+
+        users      = self.step("users", self.make_users, opts['users'])
+        events     = self.step("events", self.make_events, opts['events'])
+        items      = self.step("items", self.make_items, opts['items'])
+        self.step("warehouses", self.make_warehouses, opts['warehouses'], users, items)
+        with historical_timestamps(
+            Shipment._meta.get_field('date_created'),
+            Order._meta.get_field('order_date'),
+            Payment._meta.get_field('payment_date'),
+        ):
+            self.step("shipments", self.make_shipments, opts['shipments'], users, events)
+            self.step("orders", self.make_orders, opts['orders'], users, items)
+
+        self.stdout.write("Rebuilding rollups, warehouse utilisation and search index…")
+        rollups.rebuild()
+        # the inventory rows went in with bulk_create, past m2m_changed
+        utilisation.reconcile()
+        backend = search.get_backend()
+        for model in search.INDEXED:
+            backend.rebuild(model)
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.monotonic() - started:.1f}s."))
+
+    def step(self, label, fn, *args):
+        start = time.monotonic()
+        result = fn(*args)
+        elapsed = time.monotonic() - start
+        count = args[0]
+        self.stdout.write(f"  {label:<11} {count:>10,} rows in {elapsed:6.1f}s ({count / max(elapsed, 1e-9):,.0f}/s)")
+        return result
+
+    # ——— distributions ———
+    def past_moment(self):
+        # more recent days are busier (triangular, skewed towards "now")
+        age = self.rng.triangular(0, self.days, 0)
+        return self.now - timedelta(days=age, seconds=self.rng.randrange(86400))
+
+    def tracking_number(self, when, seen):
+        code = f"SL{when:%Y%m%d}{uuid.uuid4().hex[:6].upper()}"
+        while code in seen:
+            code = f"SL{when:%Y%m%d}{uuid.uuid4().hex[:6].upper()}"
+        seen.add(code)
+        return code
+
+    # ——— generators ———
+    def make_users(self, n):
+        password = make_password(None)
+        roles = ['customer'] * 85 + ['delivery_person'] * 12 + ['warehouse_manager'] * 3
+        prefix = f"fx{self.run}"
+        ids = {'customer': [], 'delivery_person': [], 'warehouse_manager': []}
+        for start, size in chunks(n, self.batch):
+            with transaction.atomic():
+                batch = User.objects.bulk_create(
+                    User(username=f"{prefix}_{start + i}", email=f"{prefix}_{start + i}@example.com",
+                         password=password, date_joined=self.past_moment())
+                    for i in range(size)
+                )
+                profiles = [UserProfile(user=u, role=self.rng.choice(roles)) for u in batch]
+                UserProfile.objects.bulk_create(profiles)
+            for p in profiles:
+                ids[p.role].append(p.user_id)
+        return ids
+
+    def make_events(self, n):
+        events = Event.objects.bulk_create(
+            (Event(name=f"Fixture {i}", location=self.rng.choice(VENUES),
+                   date=self.now + timedelta(days=self.rng.uniform(-self.days, 60)))
+             for i in range(n)),
+            batch_size=self.batch,
+        )
+        return [e.pk for e in events]
+
+    def make_items(self, n):
+        items = Item.objects.bulk_create(
+            (Item(name=f"Item {i}", category=self.rng.choice(CATEGORIES),
+                  quantity_in_stock=int(self.rng.paretovariate(1.5) * 20),
+                  price=Decimal(str(round(self.rng.lognormvariate(3.3, 0.8), 2))))
+             for i in range(n)),
+            batch_size=self.batch,
+        )
+        return [(i.pk, i.price) for i in items]
+
+    def make_warehouses(self, n, users, items):
+        managers = users['warehouse_manager'] or [None]
+        warehouses = Warehouse.objects.bulk_create(
+            Warehouse(name=f"Warehouse {i}", location=self.rng.choice(DEPOTS),
+                      manager_id=self.rng.choice(managers), capacity=self.rng.randrange(5_000, 200_000, 500))
+            for i in range(n)
+        )
+        through = Warehouse.inventory.through
+        item_ids = [pk for pk, _ in items]
+        links = []
+        for w in warehouses:
+            for item_id in self.rng.sample(item_ids, min(len(item_ids), self.rng.randrange(50, 800))):
+                links.append(through(warehouse_id=w.pk, item_id=item_id))
+        through.objects.bulk_create(links, batch_size=self.batch)
+
+    def make_shipments(self, n, users, events):
+        drivers = users['delivery_person'] or [None]
+        seen = set()
+        for start, size in chunks(n, self.batch):
+            shipments = []
+            for _ in range(size):
+                created = self.past_moment()
+                status = self.rng.choice(SHIPMENT_STATUSES)
+                shipments.append(Shipment(
+                    tracking_number=self.tracking_number(created, seen), status=status, date_created=created,
+                    date_delivered=created + timedelta(hours=self.rng.gammavariate(2, 14)) if status == 'DELIVERED' else None,
+                    origin=self.rng.choice(DEPOTS), destination=self.rng.choice(VENUES),
+                    contents=f"{self.rng.randint(1, 40)} x {self.rng.choice(CATEGORIES)}",
+                    event_id=self.rng.choice(events) if events and self.rng.random() < 0.7 else None,
+                    delivery_person_id=self.rng.choice(drivers) if status != 'PENDING' else None,
+                ))
+            # codes left in the database by an earlier run
+            while taken := set(Shipment.objects.filter(tracking_number__in=[s.tracking_number for s in shipments])
+                                               .values_list('tracking_number', flat=True)):
+                for s in shipments:
+                    if s.tracking_number in taken:
+                        s.tracking_number = self.tracking_number(s.date_created, seen)
+            with transaction.atomic():
+                Shipment.objects.bulk_create(shipments)
+                Delivery.objects.bulk_create(
+                    Delivery(shipment_id=s.pk, assigned_person_id=s.delivery_person_id,
+                             status='COMPLETED' if s.status == 'DELIVERED' else 'IN_PROGRESS',
+                             delivery_date=s.date_delivered, delivery_location=s.destination)
+                    for s in shipments if s.status != 'PENDING'
+                )
+
+    def make_orders(self, n, users, items):
+        customers = users['customer'] or users['delivery_person']
+        through = Order.items.through
+        prefix = f"FX{self.run.upper()}"
+        for start, size in chunks(n, self.batch):
+            orders, basket = [], []
+            for i in range(size):
+                chosen = self.rng.sample(items, min(len(items), 1 + int(self.rng.expovariate(0.6))))
+                basket.append(chosen)
+                orders.append(Order(
+                    order_number=f"{prefix}{start + i:09d}", order_date=self.past_moment(),
+                    status=self.rng.choice(ORDER_STATUSES), customer_id=self.rng.choice(customers),
+                    total_price=sum((price or Decimal('0')) for _, price in chosen),
+                ))
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                through.objects.bulk_create(
+                    through(order_id=o.pk, item_id=item_id)
+                    for o, chosen in zip(orders, basket) for item_id, _ in chosen
+                )
+                Payment.objects.bulk_create(
+                    Payment(order_id=o.pk, amount=o.total_price, payment_date=o.order_date,
+                            payment_method='CREDIT_CARD' if self.rng.random() < 0.8 else 'CASH',
+                            status='PENDING' if o.status == 'PENDING' else 'COMPLETED')
+                    for o in orders
+                )
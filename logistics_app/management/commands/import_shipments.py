@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from logistics_app.importers import default_batch_size, import_shipments
+
+
+class Command(BaseCommand):
+    help = "Bulk-import shipments from a CSV manifest."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row")
+        parser.add_argument(
+            '--batch-size', type=int, default=default_batch_size(),
+            help="Rows per INSERT/transaction (default: SHIPMENT_IMPORT_BATCH_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        def progress(result):
+            self.stdout.write(
+                f"  {result.rows} rows read, {result.created} created "
+                f"({result.rows_per_second:,.0f} rows/s)"
+            )
+
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                result = import_shipments(f, options['batch_size'], on_batch=progress)
+        except OSError as exc:
+            raise CommandError(exc)
+
+        for line, errors in result.errors:
+            for field, messages in errors.items():
+                self.stderr.write(f"line {line}: {field}: {' '.join(messages)}")
+
+        summary = (
+            f"Imported {result.created} shipment(s), {len(result.errors)} row(s) rejected, "
+            f"in {result.elapsed:.2f}s ({result.rows_per_second:,.0f} rows/s)."
+        )
+        style = self.style.WARNING if result.errors else self.style.SUCCESS
+        self.stdout.write(style(summary))
@@ -0,0 +1,339 @@
+import io
+import json
+import logging
+import multiprocessing
+import random
+import time
+import uuid
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.db.models import Max, Min
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
+
+from logistics_app import benchmarking, sqlite, utilisation
+from logistics_app.models import Item, Shipment
+
+DEFAULT_MIX = 'track=35,list=15,api_list=10,create_shipment=15,update_shipment=20,create_order=5'
+READS  = {'track', 'list', 'api_list'}
+WRITES = {'create_shipment', 'update_shipment', 'create_order'}
+BENCH_USER = 'benchmark'
+# stock --restock tops the create_order items up to, so a run can't sell
+# out; without it, orders refused for stock (409) are counted as sold_out
+LOAD_STOCK = 1_000_000
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in READS | WRITES:
+            raise CommandError(f"Unknown operation {name!r}; choose from {', '.join(sorted(READS | WRITES))}")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"Bad weight for {name!r}: {weight!r}")
+    if not any(mix.values()):
+        raise CommandError("The mix needs at least one operation with a positive weight")
+    return mix
+
+
+def is_locked(exc):
+    return isinstance(exc, OperationalError) and 'locked' in str(exc)
+
+
+# ——————————————————————————————————————————————————————
+# Worker process
+# ——————————————————————————————————————————————————————
+class Worker:
+    """Calls the WSGI application directly; one instance per process."""
+
+    def __init__(self, index, plan):
+        self.rng      = random.Random(plan['seed'] + index)
+        self.plan     = plan
+        self.index    = index
+        self.ops      = list(plan['mix'])
+        self.weights  = [plan['mix'][op] for op in self.ops]
+        self.created  = []
+        self.errors   = []          # exceptions seen by got_request_exception for the current request
+
+    def setup(self):
+        from django.core.signals import got_request_exception
+        from django.test.utils import override_settings
+
+        # the in-process requests come from 127.0.0.1 whatever DEBUG says
+        self._hosts = override_settings(ALLOWED_HOSTS=['127.0.0.1', 'localhost'])
+        self._hosts.enable()
+        # importing the application may run django.setup() and reconfigure logging
+        self.app = import_string(self.plan['application'])
+        if not self.plan['verbose']:
+            # failures are counted in the report; per-request tracebacks would drown it
+            for name in ('django.request', 'logistics_app.perf'):
+                logging.getLogger(name).setLevel(logging.CRITICAL)
+        got_request_exception.connect(self._on_exception, weak=False)
+
+    def teardown(self):
+        from django.core.signals import got_request_exception
+        got_request_exception.disconnect(self._on_exception)
+        self._hosts.disable()
+
+    def _on_exception(self, sender, request=None, **kwargs):
+        import sys
+        self.errors.append(sys.exc_info()[1])
+
+    def call(self, method, path, query='', body=None):
+        data = json.dumps(body).encode() if body is not None else b''
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO':      path,
+            'QUERY_STRING':   query,
+            'CONTENT_TYPE':   'application/json',
+            'CONTENT_LENGTH': str(len(data)),
+            'HTTP_ACCEPT':    'application/json' if path.startswith('/api/') else 'text/html',
+            'HTTP_COOKIE':    self.plan['cookie'],
+            'HTTP_X_CSRFTOKEN': self.plan['csrf'],
+            'wsgi.input':     io.BytesIO(data),
+        }
+        setup_testing_defaults(environ)
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured['status'] = int(status.split()[0])
+
+        result = self.app(environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return captured['status'], body
+
+    def request_for(self, op):
+        rng = self.rng
+        if op == 'track':
+            return 'GET', '/track/', f"tracking_number={rng.choice(self.plan['codes'])}", None
+        if op == 'list':
+            return 'GET', '/shipments/', '', None
+        if op == 'api_list':
+            return 'GET', '/api/shipments/', '', None
+        if op == 'create_shipment':
+            return 'POST', '/api/shipments/', '', {
+                'origin': f'Depot {rng.randrange(20)}', 'destination': f'Venue {rng.randrange(100)}',
+                'status': 'PENDING', 'contents': 'Load test',
+            }
+        if op == 'update_shipment':
+            pool = self.created[-50:] + self.plan['shipment_ids']
+            return 'PATCH', f'/api/shipments/{rng.choice(pool)}/', '', {
+                'status': rng.choice(['IN_TRANSIT', 'DELIVERED', 'PENDING']),
+            }
+        return 'POST', '/api/orders/', '', {
+            'order_number': f'LT-{uuid.uuid4().hex[:16]}', 'status': 'PENDING',
+            'customer': self.plan['customer'],
+            'items': rng.sample(self.plan['item_ids'], min(3, len(self.plan['item_ids']))),
+        }
+
+    def run(self, start, deadline_after, retries, backoff):
+        samples = {op: [] for op in self.ops}
+        counts  = {op: {'ok': 0, 'locked': 0, 'retries': 0, 'failed': 0, 'sold_out': 0} for op in self.ops}
+        start.wait()
+        deadline = time.monotonic() + deadline_after
+        while time.monotonic() < deadline:
+            op = self.rng.choices(self.ops, self.weights)[0]
+            method, path, query, body = self.request_for(op)
+            began = time.perf_counter()
+            for attempt in range(retries + 1):
+                self.errors = []
+                status, content = self.call(method, path, query, body)
+                locked = any(is_locked(e) for e in self.errors)
+                if not locked:
+                    break
+                counts[op]['locked'] += 1
+                if attempt < retries:
+                    counts[op]['retries'] += 1
+                    time.sleep(backoff * (2 ** attempt) * self.rng.random())
+            samples[op].append((time.perf_counter() - began) * 1000)
+            if status < 400:
+                counts[op]['ok'] += 1
+                if op == 'create_shipment':
+                    self.created.append(json.loads(content)['id'])
+            elif status == 409 and op == 'create_order':
+                counts[op]['sold_out'] += 1
+            else:
+                counts[op]['failed'] += 1
+        return samples, counts
+
+
+def _worker_main(index, plan, start, queue):
+    connections.close_all()
+    worker = Worker(index, plan)
+    worker.setup()
+    try:
+        queue.put((index, worker.run(start, plan['duration'], plan['retries'], plan['backoff']), None))
+    except Exception as exc:  # report instead of hanging the parent
+        queue.put((index, None, repr(exc)))
+
+
+# ——————————————————————————————————————————————————————
+# Command
+# ——————————————————————————————————————————————————————
+class Command(BaseCommand):
+    help = (
+        "Multi-process load test against the WSGI application (called in-process, "
+        "no HTTP server).  Each worker runs a weighted mix of reads and writes for "
+        "--duration seconds; the report gives throughput, latency percentiles and "
+        "how many requests hit 'database is locked' (and were retried).  This "
+        "WRITES to the configured database: point it at a scratch copy.  "
+        "--restock sets the stock of the items orders are placed for to a "
+        "million units, overwriting their real levels."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=20.0, help="Seconds per worker")
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Weighted ops (default: {DEFAULT_MIX})")
+        parser.add_argument('--retries', type=int, default=2, help="Retries for a request that hit 'database is locked'")
+        parser.add_argument('--backoff', type=float, default=0.05, help="Base retry backoff in seconds")
+        parser.add_argument('--application', default='sports_logistics.wsgi.application')
+        parser.add_argument('--output', help="Write the JSON report here")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--restock', action='store_true',
+                            help=f"Top the create_order items up to {LOAD_STOCK} units first (overwrites their stock)")
+
+    def handle(self, *args, **opts):
+        plan = self.plan(opts)
+        self.stdout.write(
+            f"{opts['workers']} workers × {opts['duration']:.0f}s against {opts['application']} "
+            f"({settings.DATABASES['default']['NAME']})"
+        )
+        # children must not inherit the parent's open connection
+        connections.close_all()
+        ctx   = multiprocessing.get_context('fork')
+        start = ctx.Event()
+        queue = ctx.Queue()
+        procs = [ctx.Process(target=_worker_main, args=(i, plan, start, queue)) for i in range(opts['workers'])]
+        for p in procs:
+            p.start()
+        began = time.monotonic()
+        start.set()
+
+        results = [queue.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.monotonic() - began
+
+        failures = [err for _, _, err in results if err]
+        if failures:
+            raise CommandError(f"Worker(s) failed: {'; '.join(failures)}")
+        report = self.summarise([r for _, r, _ in results], elapsed, opts)
+        self.print_report(report)
+        if opts['output']:
+            path = benchmarking.write_results(opts['output'], report)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {path}"))
+
+    def plan(self, opts):
+        rng = random.Random(opts['seed'])
+        user, created = User.objects.get_or_create(
+            username=BENCH_USER, defaults={'is_staff': True, 'is_superuser': True},
+        )
+        if created:
+            user.set_unusable_password()
+            user.save()
+        bounds = Shipment.objects.aggregate(lo=Min('id'), hi=Max('id'))
+        ids = [rng.randint(bounds['lo'], bounds['hi']) for _ in range(500)] if bounds['lo'] else []
+        shipments = list(Shipment.objects.filter(id__in=ids).values_list('id', 'tracking_number'))
+        if not shipments:
+            shipments = [(s.pk, s.tracking_number) for s in
+                         [Shipment.objects.create(origin='Depot', destination='Venue')]]
+        item_ids = list(Item.objects.values_list('id', flat=True)[:500])
+        mix = parse_mix(opts['mix'])
+        if mix.get('create_order'):
+            if not item_ids:
+                raise CommandError("create_order needs at least one Item (run generate_fixture_data)")
+            if opts['restock'] and Item.objects.filter(
+                    pk__in=item_ids, quantity_in_stock__lt=LOAD_STOCK).update(quantity_in_stock=LOAD_STOCK):
+                utilisation.reconcile()
+
+        csrf = get_random_string(32)
+        return {
+            'application':  opts['application'],
+            'mix':          mix,
+            'seed':         opts['seed'],
+            'verbose':      opts['verbosity'] > 1,
+            'duration':     opts['duration'],
+            'retries':      opts['retries'],
+            'backoff':      opts['backoff'],
+            'cookie':       f"{settings.SESSION_COOKIE_NAME}={benchmarking.session_key_for(user)}; {settings.CSRF_COOKIE_NAME}={csrf}",
+            'csrf':         csrf,
+            'customer':     user.pk,
+            'item_ids':     item_ids,
+            'shipment_ids': [pk for pk, _ in shipments],
+            'codes':        [code for _, code in shipments],
+        }
+
+    def summarise(self, runs, elapsed, opts):
+        ops = {}
+        for samples, counts in runs:
+            for op, values in samples.items():
+                entry = ops.setdefault(op, {'latencies': [], 'ok': 0, 'locked': 0, 'retries': 0, 'failed': 0, 'sold_out': 0})
+                entry['latencies'].extend(values)
+                for k in ('ok', 'locked', 'retries', 'failed', 'sold_out'):
+                    entry[k] += counts[op][k]
+
+        per_op, total, locked, reads, writes = {}, 0, 0, 0, 0
+        for op, entry in sorted(ops.items()):
+            n = len(entry['latencies'])
+            total  += n
+            locked += entry['locked']
+            if op in WRITES:
+                writes += n
+            else:
+                reads += n
+            per_op[op] = {
+                'requests':    n,
+                'throughput':  n / elapsed,
+                'latency_ms':  benchmarking.percentiles(entry['latencies']),
+                'ok':          entry['ok'],
+                'failed':      entry['failed'],
+                'sold_out':    entry['sold_out'],
+                'locked':      entry['locked'],
+                'retries':     entry['retries'],
+            }
+        db = settings.DATABASES['default']
+        return {
+            'meta': benchmarking.metadata(
+                workers=opts['workers'], duration=opts['duration'], mix=opts['mix'],
+                retries=opts['retries'], database=str(db['NAME']), engine=db['ENGINE'],
+                options=db.get('OPTIONS', {}), conn_max_age=db.get('CONN_MAX_AGE', 0),
+                pragmas=sqlite.current_settings(connection),
+            ),
+            'elapsed':     elapsed,
+            'requests':    total,
+            'throughput':  total / elapsed,
+            'read_rps':    reads / elapsed,
+            'write_rps':   writes / elapsed,
+            'locked':      locked,
+            'locked_rate': locked / total if total else 0.0,
+            'failed':      sum(o['failed'] for o in per_op.values()),
+            'operations':  per_op,
+        }
+
+    def print_report(self, report):
+        for op, r in report['operations'].items():
+            lat = r['latency_ms']
+            self.stdout.write(
+                f"{op:<16} {r['requests']:>7} req  {r['throughput']:8.1f}/s  "
+                f"p50 {lat['p50']:8.2f}  p95 {lat['p95']:8.2f}  p99 {lat['p99']:8.2f} ms  "
+                f"locked {r['locked']:>5}  retries {r['retries']:>5}  failed {r['failed']:>5}"
+                + (f"  sold out {r['sold_out']:>5}" if r['sold_out'] else '')
+            )
+        style = self.style.ERROR if report['failed'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"total {report['requests']} requests in {report['elapsed']:.1f}s: "
+            f"{report['throughput']:.1f} req/s ({report['read_rps']:.1f} reads, {report['write_rps']:.1f} writes), "
+            f"'database is locked' on {report['locked_rate']:.2%} of requests, {report['failed']} failed"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from logistics_app import changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete change-feed tombstones older than CHANGES_RETENTION_DAYS. "
+        "Clients whose cursor predates that window are told to re-sync."
+    )
+
+    def handle(self, *args, **options):
+        deleted = changes.prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones."))
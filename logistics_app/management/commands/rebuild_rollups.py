@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from logistics_app import rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard rollup tables from Shipment and Order."
+
+    def handle(self, *args, **options):
+        written = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups ({written} rows)."))
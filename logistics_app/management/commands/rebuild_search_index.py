@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from logistics_app import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the shipment/order search index from the source tables."
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        for model in search.INDEXED:
+            n = backend.rebuild(model)
+            self.stdout.write(f"{model.__name__}: {n} rows indexed")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from logistics_app import totals
+
+
+class Command(BaseCommand):
+    help = "Recompute Order.total_price from the items' prices, in primary-key chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=totals.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        fixed = 0
+        for upto, n in totals.recompute_all(options['chunk_size']):
+            fixed += n
+            if options['verbosity'] > 1:
+                self.stdout.write(f"orders up to #{upto}: {n} corrected")
+        self.stdout.write(self.style.SUCCESS(f"Recomputed order totals ({fixed} corrected)."))
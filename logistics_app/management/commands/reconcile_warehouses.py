@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from logistics_app import utilisation
+
+
+class Command(BaseCommand):
+    help = "Recompute warehouse utilisation counters from the inventory and fix any drift."
+
+    def handle(self, *args, **options):
+        fixed = utilisation.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled warehouses ({fixed} corrected)."))
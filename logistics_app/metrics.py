@@ -0,0 +1,302 @@
+"""
+Lightweight in-process metrics with a Prometheus text exporter.
+
+Counters and fixed-bucket histograms are declared once at import time and
+updated with a dict lookup plus a float add.  Values are stored either in
+a plain dict (single process, the default) or, when ``METRICS_DIR`` is
+set, in a per-process mmap'd file in that directory; ``/metrics`` then
+sums the files of every worker, so the numbers are correct behind a
+multi-process server.  Clear ``METRICS_DIR`` on deploy, as files of
+stopped workers keep contributing until removed.
+
+File layout: an 8-byte "bytes used" header followed by entries of
+``u32 key length | key | padding to 8 bytes | f64 value``.  Each process
+only ever writes its own file.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+_HEADER   = struct.Struct('Q')
+_KEYLEN   = struct.Struct('I')
+_VALUE    = struct.Struct('d')
+_INITIAL  = 64 * 1024
+
+
+# ——————————————————————————————————————————————————————
+# Storage
+# ——————————————————————————————————————————————————————
+class LocalStore:
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+
+def _read_file(path):
+    values = {}
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return values
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    pos = _HEADER.size
+    while pos + _KEYLEN.size <= used:
+        (keylen,) = _KEYLEN.unpack_from(data, pos)
+        key_start = pos + _KEYLEN.size
+        key = data[key_start:key_start + keylen].decode()
+        pos = key_start + keylen
+        pos += -pos % 8
+        (value,) = _VALUE.unpack_from(data, pos)
+        pos += _VALUE.size
+        values[key] = value
+    return values
+
+
+class MmapStore:
+    """One mmap'd file per process; readers merge every file in the directory."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _open(self):
+        # (re)open after fork so each worker gets its own file
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pid = os.getpid()
+        self._path = self.directory / f'metrics_{self._pid}.db'
+        self._file = open(self._path, 'a+b')
+        if os.path.getsize(self._path) < _INITIAL:
+            self._file.truncate(_INITIAL)
+        self._size = os.path.getsize(self._path)
+        self._map = mmap.mmap(self._file.fileno(), self._size)
+        self._offsets = {}
+        used = _HEADER.unpack_from(self._map, 0)[0]
+        if used == 0:
+            used = _HEADER.size
+            _HEADER.pack_into(self._map, 0, used)
+        else:
+            pos = _HEADER.size
+            while pos < used:
+                (keylen,) = _KEYLEN.unpack_from(self._map, pos)
+                key = self._map[pos + _KEYLEN.size:pos + _KEYLEN.size + keylen].decode()
+                pos += _KEYLEN.size + keylen
+                pos += -pos % 8
+                self._offsets[key] = pos
+                pos += _VALUE.size
+        self._used = used
+
+    def _grow(self, needed):
+        size = self._size
+        while size < needed:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._size = size
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def _offset(self, key):
+        encoded = key.encode()
+        entry = _KEYLEN.size + len(encoded)
+        entry += -(self._used + entry) % 8
+        if self._used + entry + _VALUE.size > self._size:
+            self._grow(self._used + entry + _VALUE.size)
+        _KEYLEN.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + _KEYLEN.size:self._used + _KEYLEN.size + len(encoded)] = encoded
+        offset = self._used + entry
+        _VALUE.pack_into(self._map, offset, 0.0)
+        self._used = offset + _VALUE.size
+        # publish the entry only once it is fully written
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def inc(self, key, amount):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._open()
+            offset = self._offsets.get(key)
+            if offset is None:
+                offset = self._offset(key)
+            (value,) = _VALUE.unpack_from(self._map, offset)
+            _VALUE.pack_into(self._map, offset, value + amount)
+
+    def collect(self):
+        totals = {}
+        for path in self.directory.glob('metrics_*.db'):
+            for key, value in _read_file(path).items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                directory = getattr(settings, 'METRICS_DIR', None)
+                _store = MmapStore(directory) if directory else LocalStore()
+    return _store
+
+
+def reset_store():
+    """Drop the cached store (tests, or after changing METRICS_DIR)."""
+    global _store
+    _store = None
+
+
+# ——————————————————————————————————————————————————————
+# Metric types
+# ——————————————————————————————————————————————————————
+REGISTRY = {}
+
+
+def _key(name, labels):
+    return json.dumps([name, labels], separators=(',', ':'))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        REGISTRY[name] = self
+
+    def _labels(self, labels):
+        return [str(labels.get(n, '')) for n in self.labelnames]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        get_store().inc(_key(self.name, self._labels(labels)), amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        store = get_store()
+        values = self._labels(labels)
+        for bound in self.buckets:
+            if value <= bound:
+                le = repr(float(bound))
+                break
+        else:
+            le = '+Inf'
+        store.inc(_key(self.name + '_bucket', values + [le]), 1)
+        store.inc(_key(self.name + '_sum', values), value)
+        store.inc(_key(self.name + '_count', values), 1)
+
+
+# ——————————————————————————————————————————————————————
+# Exposition (Prometheus text format 0.0.4)
+# ——————————————————————————————————————————————————————
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render():
+    samples = {}
+    for key, value in get_store().collect().items():
+        name, labels = json.loads(key)
+        samples.setdefault(name, {})[tuple(labels)] = value
+
+    lines = []
+    for name, metric in sorted(REGISTRY.items()):
+        lines.append(f'# HELP {name} {metric.help}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        if metric.kind == 'counter':
+            for labels, value in sorted(samples.get(name, {}).items()):
+                lines.append(f'{name}{_format_labels(zip(metric.labelnames, labels))} {_number(value)}')
+            continue
+
+        buckets = samples.get(name + '_bucket', {})
+        for labels, total in sorted(samples.get(name + '_count', {}).items()):
+            pairs = list(zip(metric.labelnames, labels))
+            running = 0.0
+            for bound in metric.buckets:
+                running += buckets.get(labels + (repr(float(bound)),), 0.0)
+                lines.append(f'{name}_bucket{_format_labels(pairs + [("le", repr(float(bound)))])} {_number(running)}')
+            lines.append(f'{name}_bucket{_format_labels(pairs + [("le", "+Inf")])} {_number(total)}')
+            lines.append(f'{name}_sum{_format_labels(pairs)} {_number(samples[name + "_sum"][labels])}')
+            lines.append(f'{name}_count{_format_labels(pairs)} {_number(total)}')
+    return '\n'.join(lines) + '\n'
+
+
+# ——————————————————————————————————————————————————————
+# Application metrics
+# ——————————————————————————————————————————————————————
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by URL name, method and status.',
+    ('view', 'method', 'status'),
+)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by URL name.',
+    ('view', 'method'),
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries per request by URL name.',
+    ('view',), buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Application cache lookups by cache and result (hit/miss).',
+    ('cache', 'result'),
+)
+OBJECTS_CREATED = Counter(
+    'logistics_created_total', 'Shipments/orders created.',
+    ('kind',),
+)
+STATUS_TRANSITIONS = Counter(
+    'logistics_status_transitions_total', 'Shipment/order status changes.',
+    ('kind', 'from_status', 'to_status'),
+)
+
+
+def cache_lookup(cache_name, hit):
+    CACHE_REQUESTS.inc(cache=cache_name, result='hit' if hit else 'miss')
+
+
+def observe_request(record, duration):
+    """Called by RequestTimingMiddleware with its per-request record."""
+    view = record['view'] or 'unmatched'
+    REQUESTS.inc(view=view, method=record['method'], status=record['status'])
+    REQUEST_LATENCY.observe(duration, view=view, method=record['method'])
+    REQUEST_QUERIES.observe(record['queries'], view=view)
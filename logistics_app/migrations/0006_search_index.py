@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# FTS5 tables backing logistics_app.search.SQLiteFTSBackend.  rowid is the
+# primary key of the indexed row.
+TABLES = {
+    'search_shipment': ('logistics_app_shipment', ('tracking_number', 'origin', 'destination')),
+    'search_order':    ('logistics_app_order',    ('order_number', 'status')),
+}
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, (source, fields) in TABLES.items():
+        columns = ', '.join(fields)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+            f"USING fts5({columns}, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {table} (rowid, {columns}) SELECT id, {columns} FROM {source}"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in TABLES:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0005_rollup_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
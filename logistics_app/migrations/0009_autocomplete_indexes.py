@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Case-insensitive indexes for the autocomplete prefix search
+# (logistics_app.autocomplete): SQLite only uses an index for
+# ``LIKE 'ab%'`` when the column is indexed with the NOCASE collation.
+INDEXES = {
+    'item_name_nocase_idx':          ('logistics_app_item',  'name'),
+    'event_name_nocase_idx':         ('logistics_app_event', 'name'),
+    'auth_user_username_nocase_idx': ('auth_user',           'username'),
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, (table, column) in INDEXES.items():
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column} COLLATE NOCASE)")
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('logistics_app', '0008_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,50 @@
+import django.core.validators
+import django.db.models.expressions
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Warehouse = apps.get_model('logistics_app', 'Warehouse')
+    Membership = Warehouse.inventory.through
+    per_warehouse = Membership.objects.filter(warehouse=OuterRef('pk')).values('warehouse')
+    Warehouse.objects.update(
+        sku_count=Coalesce(Subquery(per_warehouse.annotate(n=Count('pk')).values('n')), 0),
+        units_on_hand=Coalesce(Subquery(per_warehouse.annotate(u=Sum('item__quantity_in_stock')).values('u')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0009_autocomplete_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='warehouse',
+            name='sku_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='warehouse',
+            name='units_on_hand',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='warehouse',
+            name='capacity',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='warehouse',
+            name='utilisation',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(capacity__gt=0, then=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('units_on_hand'), '*', models.Value(100.0)), '/', models.F('capacity'))), default=models.Value(0.0)), output_field=models.FloatField()),
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(fields=['utilisation'], name='warehouse_utilisation_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+
+
+def backfill_totals(apps, schema_editor):
+    Order = apps.get_model('logistics_app', 'Order')
+    Line = Order.items.through
+    per_order = Line.objects.filter(order=OuterRef('pk')).values('order')
+    Order.objects.update(total_price=Coalesce(
+        Subquery(per_order.annotate(t=Round(Sum('item__price'), 2)).values('t')),
+        Value(Decimal('0.00')),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0010_warehouse_utilisation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_date', 'total_price'], name='order_revenue_idx'),
+        ),
+    ]
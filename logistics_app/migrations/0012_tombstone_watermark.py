@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics_app', '0011_order_total_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TombstoneWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50, unique=True)),
+                ('pruned_through', models.DateTimeField()),
+            ],
+        ),
+    ]
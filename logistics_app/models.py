@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Case, F, Value, When
 from django.contrib.auth.models import User
+from django.core.validators import MinValueValidator
 import uuid
 from datetime import datetime
 
@@ -17,11 +19,36 @@ def generate_tracking_number() -> str:
     return f"SL{date_part}{rand_part}"
 
 
+def generate_tracking_numbers(count: int) -> list:
+    """
+    Generate ``count`` distinct tracking codes that are not already in use,
+    checking collisions with one query per round instead of one per row.
+    """
+    codes = set()
+    while len(codes) < count:
+        candidates = {generate_tracking_number() for _ in range(count - len(codes))} - codes
+        taken = set(
+            Shipment.objects.filter(tracking_number__in=candidates)
+                            .values_list('tracking_number', flat=True)
+        )
+        codes |= candidates - taken
+    return list(codes)
+
+
 class Event(models.Model):
     name        = models.CharField(max_length=100)
     date        = models.DateTimeField()
     location    = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
+    updated_at  = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # upcoming-event counts and the (date, id) keyset list
+            models.Index(fields=['date'], name='event_date_idx'),
+            # change feed: WHERE updated_at > ? ORDER BY updated_at, id
+            models.Index(fields=['updated_at'], name='event_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -66,6 +93,19 @@ class Shipment(models.Model):
         null=True,
         related_name='deliveries'
     )
+    updated_at      = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # keyset lists / recent shipments: ORDER BY date_created DESC, id DESC
+            models.Index(fields=['date_created'], name='shipment_created_idx'),
+            # status-filtered lists, newest first
+            models.Index(fields=['status', 'date_created'], name='shipment_status_created_idx'),
+            # delivery-time analytics; covers both columns of the average
+            models.Index(fields=['date_delivered', 'date_created'], name='shipment_delivered_idx'),
+            # change feed
+            models.Index(fields=['updated_at'], name='shipment_updated_idx'),
+        ]
 
     def __str__(self):
         return self.tracking_number
@@ -83,11 +123,34 @@ class Order(models.Model):
     status       = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     customer     = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
     items        = models.ManyToManyField(Item, related_name='orders')
-    total_price  = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
+    # sum of the items' prices, kept up to date by logistics_app.totals
+    total_price  = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    updated_at   = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order_date'], name='order_date_idx'),
+            # per-status counts and status-filtered lists
+            models.Index(fields=['status', 'order_date'], name='order_status_date_idx'),
+            # change feed
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
+            # revenue over a date range, from the index alone
+            models.Index(fields=['order_date', 'total_price'], name='order_revenue_idx'),
+        ]
 
     def __str__(self):
         return self.order_number
 
+    def save(self, *args, **kwargs):
+        # total_price is recomputed with UPDATEs when the items change;
+        # saving an instance loaded earlier must not write its copy back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'total_price'
+            ]
+        super().save(*args, **kwargs)
+
 
 class Warehouse(models.Model):
     name      = models.CharField(max_length=100)
@@ -100,11 +163,43 @@ class Warehouse(models.Model):
         related_name='warehouses'
     )
     inventory = models.ManyToManyField(Item, related_name='warehouses')
-    capacity  = models.IntegerField()
+    capacity  = models.IntegerField(validators=[MinValueValidator(1)])
+
+    # kept up to date by logistics_app.utilisation; run
+    # `manage.py reconcile_warehouses` to correct drift
+    sku_count     = models.IntegerField(default=0, editable=False)
+    units_on_hand = models.IntegerField(default=0, editable=False)
+    # percent of capacity
+    utilisation   = models.GeneratedField(
+        expression=Case(
+            When(capacity__gt=0, then=F('units_on_hand') * 100.0 / F('capacity')),
+            default=Value(0.0),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            # fullest-first lists and fullness filters
+            models.Index(fields=['utilisation'], name='warehouse_utilisation_idx'),
+        ]
+
+    COUNTERS = ('sku_count', 'units_on_hand')
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # the counters change through UPDATE ... SET x = x + n; saving an
+        # instance loaded earlier must not write its (stale) copies back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and not f.generated and f.name not in self.COUNTERS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Delivery(models.Model):
     STATUS_CHOICES = [
@@ -162,8 +257,66 @@ class UserProfile(models.Model):
         return f"{self.user.username} Profile"
 
 
+# ——————————————————————————————————————————————————————
+# Rollup tables (kept up to date by logistics_app.rollups)
+# ——————————————————————————————————————————————————————
+class DailyStatusCount(models.Model):
+    """Number of shipments/orders created on a given day, per status."""
+    KIND_CHOICES = [
+        ('shipment', 'Shipment'),
+        ('order',    'Order'),
+    ]
+
+    kind   = models.CharField(max_length=10, choices=KIND_CHOICES)
+    day    = models.DateField()
+    status = models.CharField(max_length=20)
+    count  = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('kind', 'day', 'status')
+
+    def __str__(self):
+        return f"{self.kind} {self.day} {self.status}: {self.count}"
+
+
+class StatCounter(models.Model):
+    """Global counters, e.g. 'shipment:total' or 'order:PENDING'."""
+    key   = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
+
+
+# ——————————————————————————————————————————————————————
+# Change feed (kept up to date by logistics_app.changes)
+# ——————————————————————————————————————————————————————
+class Tombstone(models.Model):
+    """A deleted Shipment/Order/Event, so change feeds can report the delete."""
+    model      = models.CharField(max_length=50)     # 'shipment', 'order', 'event'
+    object_id  = models.BigIntegerField()
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at'], name='tombstone_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at}"
+
+
+class TombstoneWatermark(models.Model):
+    """Newest tombstone pruned from a feed; cursors at or before it have lost deletes."""
+    model          = models.CharField(max_length=50, unique=True)
+    pruned_through = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.model} pruned through {self.pruned_through}"
+
+
 # Signals to auto-create/save UserProfile
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save
 from django.dispatch import receiver
 
 @receiver(post_save, sender=User)
@@ -171,6 +324,18 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
 
+@receiver(post_init, sender=UserProfile)
+def remember_loaded_role(sender, instance, **kwargs):
+    instance._loaded_role = instance.__dict__.get('role')
+
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+def save_user_profile(sender, instance, created, **kwargs):
+    # Only a profile that was loaded through this user and then modified
+    # needs writing; User saves such as login's last_login update leave the
+    # profile alone (and don't load it).
+    if created or not User.profile.is_cached(instance):
+        return
+    profile = getattr(instance, 'profile', None)
+    if profile is not None and profile.role != profile._loaded_role:
+        profile.save()
+        profile._loaded_role = profile.role
@@ -0,0 +1,232 @@
+"""
+Keyset (cursor) pagination shared by the HTML list views and the API.
+
+Pages are selected with a range predicate on ``(ordering field, id)``
+instead of OFFSET, and "is there another page?" is answered by fetching
+one extra row instead of COUNT(*).  Cursors are opaque base64 tokens, so
+rows inserted while someone is paging never shift or duplicate results.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_PARAM    = 'cursor'
+PAGE_SIZE_PARAM = 'page_size'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def default_page_size():
+    return getattr(settings, 'KEYSET_PAGE_SIZE', 50)
+
+
+def max_page_size():
+    return getattr(settings, 'KEYSET_MAX_PAGE_SIZE', 200)
+
+
+def page_size_from(params):
+    """Requested ?page_size=, clamped to 1..KEYSET_MAX_PAGE_SIZE."""
+    try:
+        size = int(params.get(PAGE_SIZE_PARAM, default_page_size()))
+    except (TypeError, ValueError):
+        size = default_page_size()
+    return max(1, min(size, max_page_size()))
+
+
+# ——————————————————————————————————————————————————————
+# Cursor encoding
+# ——————————————————————————————————————————————————————
+def encode_cursor(direction, value, pk):
+    raw = json.dumps([direction, value.isoformat() if hasattr(value, 'isoformat') else value, pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, field):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in ('n', 'p'):
+            raise ValueError(direction)
+        return direction, field.to_python(value), int(pk)
+    except Exception as exc:
+        raise InvalidCursor(token) from exc
+
+
+# ——————————————————————————————————————————————————————
+# Core
+# ——————————————————————————————————————————————————————
+class KeysetPage:
+    """One page of results plus the cursors needed to move either way."""
+
+    def __init__(self, items, next_cursor, previous_cursor):
+        self.object_list     = items
+        self.next_cursor     = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def _flip(order_field):
+    return order_field[1:] if order_field.startswith('-') else f'-{order_field}'
+
+
+class _Window:
+    """The query for one page plus what's needed to build its cursors."""
+
+    def __init__(self, queryset, ordering, cursor, page_size):
+        self.page_size = page_size or default_page_size()
+        self.cursor = cursor
+        first, second = ordering
+        descending = first.startswith('-')
+        self.key, self.tiebreak = first.lstrip('-'), second.lstrip('-')
+        field = queryset.model._meta.get_field(self.key)
+
+        self.direction = 'n'
+        if cursor:
+            self.direction, value, pk = decode_cursor(cursor, field)
+            # moving forward on a descending ordering means "smaller than"
+            op = 'lt' if descending == (self.direction == 'n') else 'gt'
+            # the redundant inclusive bound on `key` gives SQLite a range to seek
+            # the index with; the OR alone is only applied as a filter during a scan
+            queryset = queryset.filter(
+                Q(**{f'{self.key}__{op}e': value}),
+                Q(**{f'{self.key}__{op}': value}) |
+                Q(**{self.key: value, f'{self.tiebreak}__{op}': pk})
+            )
+
+        if self.direction == 'n':
+            queryset = queryset.order_by(first, second)
+        else:
+            queryset = queryset.order_by(_flip(first), _flip(second))
+        self.queryset = queryset[:self.page_size + 1]
+
+    def page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.direction == 'p':
+            rows.reverse()
+
+        def cursor_for(direction, obj):
+            # rows may be model instances or .values() dicts
+            get = obj.get if isinstance(obj, dict) else lambda name: getattr(obj, name)
+            return encode_cursor(direction, get(self.key), get(self.tiebreak))
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or self.direction == 'p':
+                next_cursor = cursor_for('n', rows[-1])
+            if (has_more and self.direction == 'p') or (self.cursor and self.direction == 'n'):
+                previous_cursor = cursor_for('p', rows[0])
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate(queryset, ordering, cursor=None, page_size=None):
+    """
+    Return a KeysetPage of ``queryset`` ordered by ``ordering``, a pair
+    such as ('-date_created', '-id').  Both keys must sort the same way and
+    the second one must be unique.
+    """
+    window = _Window(queryset, ordering, cursor, page_size)
+    return window.page(list(window.queryset))
+
+
+async def apaginate(queryset, ordering, cursor=None, page_size=None):
+    """``paginate`` for async views."""
+    window = _Window(queryset, ordering, cursor, page_size)
+    return window.page([row async for row in window.queryset])
+
+
+# ——————————————————————————————————————————————————————
+# Django ListView integration
+# ——————————————————————————————————————————————————————
+class KeysetPaginationMixin:
+    """
+    Drop-in for ListView: set ``keyset_ordering`` and templates get
+    ``page_obj`` with ``next_url`` / ``previous_url`` (see
+    logistics_app/pagination.html).
+    """
+    keyset_ordering = ('-id', '-id')
+
+    def get_paginate_by(self, queryset):
+        return page_size_from(self.request.GET)
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = paginate(
+                queryset, self.keyset_ordering,
+                cursor=self.request.GET.get(CURSOR_PARAM),
+                page_size=page_size,
+            )
+        except InvalidCursor:
+            raise Http404("Invalid cursor")
+        url = self.request.get_full_path()
+        page.next_url = page.next_cursor and replace_query_param(url, CURSOR_PARAM, page.next_cursor)
+        page.previous_url = page.previous_cursor and replace_query_param(url, CURSOR_PARAM, page.previous_cursor)
+        is_paginated = page.has_next() or page.has_previous()
+        return None, page, page.object_list, is_paginated
+
+
+# ——————————————————————————————————————————————————————
+# DRF integration
+# ——————————————————————————————————————————————————————
+def cursor_link(request, cursor):
+    """Absolute URL of the current request with ``cursor`` swapped in."""
+    if cursor is None:
+        return None
+    return replace_query_param(request.build_absolute_uri(), CURSOR_PARAM, cursor)
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    DRF pagination class; uses the view's ``keyset_ordering`` attribute.
+    Responds with {"next": url, "previous": url, "results": [...]}.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = paginate(
+                queryset, getattr(view, 'keyset_ordering', ('-id', '-id')),
+                cursor=request.query_params.get(CURSOR_PARAM),
+                page_size=page_size_from(request.query_params),
+            )
+        except InvalidCursor:
+            raise NotFound("Invalid cursor.")
+        return self.page.object_list
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next':     cursor_link(self.request, self.page.next_cursor),
+            'previous': cursor_link(self.request, self.page.previous_cursor),
+            'results':  data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next':     {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results':  schema,
+            },
+        }
@@ -0,0 +1,166 @@
+"""
+Opt-in sampling profiler for live traffic.
+
+``wrap_wsgi`` / ``wrap_asgi`` (used by sports_logistics/wsgi.py and
+asgi.py) return the application untouched unless ``PROFILER_ENABLED`` is
+set, so there is no cost when it's off.  When on, a request is profiled
+if it matches one of ``PROFILER_URL_NAMES`` or wins the
+``PROFILER_SAMPLE_RATE`` draw; a background thread then samples the
+handling thread's stack every ``PROFILER_INTERVAL`` seconds.  Stacks are
+aggregated per URL name in collapsed format ("a;b;c count", the input to
+flamegraph.pl / speedscope) and written to ``PROFILER_OUTPUT_DIR`` as
+``<view>.<pid>.collapsed`` so every worker's samples can be merged with
+``manage.py dump_profiles``.
+
+At most one request per process is profiled at a time.  Under ASGI the
+sampler can't tell which executor thread runs the view, so it samples
+every thread while the profiled request is in flight.
+"""
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+_lock    = threading.Lock()        # guards _stacks
+_busy    = threading.Lock()        # one profiled request at a time
+_stacks  = {}                      # view name -> Counter(collapsed stack -> samples)
+
+
+def enabled():
+    return getattr(settings, 'PROFILER_ENABLED', False)
+
+
+def output_dir():
+    return Path(getattr(settings, 'PROFILER_OUTPUT_DIR', 'profiles'))
+
+
+def view_name(path):
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    return match.url_name or match.view_name
+
+
+def should_profile(name):
+    if name in getattr(settings, 'PROFILER_URL_NAMES', ()):
+        return True
+    return random.random() < getattr(settings, 'PROFILER_SAMPLE_RATE', 0.0)
+
+
+# ——————————————————————————————————————————————————————
+# Sampling
+# ——————————————————————————————————————————————————————
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, thread_id=None):
+        super().__init__(name='request-sampler', daemon=True)
+        self.thread_id = thread_id          # None = every other thread
+        self.interval  = getattr(settings, 'PROFILER_INTERVAL', 0.005)
+        self.samples   = Counter()
+        self._done     = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._done.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                targets = [frames.get(self.thread_id)]
+            else:
+                targets = [f for tid, f in frames.items() if tid != me]
+            for frame in targets:
+                if frame is not None:
+                    self.samples[_collapse(frame)] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.samples
+
+
+def _record(name, samples):
+    if not samples:
+        return
+    with _lock:
+        stacks = _stacks.setdefault(name, Counter())
+        stacks.update(samples)
+        snapshot = dict(stacks)
+    _flush(name, snapshot)
+
+
+def _flush(name, stacks):
+    directory = output_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.{os.getpid()}.collapsed"
+    tmp  = path.with_suffix('.tmp')
+    tmp.write_text(render_collapsed(stacks))
+    tmp.replace(path)
+
+
+def render_collapsed(stacks):
+    return ''.join(f"{stack} {n}\n" for stack, n in sorted(stacks.items()))
+
+
+def snapshot():
+    """{view name: Counter of stacks} for this process."""
+    with _lock:
+        return {name: Counter(stacks) for name, stacks in _stacks.items()}
+
+
+def reset():
+    with _lock:
+        _stacks.clear()
+
+
+# ——————————————————————————————————————————————————————
+# Entry-point wrappers
+# ——————————————————————————————————————————————————————
+def wrap_wsgi(application):
+    if not enabled():
+        return application
+
+    def profiled_application(environ, start_response):
+        name = view_name(environ.get('PATH_INFO', '/'))
+        if name is None or not should_profile(name) or not _busy.acquire(blocking=False):
+            return application(environ, start_response)
+        sampler = _Sampler(threading.get_ident())
+        sampler.start()
+        try:
+            return application(environ, start_response)
+        finally:
+            _record(name, sampler.stop())
+            _busy.release()
+
+    return profiled_application
+
+
+def wrap_asgi(application):
+    if not enabled():
+        return application
+
+    async def profiled_application(scope, receive, send):
+        name = view_name(scope['path']) if scope['type'] == 'http' else None
+        if name is None or not should_profile(name) or not _busy.acquire(blocking=False):
+            return await application(scope, receive, send)
+        sampler = _Sampler()
+        sampler.start()
+        try:
+            return await application(scope, receive, send)
+        finally:
+            _record(name, sampler.stop())
+            _busy.release()
+
+    return profiled_application
@@ -0,0 +1,147 @@
+"""
+EXPLAIN QUERY PLAN checks for the hot queries.
+
+Each entry in ``HOT_QUERIES`` is a callable that runs the query the way
+the application does (through the ORM or a view); every statement it
+issues is captured and explained.  A plan fails if it full-scans a table
+("SCAN shipment" with no index) or sorts through a temp b-tree for ORDER
+BY, i.e. the query would stop using an index as the tables grow.
+Run via ``manage.py check_query_plans``; tests run it on every build.
+"""
+import re
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analytics, changes, pagination, tracking
+from .autocomplete import EventWidget, ItemWidget, UserWidget
+from .forms import delivery_people
+from .models import Event, Item, Order, Shipment
+
+# "SCAN shipment" / "SCAN logistics_app_shipment AS U0", but not
+# "SCAN ... USING [COVERING] INDEX" or an FTS virtual table
+_FULL_SCAN = re.compile(r'^SCAN (?!.*\bUSING\b)(?!.*\bVIRTUAL TABLE\b)(?!CONSTANT ROW)')
+_TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY')
+
+# tables that are small by nature and may be scanned
+SMALL_TABLES = {'django_content_type', 'auth_permission'}
+
+
+def explain(sql):
+    """Plan detail lines for one captured (already interpolated) statement."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def problems(plan):
+    found = []
+    for line in plan:
+        if _FULL_SCAN.search(line) and line.split()[1] not in SMALL_TABLES:
+            found.append(line)
+        elif _TEMP_SORT.search(line):
+            found.append(line)
+    return found
+
+
+# ——————————————————————————————————————————————————————
+# Hot queries
+# ——————————————————————————————————————————————————————
+def _week_start():
+    return timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=7), time.min))
+
+
+def _second_page(model, ordering):
+    first = model.objects.order_by(*ordering).first()
+    key = ordering[0].lstrip('-')
+    value = getattr(first, key) if first else timezone.now()
+    cursor = pagination.encode_cursor('n', value, first.pk if first else 0)
+    pagination.paginate(model.objects.all(), ordering, cursor=cursor)
+
+
+def _get(name, query=''):
+    def run(client):
+        client.get(reverse(name) + query)
+    return run
+
+
+def _changes(client, name):
+    # from a cursor, as partners poll, so both range predicates are exercised
+    cursor = changes.encode_cursor((timezone.now() - timedelta(hours=1), changes.ROW, 0))
+    client.get(reverse(name), {changes.SINCE_PARAM: cursor})
+
+
+def _autocomplete(widget, queryset, term):
+    def run(client):
+        list(widget().filter_queryset(None, term, queryset)[:widget.max_results + 1])
+    return run
+
+
+HOT_QUERIES = {
+    'dashboard':                 _get('dashboard'),
+    'analytics.compute_payload': lambda client: analytics.compute_payload(),
+    'tracking.prefix':           lambda client: tracking.find('SL2026'),
+    'shipment_list':             _get('shipment_list'),
+    'shipment_list.page2':       lambda client: _second_page(Shipment, ('-date_created', '-id')),
+    'shipment_list.by_status':   lambda client: list(
+        Shipment.objects.filter(status='IN_TRANSIT').order_by('-date_created', '-id')[:50]
+    ),
+    'shipments.delivered_since': lambda client: Shipment.objects.filter(
+        date_delivered__gte=timezone.now() - timedelta(days=30)
+    ).count(),
+    'shipments.recent':          lambda client: list(
+        Shipment.objects.filter(date_created__gte=_week_start()).order_by('-date_created', '-id')[:5]
+    ),
+    'order_list':                _get('order_list'),
+    'order_list.page2':          lambda client: _second_page(Order, ('-order_date', '-id')),
+    'order_list.by_status':      lambda client: list(
+        Order.objects.filter(status='PENDING').order_by('-order_date', '-id')[:50]
+    ),
+    'orders.revenue':            lambda client: Order.objects.filter(
+        order_date__gte=_week_start()).aggregate(revenue=Sum('total_price')),
+    'event_list':                _get('event_list'),
+    'warehouse_list':            _get('warehouse_list'),
+    'warehouse_list.full':       _get('warehouse_list', '?fullness=full'),
+    'events.upcoming':           lambda client: Event.objects.filter(date__gte=timezone.now()).count(),
+    'api.shipments':             _get('shipment-list'),
+    'api.orders':                _get('order-list'),
+    'api.events':                _get('event-list'),
+    'api.shipments.changes':     lambda client: _changes(client, 'shipment-changes'),
+    'api.orders.changes':        lambda client: _changes(client, 'order-changes'),
+    'autocomplete.items':        _autocomplete(ItemWidget, Item.objects.all(), 'ba'),
+    'autocomplete.events':       _autocomplete(EventWidget, Event.objects.all(), 'ev'),
+    'autocomplete.customers':    _autocomplete(UserWidget, User.objects.all(), 'ka'),
+    'autocomplete.delivery':     _autocomplete(UserWidget, delivery_people(), 'ka'),
+}
+
+
+def check(user, names=None):
+    """
+    Run the hot queries as ``user`` and return {name: [(sql, plan, problems)]}.
+    Queries that write or read the session are included; they are cheap
+    primary-key lookups and shouldn't ever fail the check.
+    """
+    client = Client()
+    client.force_login(user)
+    results = {}
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for name, run in HOT_QUERIES.items():
+            if names and name not in names:
+                continue
+            with CaptureQueriesContext(connection) as ctx:
+                run(client)
+            entries = []
+            for query in ctx.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                plan = explain(sql)
+                entries.append((sql, plan, problems(plan)))
+            results[name] = entries
+    return results
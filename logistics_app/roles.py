@@ -0,0 +1,82 @@
+"""
+The current user's role, resolved once per request.
+
+``role_of(user)`` memoises the role on the user object, so the mixin, the
+view and every row of a template loop share one lookup.  The session's user
+is loaded together with its profile (``ProfileBackend``), so that lookup
+costs no query of its own.  Nothing is cached across requests: a role
+change applies on the next request, in every worker process.  Templates
+get precomputed flags from the ``permissions`` context processor --
+``{% if can.manage_shipments %}`` -- instead of comparing
+``user.profile.role`` themselves.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UserProfile
+
+# template flag -> roles that have it; superusers have every flag
+PERMISSIONS = {
+    'manage_shipments': {'warehouse_manager'},
+    'manage_events':    {'admin'},
+}
+
+# memoised stand-in for "no profile"
+_NO_ROLE = ''
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend that loads the session's user with its profile, in one query."""
+
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.select_related('profile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def role_of(user):
+    """The user's profile role, or None (anonymous, or no profile)."""
+    if not user.is_authenticated:
+        return None
+    role = getattr(user, '_role', None)
+    if role is None:
+        if User.profile.is_cached(user):
+            profile = getattr(user, 'profile', None)
+            role = profile.role if profile else _NO_ROLE
+        else:
+            role = (UserProfile.objects.filter(user_id=user.pk)
+                                       .values_list('role', flat=True).first()) or _NO_ROLE
+        user._role = role
+    return role or None
+
+
+def has_role(user, roles):
+    return user.is_superuser or role_of(user) in roles
+
+
+class Flags:
+    """``can.<permission>`` for templates; nothing is looked up until used."""
+
+    def __init__(self, user):
+        self._user = user
+
+    def __getitem__(self, name):
+        return has_role(self._user, PERMISSIONS[name])
+
+
+def permissions(request):
+    """Context processor: ``can``."""
+    return {'can': Flags(request.user)}
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def evict_role(sender, instance, **kwargs):
+    # the copy memoised on a user object this request already holds
+    user = UserProfile.user.field.get_cached_value(instance, default=None)
+    if user is not None:
+        user.__dict__.pop('_role', None)
@@ -0,0 +1,218 @@
+"""
+Incrementally maintained rollups for the dashboard.
+
+Every Shipment/Order save or delete adjusts two small tables:
+  - DailyStatusCount: (kind, day, status) -> count
+  - StatCounter:      'shipment:total', 'order:PENDING', ... -> value
+
+so the dashboard can render from a couple of indexed lookups instead of
+counting the full tables on every hit.  Queryset ``update()`` and
+``bulk_create()`` bypass signals; callers using those should call
+``record_created()`` / ``record_status_change()`` themselves, or run
+``manage.py rebuild_rollups`` afterwards.
+"""
+from collections import Counter, defaultdict
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import metrics
+from .models import DailyStatusCount, Order, Shipment, StatCounter
+
+# model -> (rollup kind, name of the creation timestamp field)
+TRACKED = {
+    Shipment: ('shipment', 'date_created'),
+    Order:    ('order',    'order_date'),
+}
+
+
+def counter_key(kind, status=None):
+    return f"{kind}:{status or 'total'}"
+
+
+# ——————————————————————————————————————————————————————
+# Low-level increment helpers
+# ——————————————————————————————————————————————————————
+def _bump(model, field, delta, **lookup):
+    """Atomically add ``delta`` to ``field`` of the row matching ``lookup``."""
+    if not delta:
+        return
+    if model.objects.filter(**lookup).update(**{field: F(field) + delta}):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **{field: delta})
+    except IntegrityError:
+        # another writer created the row first
+        model.objects.filter(**lookup).update(**{field: F(field) + delta})
+
+
+def _bump_day(kind, day, status, delta):
+    _bump(DailyStatusCount, 'count', delta, kind=kind, day=day, status=status)
+
+
+def _bump_counter(kind, status, delta):
+    _bump(StatCounter, 'value', delta, key=counter_key(kind, status))
+
+
+def _day_of(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+# ——————————————————————————————————————————————————————
+# Public recording API (also used by bulk write paths)
+# ——————————————————————————————————————————————————————
+def _apply_created(kind, created_at, status, n):
+    _bump_day(kind, _day_of(created_at), status, n)
+    _bump_counter(kind, None, n)
+    _bump_counter(kind, status, n)
+
+
+def record_created(kind, created_at, status, n=1):
+    _apply_created(kind, created_at, status, n)
+    metrics.OBJECTS_CREATED.inc(n, kind=kind)
+
+
+def record_created_many(kind, rows):
+    """
+    Batch form of record_created for bulk inserts: ``rows`` is an iterable
+    of (created_at, status) pairs; issues one update per (day, status).
+    """
+    buckets = Counter((_day_of(created_at), status) for created_at, status in rows)
+    per_status = Counter()
+    for (day, status), n in buckets.items():
+        _bump_day(kind, day, status, n)
+        per_status[status] += n
+    for status, n in per_status.items():
+        _bump_counter(kind, status, n)
+    _bump_counter(kind, None, sum(per_status.values()))
+    metrics.OBJECTS_CREATED.inc(sum(per_status.values()), kind=kind)
+
+
+def record_deleted(kind, created_at, status, n=1):
+    _apply_created(kind, created_at, status, -n)
+
+
+def record_status_change(kind, created_at, old_status, new_status, n=1):
+    if old_status == new_status:
+        return
+    day = _day_of(created_at)
+    _bump_day(kind, day, old_status, -n)
+    _bump_day(kind, day, new_status, n)
+    _bump_counter(kind, old_status, -n)
+    _bump_counter(kind, new_status, n)
+    metrics.STATUS_TRANSITIONS.inc(n, kind=kind, from_status=old_status, to_status=new_status)
+
+
+def record_status_changes(kind, rows):
+    """
+    Batch form of record_status_change for bulk updates: ``rows`` is an
+    iterable of (created_at, old_status, new_status) triples.
+    """
+    moves = Counter(
+        (_day_of(created_at), old, new) for created_at, old, new in rows if old != new
+    )
+    per_status = Counter()
+    for (day, old, new), n in moves.items():
+        _bump_day(kind, day, old, -n)
+        _bump_day(kind, day, new, n)
+        per_status[old] -= n
+        per_status[new] += n
+        metrics.STATUS_TRANSITIONS.inc(n, kind=kind, from_status=old, to_status=new)
+    for status, n in per_status.items():
+        _bump_counter(kind, status, n)
+
+
+# ——————————————————————————————————————————————————————
+# Signal receivers
+# ——————————————————————————————————————————————————————
+@receiver(post_init, sender=Shipment)
+@receiver(post_init, sender=Order)
+def remember_loaded_status(sender, instance, **kwargs):
+    # don't trigger a query for deferred fields
+    instance._rollup_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Shipment)
+@receiver(post_save, sender=Order)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    kind, ts_field = TRACKED[sender]
+    created_at = getattr(instance, ts_field)
+    if created:
+        record_created(kind, created_at, instance.status)
+    elif instance._rollup_status is not None:
+        record_status_change(kind, created_at, instance._rollup_status, instance.status)
+    instance._rollup_status = instance.status
+
+
+@receiver(post_delete, sender=Shipment)
+@receiver(post_delete, sender=Order)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    kind, ts_field = TRACKED[sender]
+    record_deleted(kind, getattr(instance, ts_field), instance.status)
+
+
+# ——————————————————————————————————————————————————————
+# Readers
+# ——————————————————————————————————————————————————————
+def daily_counts(kind, start, end):
+    """{date: total created that day} for start..end inclusive (all statuses)."""
+    rows = (
+        DailyStatusCount.objects
+        .filter(kind=kind, day__range=(start, end))
+        .values('day')
+        .annotate(total=Sum('count'))
+    )
+    return {r['day']: r['total'] for r in rows}
+
+
+def counters(*keys):
+    """{key: value} for the requested counter keys; missing keys read as 0."""
+    found = dict(StatCounter.objects.filter(key__in=keys).values_list('key', 'value'))
+    return {k: found.get(k, 0) for k in keys}
+
+
+# ——————————————————————————————————————————————————————
+# Backfill
+# ——————————————————————————————————————————————————————
+@transaction.atomic
+def rebuild(apps=global_apps):
+    """
+    Recompute all rollups from the source tables. Returns rows written.
+
+    ``apps`` is the registry to take the models from; migrations pass their
+    historical one.
+    """
+    day_counts = apps.get_model(DailyStatusCount._meta.label)
+    stat_counters = apps.get_model(StatCounter._meta.label)
+    day_counts.objects.all().delete()
+
+    written = 0
+    for model, (kind, ts_field) in TRACKED.items():
+        stat_counters.objects.filter(key__startswith=f'{kind}:').delete()
+        totals = defaultdict(int)
+        rows = (
+            apps.get_model(model._meta.label).objects
+            .annotate(day=TruncDate(ts_field))
+            .values('day', 'status')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        stats = []
+        for r in rows:
+            stats.append(day_counts(kind=kind, day=r['day'], status=r['status'], count=r['n']))
+            totals[None] += r['n']
+            totals[r['status']] += r['n']
+        day_counts.objects.bulk_create(stats, batch_size=500)
+        stat_counters.objects.bulk_create(
+            [stat_counters(key=counter_key(kind, status), value=n) for status, n in totals.items()]
+        )
+        written += len(stats) + len(totals)
+    return written
@@ -0,0 +1,203 @@
+"""
+Search index for shipments and orders.
+
+The default backend keeps an SQLite FTS5 table per model (trigram
+tokenizer, so substring queries still work) in sync from post_save /
+post_delete.  List views and the API's ``?search=`` filter go through
+``filter_queryset()``, which stays a lazy queryset and therefore composes
+with keyset pagination; ``search()`` returns ids ranked by bm25 for
+callers that want relevance order.
+
+The backend is chosen by ``settings.SEARCH_BACKEND``; ``LikeBackend`` is
+the portable (unindexed) fallback for other databases.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Order, Shipment
+
+# model -> (index table, indexed fields)
+INDEXED = {
+    Shipment: ('search_shipment', ('tracking_number', 'origin', 'destination')),
+    Order:    ('search_order',    ('order_number', 'status')),
+}
+
+SEARCH_PARAM = 'search'
+
+
+class SearchBackend:
+    """Interface every search backend implements."""
+
+    def index(self, obj):
+        raise NotImplementedError
+
+    def remove(self, obj):
+        raise NotImplementedError
+
+    def index_many(self, objs):
+        """Index a batch of rows of one model (bulk write paths)."""
+        for obj in objs:
+            self.index(obj)
+
+    def rebuild(self, model):
+        """Re-index every row of ``model``; returns the number indexed."""
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset, term):
+        """Narrow ``queryset`` to rows matching ``term`` (stays lazy)."""
+        raise NotImplementedError
+
+    def search(self, model, term, limit=50):
+        """Primary keys of the best ``limit`` matches, most relevant first."""
+        raise NotImplementedError
+
+
+class LikeBackend(SearchBackend):
+    """Unindexed ``icontains`` search; works on any database."""
+
+    def index(self, obj):
+        pass
+
+    def remove(self, obj):
+        pass
+
+    def index_many(self, objs):
+        pass
+
+    def rebuild(self, model):
+        return 0
+
+    def filter_queryset(self, queryset, term):
+        q = Q()
+        for field in INDEXED[queryset.model][1]:
+            q |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(q)
+
+    def search(self, model, term, limit=50):
+        qs = self.filter_queryset(model.objects.all(), term)
+        return list(qs.values_list('pk', flat=True)[:limit])
+
+
+class SQLiteFTSBackend(LikeBackend):
+    """
+    FTS5 + trigram tokenizer.  Trigrams need at least three characters,
+    so shorter terms fall back to LikeBackend.
+    """
+    MIN_TERM_LENGTH = 3
+
+    @staticmethod
+    def _match(term):
+        # a quoted phrase is matched as a plain substring by the trigram tokenizer
+        return '"%s"' % term.replace('"', '""')
+
+    def index(self, obj):
+        table, fields = INDEXED[type(obj)]
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [obj.pk])
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {', '.join(fields)}) "
+                f"VALUES (%s{', %s' * len(fields)})",
+                [obj.pk] + [getattr(obj, f) or '' for f in fields],
+            )
+
+    def index_many(self, objs):
+        objs = list(objs)
+        if not objs:
+            return
+        table, fields = INDEXED[type(objs[0])]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {table} WHERE rowid = %s", [[obj.pk] for obj in objs]
+            )
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, {', '.join(fields)}) "
+                f"VALUES (%s{', %s' * len(fields)})",
+                [[obj.pk] + [getattr(obj, f) or '' for f in fields] for obj in objs],
+            )
+
+    def remove(self, obj):
+        table, _ = INDEXED[type(obj)]
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [obj.pk])
+
+    def rebuild(self, model):
+        table, fields = INDEXED[model]
+        columns = ', '.join(fields)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM {model._meta.db_table}"
+            )
+            return cursor.rowcount
+
+    def filter_queryset(self, queryset, term):
+        if len(term) < self.MIN_TERM_LENGTH:
+            return super().filter_queryset(queryset, term)
+        table, _ = INDEXED[queryset.model]
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [self._match(term)]
+        ))
+
+    def search(self, model, term, limit=50):
+        if len(term) < self.MIN_TERM_LENGTH:
+            return super().search(model, term, limit)
+        table, _ = INDEXED[model]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY rank LIMIT %s",
+                [self._match(term), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'SEARCH_BACKEND', 'logistics_app.search.LikeBackend')
+        _backend = import_string(path)()
+    return _backend
+
+
+def filter_queryset(queryset, term):
+    return get_backend().filter_queryset(queryset, term)
+
+
+def search(model, term, limit=50):
+    return get_backend().search(model, term, limit)
+
+
+# ——————————————————————————————————————————————————————
+# Keep the index in sync
+# ——————————————————————————————————————————————————————
+@receiver(post_save, sender=Shipment)
+@receiver(post_save, sender=Order)
+def index_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Shipment)
+@receiver(post_delete, sender=Order)
+def unindex_on_delete(sender, instance, **kwargs):
+    get_backend().remove(instance)
+
+
+# ——————————————————————————————————————————————————————
+# DRF filter backend (?search=)
+# ——————————————————————————————————————————————————————
+class IndexedSearchFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        term = (request.query_params.get(SEARCH_PARAM) or '').strip()
+        if term and queryset.model in INDEXED:
+            queryset = filter_queryset(queryset, term)
+        return queryset
@@ -1,17 +1,97 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Shipment, Order, Event
+from . import bulk
+from .models import Shipment, Order, Event, generate_tracking_numbers
 
-class ShipmentSerializer(serializers.ModelSerializer):
+
+class ShipmentListSerializer(serializers.ListSerializer):
+    """
+    many=True serializer for the bulk endpoints: the whole batch is
+    validated first, then written with one bulk_create / bulk_update.
+    For updates, ``instance`` is a list of shipments and every item in the
+    payload must carry its ``id``.
+    """
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            if not hasattr(self, '_by_pk'):
+                self._by_pk, self._seen = {obj.pk: obj for obj in self.instance}, set()
+            pk = data.get('id') if isinstance(data, dict) else None
+            if pk not in self._by_pk:
+                raise serializers.ValidationError({'id': ['Unknown or missing shipment id.']})
+            if pk in self._seen:
+                raise serializers.ValidationError({'id': ['Duplicate shipment id.']})
+            self._seen.add(pk)
+            self.child.instance = self._by_pk[pk]
+            self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        shipments = [Shipment(**attrs) for attrs in validated_data]
+        for shipment, code in zip(shipments, generate_tracking_numbers(len(shipments))):
+            shipment.tracking_number = code
+        Shipment.objects.bulk_create(shipments)
+        bulk.shipments_created(shipments)
+        return shipments
+
+    def update(self, instances, validated_data):
+        by_pk = {obj.pk: obj for obj in instances}
+        old_statuses = {obj.pk: obj.status for obj in instances}
+        updated, fields = [], set()
+        for item, attrs in zip(self.initial_data, validated_data):
+            shipment = by_pk[item['id']]
+            for attr, value in attrs.items():
+                setattr(shipment, attr, value)
+            fields.update(attrs)
+            updated.append(shipment)
+        if fields:
+            # bulk_update skips auto_now; the change feed relies on updated_at
+            now = timezone.now()
+            for shipment in updated:
+                shipment.updated_at = now
+            Shipment.objects.bulk_update(updated, sorted(fields | {'updated_at'}))
+            bulk.shipments_updated(updated, old_statuses)
+        return updated
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=id,status`` limits the output to the named fields.  Unknown
+    names are ignored, and writes always see every field.
+    """
+    FIELDS_PARAM = 'fields'
+
+    def get_fields(self):
+        fields  = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return fields
+        wanted  = request.query_params.get(self.FIELDS_PARAM)
+        if wanted:
+            names = {name.strip() for name in wanted.split(',')}
+            if names & set(fields):
+                fields = {name: f for name, f in fields.items() if name in names}
+        return fields
+
+
+class ShipmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Shipment
         fields = '__all__'
+        list_serializer_class = ShipmentListSerializer
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = '__all__'
 
-class EventSerializer(serializers.ModelSerializer):
+class ReservationSerializer(serializers.Serializer):
+    """One line of a bulk stock reservation (/api/orders/reserve/)."""
+    item     = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class EventSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = '__all__'
@@ -0,0 +1,60 @@
+"""
+Per-connection SQLite tuning.
+
+``connection_created`` fires once per new connection (so once per worker
+when ``CONN_MAX_AGE`` keeps connections open); the receiver applies
+``SQLITE_PRAGMAS`` in order.  Defaults suit a single-host deployment with
+many concurrent readers and a few writers:
+
+  journal_mode=WAL      readers no longer block the writer (and vice versa)
+  synchronous=NORMAL    fsync at checkpoints, not every commit; safe with WAL
+  busy_timeout          wait for the write lock instead of failing at once
+  mmap_size/cache_size  keep hot pages in memory across requests
+  temp_store=MEMORY     sorts and temp b-trees without temp files
+
+Write transactions use ``BEGIN IMMEDIATE`` through the backend's
+``transaction_mode`` option (see settings.DATABASES), which takes the
+write lock up front; a deferred transaction that reads first and writes
+later can't upgrade while another writer holds the lock and fails with
+"database is locked" regardless of the busy timeout.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous':  'NORMAL',
+    'busy_timeout': 5000,             # ms
+    'temp_store':   'MEMORY',
+    'mmap_size':    256 * 1024 ** 2,  # bytes
+    'cache_size':   -64000,           # negative = KiB, so 64 MB
+}
+
+
+def pragmas():
+    configured = getattr(settings, 'SQLITE_PRAGMAS', None)
+    return DEFAULT_PRAGMAS if configured is None else configured
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # on the raw sqlite3 connection, so connection setup isn't counted (or
+    # logged) as one of the queries of whichever request opened it
+    for name, value in pragmas().items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def current_settings(connection):
+    """The effective value of each configured pragma on ``connection``."""
+    if connection.vendor != 'sqlite':
+        return {}
+    values = {}
+    with connection.cursor() as cursor:
+        for name in pragmas():
+            cursor.execute(f'PRAGMA {name}')
+            row = cursor.fetchone()
+            values[name] = row[0] if row else None
+    return values
@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -116,3 +116,1264 @@ class ProfileAjaxTest(TestCase):
         json_response = response.json()
         self.assertIn('status', json_response)
         self.assertEqual(json_response['status'], 'success')
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='rollup', password='ComplexPass123!')
+
+    def counters(self):
+        from logistics_app import rollups
+        return rollups.counters('shipment:total', 'shipment:PENDING', 'shipment:DELIVERED', 'order:PENDING')
+
+    def test_counters_follow_save_and_delete(self):
+        s1 = Shipment.objects.create(origin='A', destination='B')
+        Shipment.objects.create(origin='A', destination='C')
+        self.assertEqual(self.counters(), {
+            'shipment:total': 2, 'shipment:PENDING': 2, 'shipment:DELIVERED': 0, 'order:PENDING': 0,
+        })
+        s1.status = 'DELIVERED'
+        s1.save()
+        Shipment.objects.get(pk=s1.pk).delete()
+        self.assertEqual(self.counters()['shipment:total'], 1)
+        self.assertEqual(self.counters()['shipment:DELIVERED'], 0)
+        self.assertEqual(self.counters()['shipment:PENDING'], 1)
+
+    def test_rebuild_matches_incremental(self):
+        from logistics_app import rollups
+        from logistics_app.models import Order, DailyStatusCount
+        Shipment.objects.create(origin='A', destination='B', status='IN_TRANSIT')
+        Order.objects.create(order_number='R1', customer=self.user)
+        before = sorted(DailyStatusCount.objects.values_list('kind', 'day', 'status', 'count'))
+        counters = self.counters()
+        rollups.rebuild()
+        self.assertEqual(sorted(DailyStatusCount.objects.values_list('kind', 'day', 'status', 'count')), before)
+        self.assertEqual(self.counters(), counters)
+
+    def test_migration_backfills_existing_rows(self):
+        import importlib
+        from django.db import connection
+        from django.db.migrations.loader import MigrationLoader
+        from logistics_app.models import DailyStatusCount, StatCounter
+        Shipment.objects.create(origin='A', destination='B')
+        Shipment.objects.create(origin='A', destination='C', status='DELIVERED')
+        # as if the rows predated the rollup tables
+        DailyStatusCount.objects.all().delete()
+        StatCounter.objects.all().delete()
+        migration = importlib.import_module('logistics_app.migrations.0005_rollup_tables')
+        state = MigrationLoader(connection).project_state(('logistics_app', '0005_rollup_tables'))
+        migration.backfill_rollups(state.apps, None)
+        self.assertEqual(self.counters(), {
+            'shipment:total': 2, 'shipment:PENDING': 1, 'shipment:DELIVERED': 1, 'order:PENDING': 0,
+        })
+        self.assertEqual(sum(DailyStatusCount.objects.values_list('count', flat=True)), 2)
+
+    def test_dashboard_reads_rollups(self):
+        Shipment.objects.create(origin='A', destination='B')
+        self.client.login(username='rollup', password='ComplexPass123!')
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_shipments'], 1)
+        self.assertEqual(response.context['shipment_counts'][-1], 1)
+
+class AnalyticsCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        User.objects.create_user(username='analyst', password='ComplexPass123!')
+        self.client.login(username='analyst', password='ComplexPass123!')
+
+    def test_etag_revalidation_and_invalidation(self):
+        url = reverse('analytics_data')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertTrue(first.has_header('Last-Modified'))
+
+        with self.assertNumQueries(2):  # session + user only
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Shipment.objects.create(origin='A', destination='B')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        self.assertEqual(changed.json()['shipments_by_date'][-1]['count'], 1)
+
+    def test_version_is_bumped_only_after_commit(self):
+        from django.db import transaction
+        from logistics_app import analytics
+        version = analytics.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Shipment.objects.create(origin='A', destination='B')
+            # a poll before the commit must not cache the old data as new
+            self.assertEqual(analytics.get_version(), version)
+        self.assertNotEqual(analytics.get_version(), version)
+
+        version = analytics.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Shipment.objects.create(origin='A', destination='C')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(analytics.get_version(), version)
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='pager', password='ComplexPass123!')
+        self.client.login(username='pager', password='ComplexPass123!')
+        for i in range(7):
+            Shipment.objects.create(origin=f'O{i}', destination='D')
+
+    def test_api_walks_forward_and_back_without_gaps(self):
+        seen, url = [], reverse('shipment-list') + '?page_size=3'
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append(data)
+            seen.extend(s['id'] for s in data['results'])
+            url = data['next']
+        self.assertEqual(seen, sorted(Shipment.objects.values_list('id', flat=True), reverse=True))
+        self.assertEqual([len(p['results']) for p in pages], [3, 3, 1])
+        back = self.client.get(pages[-1]['previous']).json()
+        self.assertEqual(back['results'], pages[1]['results'])
+
+    def test_html_list_links_and_bad_cursor(self):
+        response = self.client.get(reverse('shipment_list') + '?page_size=5')
+        self.assertEqual(len(response.context['shipments']), 5)
+        self.assertIn('cursor=', response.context['page_obj'].next_url)
+        self.assertEqual(self.client.get(reverse('shipment_list') + '?cursor=junk').status_code, 404)
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='searcher', password='ComplexPass123!')
+        self.client.login(username='searcher', password='ComplexPass123!')
+        self.dublin = Shipment.objects.create(origin='Dublin Port', destination='Croke Park')
+        self.cork = Shipment.objects.create(origin='Cork', destination='Thomond Park')
+
+    def test_index_follows_save_and_delete(self):
+        from logistics_app import search
+        self.assertEqual(search.search(Shipment, 'croke'), [self.dublin.pk])
+        self.dublin.destination = 'Aviva Stadium'
+        self.dublin.save()
+        self.assertEqual(search.search(Shipment, 'croke'), [])
+        self.cork.delete()
+        self.assertEqual(search.search(Shipment, 'park'), [])
+
+    def test_list_view_and_api_use_index(self):
+        response = self.client.get(reverse('shipment_list'), {'q': 'mond pa'})
+        self.assertEqual([s.pk for s in response.context['shipments']], [self.cork.pk])
+        data = self.client.get(reverse('shipment-list'), {'search': self.dublin.tracking_number[-8:]}).json()
+        self.assertEqual([s['id'] for s in data['results']], [self.dublin.pk])
+        # terms shorter than a trigram still work
+        self.assertEqual(len(self.client.get(reverse('shipment_list'), {'q': 'k'}).context['shipments']), 2)
+
+class TrackShipmentTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.shipment = Shipment.objects.create(origin='A', destination='B')
+
+    def test_full_code_is_cached_and_evicted_on_save(self):
+        url = reverse('track_shipment')
+        code = self.shipment.tracking_number.lower()
+        self.assertEqual(self.client.get(url, {'tracking_number': code}).context['shipment'], self.shipment)
+        with self.assertNumQueries(0):
+            self.client.get(url, {'tracking_number': code})
+        self.shipment.status = 'IN_TRANSIT'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shipment.save()
+        response = self.client.get(url, {'tracking_number': code})
+        self.assertEqual(response.context['shipment'].status, 'IN_TRANSIT')
+
+    def test_eviction_waits_for_commit(self):
+        from django.db import transaction
+        from logistics_app import tracking
+        code = self.shipment.tracking_number
+        tracking.get_by_tracking_number(code)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.shipment.status = 'DELIVERED'
+                    self.shipment.save()
+                    # a lookup racing the write keeps the committed row
+                    self.assertEqual(tracking.get_by_tracking_number(code).status, 'PENDING')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        with self.assertNumQueries(0):
+            self.assertEqual(tracking.get_by_tracking_number(code).status, 'PENDING')
+
+    def test_partial_code_prefix_and_substring(self):
+        other = Shipment.objects.create(origin='A', destination='C')
+        url = reverse('track_shipment')
+        response = self.client.get(url, {'tracking_number': 'sl'})
+        self.assertEqual(len(response.context['shipments']), 2)
+        response = self.client.get(url, {'tracking_number': other.tracking_number[4:]})
+        self.assertEqual(response.context['shipment'], other)
+
+class ShipmentImportTests(TestCase):
+    CSV = (
+        "origin,destination,status,date_delivered,contents,event,delivery_person\n"
+        "Dublin,Croke Park,,,Balls,,\n"
+        "Cork,Thomond Park,IN_TRANSIT,2025-05-01 10:00,Nets,,\n"
+        ",Nowhere,PENDING,,,,\n"
+        "Galway,Pearse Stadium,LOST,,,999,\n"
+    )
+
+    def test_import_batches_and_reports_errors(self):
+        import io
+        from logistics_app import rollups
+        from logistics_app.importers import import_shipments
+        result = import_shipments(io.StringIO(self.CSV), batch_size=2)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [4, 5])
+        self.assertIn('origin', result.errors[0][1])
+        self.assertEqual(set(result.errors[1][1]), {'status', 'event'})
+        self.assertEqual(Shipment.objects.filter(tracking_number__startswith='SL').count(), 2)
+        self.assertEqual(rollups.counters('shipment:total')['shipment:total'], 2)
+
+    def test_upload_view(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        manager = User.objects.create_user(username='importer', password='ComplexPass123!')
+        manager.profile.role = 'warehouse_manager'
+        manager.profile.save()
+        self.client.login(username='importer', password='ComplexPass123!')
+        upload = SimpleUploadedFile('manifest.csv', self.CSV.encode(), content_type='text/csv')
+        response = self.client.post(reverse('shipment_import'), {'file': upload})
+        self.assertEqual(response.context['result'].created, 2)
+        self.assertEqual(len(response.context['errors']), 2)
+
+    def test_upload_view_reports_undecodable_or_malformed_files(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        manager = User.objects.create_user(username='importer', password='ComplexPass123!')
+        manager.profile.role = 'warehouse_manager'
+        manager.profile.save()
+        self.client.login(username='importer', password='ComplexPass123!')
+        for content, message in (
+            (self.CSV.encode('utf-16'), 'not UTF-8'),
+            (b'origin,destination\n"' + b'x' * 200_000 + b'",Croke Park\n', 'not valid CSV'),
+        ):
+            upload = SimpleUploadedFile('manifest.csv', content, content_type='text/csv')
+            response = self.client.post(reverse('shipment_import'), {'file': upload})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(message, response.context['form'].errors['file'][0])
+
+class ExportTests(TestCase):
+    def setUp(self):
+        from logistics_app.models import Item, Order
+        self.client = Client()
+        self.user = User.objects.create_user(username='exporter', password='ComplexPass123!')
+        self.client.login(username='exporter', password='ComplexPass123!')
+        Shipment.objects.create(origin='Dublin', destination='Cork', status='DELIVERED')
+        Shipment.objects.create(origin='Cork', destination='Galway')
+        order = Order.objects.create(order_number='EXP1', customer=self.user)
+        order.items.set([Item.objects.create(name='Ball', category='Gear'),
+                         Item.objects.create(name='Net', category='Gear')])
+
+    def test_shipments_csv_with_status_filter(self):
+        response = self.client.get(reverse('export_data', args=['shipments', 'csv']), {'status': 'DELIVERED'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('id,tracking_number,status'))
+        self.assertIn('Dublin', lines[1])
+
+    def test_orders_ndjson_includes_items(self):
+        import json
+        from logistics_app.models import Item
+        response = self.client.get(reverse('export_data', args=['orders', 'ndjson']))
+        rows = [json.loads(l) for l in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows[0]['order_number'], 'EXP1')
+        self.assertEqual(rows[0]['items'], sorted(Item.objects.values_list('id', flat=True)))
+
+    def test_bad_date_is_rejected(self):
+        response = self.client.get(reverse('export_data', args=['events', 'csv']), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+class ShipmentBulkApiTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='depot', password='ComplexPass123!')
+        self.client.login(username='depot', password='ComplexPass123!')
+        self.url = reverse('shipment-bulk')
+
+    def post(self, method, payload):
+        import json
+        return getattr(self.client, method)(self.url, json.dumps(payload), content_type='application/json')
+
+    def test_bulk_create_and_status_update(self):
+        from logistics_app import rollups
+        response = self.post('post', [{'origin': f'O{i}', 'destination': 'D'} for i in range(5)])
+        self.assertEqual(response.status_code, 201)
+        ids = [s['id'] for s in response.json()]
+        self.assertEqual(len(set(s['tracking_number'] for s in response.json())), 5)
+
+        response = self.post('patch', [{'id': pk, 'status': 'DELIVERED'} for pk in ids[:3]])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Shipment.objects.filter(status='DELIVERED').count(), 3)
+        self.assertEqual(
+            rollups.counters('shipment:total', 'shipment:PENDING', 'shipment:DELIVERED'),
+            {'shipment:total': 5, 'shipment:PENDING': 2, 'shipment:DELIVERED': 3},
+        )
+
+    def test_update_reads_shipments_inside_the_transaction(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        existing = Shipment.objects.create(origin='A', destination='B')
+        with CaptureQueriesContext(connection) as ctx:
+            self.post('patch', [{'id': existing.pk, 'status': 'IN_TRANSIT'}])
+        sql = [q['sql'] for q in ctx.captured_queries]
+        opened = next(i for i, q in enumerate(sql) if q.startswith('SAVEPOINT'))
+        read = next(i for i, q in enumerate(sql) if q.startswith('SELECT') and 'logistics_app_shipment' in q)
+        self.assertLess(opened, read)
+
+    def test_invalid_item_rejects_whole_batch(self):
+        existing = Shipment.objects.create(origin='A', destination='B')
+        response = self.post('patch', [
+            {'id': existing.pk, 'status': 'IN_TRANSIT'},
+            {'id': existing.pk + 100, 'status': 'IN_TRANSIT'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        # partial updates report errors keyed by item index
+        self.assertEqual(list(response.json()), ['1'])
+        self.assertIn('id', response.json()['1'])
+        existing.refresh_from_db()
+        self.assertEqual(existing.status, 'PENDING')
+
+class ApiFastPathTests(TestCase):
+    def setUp(self):
+        from logistics_app.models import Event, Item, Order
+        self.client = Client()
+        self.user = User.objects.create_user(username='reader', password='ComplexPass123!')
+        self.client.login(username='reader', password='ComplexPass123!')
+        event = Event.objects.create(name='Final', date=timezone.now(), location='Croke Park')
+        Shipment.objects.create(origin='A', destination='B', event=event, delivery_person=self.user,
+                                date_delivered=timezone.now())
+        order = Order.objects.create(order_number='F1', customer=self.user)
+        order.items.set([Item.objects.create(name='Ball', category='Gear', price='12.50')])
+
+    def test_values_output_matches_model_serializer(self):
+        from logistics_app.models import Order
+        from logistics_app.serializers import OrderSerializer, ShipmentSerializer
+        for url, serializer, model in (
+            (reverse('shipment-list'), ShipmentSerializer, Shipment),
+            (reverse('order-list'), OrderSerializer, Order),
+        ):
+            expected = serializer(model.objects.all(), many=True).data
+            self.assertEqual(self.client.get(url).json()['results'], [dict(o) for o in expected])
+
+    def test_sparse_fieldsets(self):
+        data = self.client.get(reverse('shipment-list'), {'fields': 'id,status'}).json()
+        self.assertEqual(list(data['results'][0]), ['id', 'status'])
+
+class QueryBudgetTests(TestCase):
+    """Each endpoint runs a fixed number of queries however many rows it shows."""
+    BUDGETS = {
+        'shipment_list':  3,
+        'order_list':     3,
+        'event_list':     3,
+        'dashboard':      6,
+        'shipment-list':  3,
+        'order-list':     4,
+        'event-list':     3,
+    }
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='budget', password='ComplexPass123!')
+        self.client.login(username='budget', password='ComplexPass123!')
+
+    def seed(self, n):
+        from logistics_app.models import Event, Item, Order
+        item = Item.objects.create(name='Ball', category='Gear')
+        for i in range(n):
+            event = Event.objects.create(name=f'E{i}', date=timezone.now(), location='L')
+            Shipment.objects.create(origin='A', destination='B', event=event, delivery_person=self.user)
+            customer = User.objects.create_user(username=f'c{n}-{i}')
+            Order.objects.create(order_number=f'{n}-{i}', customer=customer).items.add(item)
+
+    def count(self, name, *args):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(reverse(name, args=args)).status_code, 200)
+        return len(ctx)
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        self.seed(2)
+        small = {name: self.count(name) for name in self.BUDGETS}
+        self.seed(10)
+        large = {name: self.count(name) for name in self.BUDGETS}
+        self.assertEqual(small, large)
+        for name, budget in self.BUDGETS.items():
+            self.assertLessEqual(large[name], budget, name)
+
+    def test_detail_pages(self):
+        from logistics_app.models import Order
+        self.seed(1)
+        self.assertLessEqual(self.count('shipment_detail', Shipment.objects.first().pk), 4)
+        self.assertLessEqual(self.count('order-detail', Order.objects.first().pk), 4)
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='timed', password='ComplexPass123!')
+        self.client.login(username='timed', password='ComplexPass123!')
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('shipment_list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('view;dur=', timing)
+
+    def test_budget_warning(self):
+        from django.test import override_settings
+        with override_settings(QUERY_BUDGETS={'shipment_list': 1}):
+            with self.assertLogs('logistics_app.perf', level='WARNING') as logs:
+                self.client.get(reverse('shipment_list'))
+        self.assertIn('Query budget exceeded: shipment_list', logs.output[0])
+
+    def test_budgets_by_name_only_apply_to_reads(self):
+        from django.test import override_settings
+        from logistics_app.instrumentation import query_budget
+        with override_settings(QUERY_BUDGETS={'shipment-list': 3, ('shipment-list', 'POST'): 9},
+                               DEFAULT_QUERY_BUDGET=5):
+            self.assertEqual(query_budget('shipment-list', 'GET'), 3)
+            self.assertEqual(query_budget('shipment-list', 'HEAD'), 3)
+            self.assertEqual(query_budget('shipment-list', 'POST'), 9)
+            self.assertIsNone(query_budget('shipment-list', 'PATCH'))
+            self.assertEqual(query_budget('event-list', 'GET'), 5)
+            self.assertIsNone(query_budget('event-list', 'DELETE'))
+
+class SamplingProfilerTests(TestCase):
+    def test_disabled_wrapper_is_a_no_op(self):
+        from logistics_app import profiling
+        app = object()
+        self.assertIs(profiling.wrap_wsgi(app), app)
+
+    def test_profiles_matching_view_and_serves_stacks(self):
+        import tempfile
+        import time as _time
+        from django.test import override_settings
+        from logistics_app import profiling
+
+        def busy_app(environ, start_response):
+            deadline = _time.perf_counter() + 0.05
+            while _time.perf_counter() < deadline:
+                pass
+            start_response('200 OK', [])
+            return [b'ok']
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            PROFILER_ENABLED=True, PROFILER_URL_NAMES=['track_shipment'],
+            PROFILER_SAMPLE_RATE=0, PROFILER_INTERVAL=0.001, PROFILER_OUTPUT_DIR=tmp,
+        ):
+            profiling.reset()
+            app = profiling.wrap_wsgi(busy_app)
+            app({'PATH_INFO': '/track/'}, lambda *a: None)
+            app({'PATH_INFO': '/dashboard/'}, lambda *a: None)
+            stacks = profiling.snapshot()
+            self.assertEqual(list(stacks), ['track_shipment'])
+            self.assertTrue(any('busy_app' in s for s in stacks['track_shipment']))
+
+            staff = User.objects.create_user(username='staff', password='ComplexPass123!', is_staff=True)
+            self.client.force_login(staff)
+            response = self.client.get(reverse('profiler_stacks'), {'view': 'track_shipment'})
+            self.assertIn('busy_app', response.content.decode())
+            profiling.reset()
+
+class MetricsTests(TestCase):
+    def tearDown(self):
+        from logistics_app import metrics
+        metrics.reset_store()
+
+    def test_mmap_store_aggregates_across_processes(self):
+        import multiprocessing
+        import tempfile
+        from django.test import override_settings
+        from logistics_app import metrics
+
+        def worker():
+            metrics.CACHE_REQUESTS.inc(2, cache='tracking', result='hit')
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(METRICS_DIR=tmp):
+            metrics.reset_store()
+            metrics.CACHE_REQUESTS.inc(cache='tracking', result='hit')
+            metrics.REQUEST_LATENCY.observe(0.02, view='dashboard', method='GET')
+            # a forked worker reopens its own file on first write
+            child = multiprocessing.get_context('fork').Process(target=worker)
+            child.start()
+            child.join()
+            self.assertEqual(len(list(metrics.get_store().directory.glob('metrics_*.db'))), 2)
+            text = metrics.render()
+        self.assertIn('cache_requests_total{cache="tracking",result="hit"} 3', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="dashboard",method="GET",le="0.025"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="dashboard",method="GET",le="0.01"} 0', text)
+        self.assertIn('http_request_duration_seconds_count{view="dashboard",method="GET"} 1', text)
+
+    def test_metrics_endpoint_records_requests_and_domain_events(self):
+        from logistics_app import metrics
+        metrics.reset_store()
+        s = Shipment.objects.create(origin='A', destination='B')
+        s.status = 'IN_TRANSIT'
+        s.save()
+        self.client.get(reverse('track_shipment'))
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('logistics_created_total{kind="shipment"} 1', text)
+        self.assertIn('logistics_status_transitions_total{kind="shipment",from_status="PENDING",to_status="IN_TRANSIT"} 1', text)
+        self.assertIn('http_requests_total{view="track_shipment",method="GET",status="200"} 1', text)
+
+
+class FixtureDataAndBenchmarkTests(TestCase):
+    def test_generate_fixture_data_keeps_historical_dates(self):
+        from django.core.management import call_command
+        from io import StringIO
+        from logistics_app.models import DailyStatusCount, Delivery, Order, Payment
+        call_command('generate_fixture_data', shipments=300, orders=50, users=40, items=20,
+                     events=5, warehouses=2, batch_size=100, stdout=StringIO())
+        self.assertEqual(Shipment.objects.count(), 300)
+        self.assertEqual(Order.objects.count(), 50)
+        self.assertEqual(Payment.objects.count(), 50)
+        self.assertEqual(Delivery.objects.count(), Shipment.objects.exclude(status='PENDING').count())
+        oldest = Shipment.objects.order_by('date_created').first().date_created
+        self.assertLess(oldest, timezone.now() - timedelta(days=1))
+        self.assertEqual(sum(DailyStatusCount.objects.filter(kind='shipment').values_list('count', flat=True)), 300)
+        # auto_now_add is restored once the command finishes
+        self.assertTrue(Shipment._meta.get_field('date_created').auto_now_add)
+        # warehouse counters cover the bulk-created inventory
+        from logistics_app import utilisation
+        from logistics_app.models import Warehouse
+        self.assertTrue(all(Warehouse.objects.values_list('sku_count', flat=True)))
+        self.assertEqual(utilisation.reconcile(), 0)
+
+    def test_generate_fixture_data_can_run_again(self):
+        from django.core.management import call_command
+        from io import StringIO
+        from logistics_app.models import Order
+        for _ in range(2):
+            call_command('generate_fixture_data', shipments=50, orders=20, users=10, items=5,
+                         events=2, warehouses=1, batch_size=100, stdout=StringIO())
+        self.assertEqual((Shipment.objects.count(), Order.objects.count()), (100, 40))
+
+    def test_percentiles_and_compare(self):
+        from logistics_app import benchmarking
+        stats = benchmarking.percentiles([float(i) for i in range(1, 101)])
+        self.assertAlmostEqual(stats['p50'], 50.5)
+        self.assertAlmostEqual(stats['p99'], 99.01)
+        old = {'endpoints': {'dashboard': {'latency_ms': {'p95': 10.0}}}}
+        new = {'endpoints': {'dashboard': {'latency_ms': {'p95': 15.0}}, 'extra': {'latency_ms': {'p95': 1.0}}}}
+        self.assertEqual(benchmarking.compare(old, new), [('dashboard', 10.0, 15.0, 1.5)])
+
+
+class LoadHarnessTests(TestCase):
+    def run_worker(self, mix, restock):
+        import threading
+        from django.core.signals import request_finished, request_started
+        from django.db import close_old_connections
+        from logistics_app.management.commands.load_test import Command, Worker
+        # as django.test.Client does: the real handler would close the
+        # connection holding this test's transaction
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        plan = Command().plan({
+            'seed': 1, 'mix': mix, 'verbosity': 2,
+            'application': 'sports_logistics.wsgi.application',
+            'duration': 0.3, 'retries': 1, 'backoff': 0.0, 'restock': restock,
+        })
+        worker = Worker(0, plan)
+        worker.setup()
+        self.addCleanup(worker.teardown)
+        start = threading.Event()
+        start.set()
+        return worker.run(start, 0.3, 1, 0.0)
+
+    def test_worker_drives_wsgi_application(self):
+        from logistics_app.models import Item, Order
+        Shipment.objects.create(origin='A', destination='B')
+        Item.objects.create(name='Ball', category='Gear', quantity_in_stock=0)   # restocked by plan()
+        samples, counts = self.run_worker('track=1,create_shipment=1,update_shipment=1,create_order=1', restock=True)
+        self.assertTrue(all(c['failed'] == 0 and c['locked'] == 0 for c in counts.values()))
+        self.assertEqual(Shipment.objects.count(), 1 + counts['create_shipment']['ok'])
+        self.assertEqual(Order.objects.count(), counts['create_order']['ok'])
+        self.assertGreater(sum(len(v) for v in samples.values()), 0)
+
+    def test_stock_is_left_alone_and_sold_out_orders_counted_apart(self):
+        from logistics_app.models import Item
+        ball = Item.objects.create(name='Ball', category='Gear', quantity_in_stock=2)
+        _, counts = self.run_worker('create_order=1', restock=False)
+        self.assertEqual(counts['create_order']['ok'], 2)
+        self.assertGreater(counts['create_order']['sold_out'], 0)
+        self.assertEqual(counts['create_order']['failed'], 0)
+        ball.refresh_from_db()
+        self.assertEqual(ball.quantity_in_stock, 0)
+
+    def test_parse_mix_rejects_unknown_operations(self):
+        from django.core.management.base import CommandError
+        from logistics_app.management.commands.load_test import parse_mix
+        self.assertEqual(parse_mix('track=3,create_order'), {'track': 3.0, 'create_order': 1.0})
+        with self.assertRaises(CommandError):
+            parse_mix('track=1,drop_tables=1')
+
+
+class SQLiteTuningTests(TestCase):
+    def test_pragmas_applied_to_new_connections(self):
+        from django.db import connection
+        from logistics_app import sqlite
+        values = sqlite.current_settings(connection)
+        self.assertEqual(values['synchronous'], 1)      # NORMAL
+        self.assertEqual(values['temp_store'], 2)       # MEMORY
+        self.assertEqual(values['busy_timeout'], 5000)
+        self.assertEqual(values['cache_size'], -64000)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        from django.core.management import call_command
+        from io import StringIO
+        Shipment.objects.create(origin='A', destination='B')
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertNotIn('FAIL', out.getvalue())
+
+    def test_full_scan_is_reported(self):
+        from django.test.utils import CaptureQueriesContext
+        from django.db import connection
+        from logistics_app import queryplans
+        with CaptureQueriesContext(connection) as ctx:
+            list(Shipment.objects.filter(origin='Dublin Port').order_by('destination'))
+        found = queryplans.problems(queryplans.explain(ctx.captured_queries[0]['sql']))
+        self.assertTrue(any(line.startswith('SCAN logistics_app_shipment') for line in found))
+        self.assertTrue(any('TEMP B-TREE' in line for line in found))
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from django.test import AsyncRequestFactory
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.client = Client()
+        self.user = User.objects.create_user(username='async', password='ComplexPass123!')
+        self.client.login(username='async', password='ComplexPass123!')
+        self.shipments = [Shipment.objects.create(origin=f'O{i}', destination='D') for i in range(3)]
+
+    def get(self, path, data=None, **headers):
+        request = self.factory.get(path, data, headers={'accept': 'application/json', **headers})
+        user = self.user
+
+        async def auser():
+            return user
+        request.user, request.auser = user, auser
+        return request
+
+    async def test_track_shipment(self):
+        from logistics_app import async_views
+        code = self.shipments[0].tracking_number
+        response = await async_views.track_shipment(self.get('/track/', {'tracking_number': code.lower()}))
+        self.assertContains(response, code)
+        response = await async_views.track_shipment(self.get('/track/', {'tracking_number': 'SL'}))
+        self.assertContains(response, self.shipments[2].tracking_number)
+
+    async def test_analytics_etag(self):
+        from logistics_app import async_views
+        first = await async_views.analytics_data(self.get('/analytics/data/'))
+        self.assertEqual(first.status_code, 200)
+        again = await async_views.analytics_data(self.get('/analytics/data/', if_none_match=first['ETag']))
+        self.assertEqual(again.status_code, 304)
+
+    def test_api_matches_sync_viewset(self):
+        import json
+        from asgiref.sync import async_to_sync
+        from logistics_app import async_views
+        from logistics_app.views import ShipmentViewSet
+        list_view = async_to_sync(async_views.api_view(ShipmentViewSet))
+        detail_view = async_to_sync(async_views.api_view(ShipmentViewSet, detail=True))
+
+        def list_view(request, view=list_view):
+            # the fallback returns DRF's Response, which the handler would render
+            response = view(request)
+            return response.render() if hasattr(response, 'render') else response
+
+        url = reverse('shipment-list')
+        for params in ({'page_size': 2}, {'fields': 'id,status'}, {'search': 'O1'}):
+            response = list_view(self.get(url, params))
+            self.assertEqual(json.loads(response.content), self.client.get(url, params).json())
+
+        pk = self.shipments[1].pk
+        url = reverse('shipment-detail', args=[pk])
+        response = detail_view(self.get(url), pk=pk)
+        self.assertEqual(json.loads(response.content), self.client.get(url).json())
+        self.assertEqual(detail_view(self.get(url), pk=0).status_code, 404)
+
+
+class LiveFeedTests(TestCase):
+    def setUp(self):
+        from logistics_app import live
+        live.reset()
+        self.addCleanup(live.reset)
+        self.shipment = Shipment.objects.create(origin='A', destination='B')
+
+    async def read(self, sub, n):
+        import asyncio
+        import json
+        frames = [await asyncio.wait_for(sub.queue.get(), 1) for _ in range(n)]
+        return [(f.split(b'\n')[0][7:].decode(), json.loads(f.split(b'\n')[1][6:])) for f in frames]
+
+    def save_status(self, status):
+        self.shipment.status = status
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shipment.save()
+
+    async def test_status_change_reaches_every_stream(self):
+        from asgiref.sync import sync_to_async
+        from logistics_app import live
+        broadcaster = live.get_broadcaster()
+        subs = [broadcaster.subscribe() for _ in range(20)]
+
+        await sync_to_async(self.save_status)('IN_TRANSIT')
+        for sub in subs:
+            (_, moved), (_, counters) = await self.read(sub, 2)
+            self.assertEqual((moved['from'], moved['to']), ('PENDING', 'IN_TRANSIT'))
+            self.assertEqual(counters['shipments']['IN_TRANSIT'], 1)
+
+        # late joiners get the latest counters without a query
+        late = broadcaster.subscribe()
+        self.assertEqual((await self.read(late, 1))[0][0], 'counters')
+        for sub in subs + [late]:
+            broadcaster.unsubscribe(sub)
+        self.assertEqual(len(broadcaster), 0)
+
+    def test_publish_cost_does_not_depend_on_listeners(self):
+        from logistics_app import live
+        with self.assertNumQueries(1):   # the counters read
+            live.publish([live.transition(self.shipment, 'PENDING')])
+
+    def test_channel_errors_do_not_fail_the_committed_write(self):
+        from unittest import mock
+        from django.db import OperationalError
+        from logistics_app import live
+        with mock.patch.object(live.get_channel(), 'publish', side_effect=OperationalError('database is locked')):
+            with self.assertLogs(level='ERROR'):
+                self.save_status('IN_TRANSIT')
+        self.assertEqual(Shipment.objects.get().status, 'IN_TRANSIT')
+
+    def test_cross_process_channels(self):
+        import tempfile
+        import threading
+        from pathlib import Path
+        from logistics_app import live
+        tmp = Path(tempfile.mkdtemp())
+        for channel in (
+            live.UnixSocketChannel(tmp / 'sockets'),
+            live.SQLitePollChannel(tmp / 'live.sqlite3', interval=0.01),
+        ):
+            received, done = [], threading.Event()
+            channel.listen(lambda event, data: (received.append((event, data)), done.set()))
+            channel.publish('counters', {'orders': {'total': 3}})
+            self.assertTrue(done.wait(2), channel)
+            self.assertEqual(received, [('counters', {'orders': {'total': 3}})])
+
+    def test_wsgi_endpoint_tells_eventsource_to_stop(self):
+        User.objects.create_user(username='watcher', password='ComplexPass123!')
+        self.client.login(username='watcher', password='ComplexPass123!')
+        self.assertEqual(self.client.get(reverse('live_feed')).status_code, 204)
+
+    async def test_async_stream_starts_with_current_counters(self):
+        import asyncio
+        from django.contrib.auth.models import AnonymousUser
+        from django.test import AsyncRequestFactory
+        from logistics_app import async_views, live
+        live.get_broadcaster().deliver('counters', {'orders': {'total': 0}})
+        request = AsyncRequestFactory().get(reverse('live_feed'))
+
+        async def auser():
+            return AnonymousUser()
+        request.auser = auser
+        self.assertEqual((await async_views.live_feed(request)).status_code, 302)
+
+        user = await User.objects.acreate(username='watcher')
+
+        async def auser():
+            return user
+        request.auser = auser
+        response = await async_views.live_feed(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+        self.assertTrue((await anext(chunks)).startswith(b'event: counters\n'))
+        # the ASGI handler cancels the response when the client disconnects
+        waiting = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(len(live.get_broadcaster()), 0)
+
+
+@override_settings(CHANGES_SETTLE_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='partner', password='ComplexPass123!')
+        self.client.login(username='partner', password='ComplexPass123!')
+        self.shipments = [Shipment.objects.create(origin=f'O{i}', destination='D') for i in range(3)]
+        self.url = reverse('shipment-changes')
+
+    def poll(self, cursor=None, **params):
+        if cursor:
+            params['since'] = cursor
+        return self.client.get(self.url, params).json()
+
+    def test_walk_then_only_new_changes(self):
+        first = self.poll(page_size=2)
+        self.assertEqual([s['id'] for s in first['results']], [s.pk for s in self.shipments[:2]])
+        self.assertTrue(first['has_more'])
+        second = self.poll(first['cursor'], page_size=2)
+        self.assertEqual([s['id'] for s in second['results']], [self.shipments[2].pk])
+        self.assertFalse(second['has_more'])
+        self.assertEqual(self.poll(second['cursor'])['cursor'], second['cursor'])
+
+        self.shipments[0].status = 'IN_TRANSIT'
+        self.shipments[0].save()
+        deleted_id = self.shipments[1].pk
+        self.shipments[1].delete()
+        self.client.patch(reverse('shipment-bulk'), [{'id': self.shipments[2].pk, 'status': 'DELIVERED'}],
+                          content_type='application/json')
+        with self.assertNumQueries(2 + 2):   # session + user, changed rows + tombstones
+            third = self.poll(second['cursor'])
+        self.assertEqual([(s['id'], s['status']) for s in third['results']],
+                         [(self.shipments[0].pk, 'IN_TRANSIT'), (self.shipments[2].pk, 'DELIVERED')])
+        self.assertEqual(third['deleted'], [deleted_id])
+
+    def test_recent_changes_wait_for_the_settle_window(self):
+        with override_settings(CHANGES_SETTLE_SECONDS=60):
+            self.assertEqual(self.poll()['results'], [])
+
+    def test_bad_and_expired_cursors(self):
+        from logistics_app import changes
+        from logistics_app.models import Tombstone
+        self.assertEqual(self.client.get(self.url, {'since': 'junk'}).status_code, 400)
+        days_ago = lambda n: changes.encode_cursor((timezone.now() - timedelta(days=n), changes.ROW, 0))
+        self.assertEqual(self.client.get(self.url, {'since': days_ago(365)}).status_code, 200)
+
+        Tombstone.objects.create(model='shipment', object_id=99, deleted_at=timezone.now() - timedelta(days=40))
+        self.assertEqual(changes.prune_tombstones(), 1)
+        # the pruned delete happened after the first cursor, before the second
+        self.assertEqual(self.client.get(self.url, {'since': days_ago(365)}).status_code, 410)
+        self.assertEqual(self.client.get(self.url, {'since': days_ago(35)}).status_code, 200)
+        self.assertEqual(self.client.get(reverse('order-changes'), {'since': days_ago(365)}).status_code, 200)
+
+    def test_synced_cursor_of_a_quiet_table_stays_valid(self):
+        from logistics_app import changes
+        from logistics_app.models import Event
+        event = Event.objects.create(name='Final', date=timezone.now(), location='Croke Park')
+        Event.objects.filter(pk=event.pk).update(updated_at=timezone.now() - timedelta(days=40))
+        synced = self.client.get(reverse('event-changes')).json()
+        self.assertEqual([e['id'] for e in synced['results']], [event.pk])
+        changes.prune_tombstones()              # nothing to prune
+        response = self.client.get(reverse('event-changes'), {'since': synced['cursor']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['cursor'], synced['cursor'])
+
+    def test_order_item_changes_touch_the_order(self):
+        from logistics_app.models import Item, Order
+        order = Order.objects.create(order_number='C1', customer=User.objects.get(username='partner'))
+        cursor = self.client.get(reverse('order-changes')).json()['cursor']
+        ball = Item.objects.create(name='Ball', category='Gear')
+        order.items.add(ball)
+        data = self.client.get(reverse('order-changes'), {'since': cursor}).json()
+        self.assertEqual([o['id'] for o in data['results']], [order.pk])
+
+        Order.objects.filter(pk=order.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        cursor = self.client.get(reverse('order-changes')).json()['cursor']
+        # the feed's own receiver, without the total recompute (which touches the orders too)
+        from django.db.models.signals import m2m_changed
+        from logistics_app import totals
+        m2m_changed.disconnect(totals.update_on_items_change, sender=Order.items.through)
+        self.addCleanup(m2m_changed.connect, totals.update_on_items_change, sender=Order.items.through)
+        ball.orders.clear()
+        data = self.client.get(reverse('order-changes'), {'since': cursor}).json()
+        self.assertEqual([(o['id'], o['items']) for o in data['results']], [(order.pk, [])])
+
+
+class RoleCacheTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='manager', password='ComplexPass123!')
+        self.user.profile.role = 'warehouse_manager'
+        self.user.profile.save()
+        Shipment.objects.create(origin='A', destination='B')
+
+    def profile_queries(self, ctx):
+        return [q['sql'] for q in ctx.captured_queries if 'logistics_app_userprofile' in q['sql']]
+
+    def test_login_does_not_touch_the_profile(self):
+        from django.test.utils import CaptureQueriesContext
+        from django.db import connection
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse('login'), {'username': 'manager', 'password': 'ComplexPass123!'})
+        self.assertEqual(self.profile_queries(ctx), [])
+
+    def test_role_loads_with_the_user_and_changes_apply_at_once(self):
+        from django.test.utils import CaptureQueriesContext
+        from django.db import connection
+        from logistics_app.models import UserProfile
+        self.client.login(username='manager', password='ComplexPass123!')
+        edit = reverse('shipment_update', args=[Shipment.objects.get().pk])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertContains(self.client.get(reverse('shipment_list')), edit)
+        # one query for the user, joined with its profile
+        self.assertEqual(len(self.profile_queries(ctx)), 1)
+        self.assertIn('auth_user', self.profile_queries(ctx)[0])
+
+        # e.g. demoted from another worker process
+        UserProfile.objects.filter(user=self.user).update(role='customer')
+        self.assertNotContains(self.client.get(reverse('shipment_list')), edit)
+        self.assertEqual(self.client.get(reverse('shipment_create')).status_code, 302)
+
+    def test_user_save_writes_profile_only_when_changed(self):
+        from logistics_app.models import UserProfile
+        user = User.objects.get(pk=self.user.pk)
+        user.profile.role = 'delivery_person'
+        user.save()
+        self.assertEqual(UserProfile.objects.get(user=user).role, 'delivery_person')
+        with self.assertNumQueries(1):
+            user.save()
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.manager = User.objects.create_user(username='manager', password='ComplexPass123!')
+        self.manager.profile.role = 'warehouse_manager'
+        self.manager.profile.save()
+        for name, role in (('kara', 'delivery_person'), ('karl', 'customer'), ('kate', 'delivery_person')):
+            user = User.objects.create_user(username=name)
+            user.profile.role = role
+            user.profile.save()
+        self.client.login(username='manager', password='ComplexPass123!')
+
+    def field_id(self, response, name):
+        import re
+        html = response.content.decode()
+        tag = re.search(r'<select[^>]*name="%s"[^>]*>' % name, html).group(0)
+        return re.search(r'data-field_id="([^"]+)"', tag).group(1)
+
+    def search(self, field_id, term, **params):
+        response = self.client.get(reverse('autocomplete'), {'field_id': field_id, 'term': term, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_form_renders_no_unselected_choices(self):
+        response = self.client.get(reverse('shipment_create'))
+        self.assertContains(response, 'django-select2-heavy')
+        self.assertNotContains(response, 'kara')
+        self.assertNotContains(response, 'karl')
+
+    def test_delivery_people_limited_by_role(self):
+        field_id = self.field_id(self.client.get(reverse('shipment_create')), 'delivery_person')
+        data = self.search(field_id, 'KA')
+        self.assertEqual([r['text'] for r in data['results']], ['kara', 'kate'])
+        self.assertFalse(data['more'])
+        self.assertEqual(self.search(field_id, 'kat')['results'][0]['text'], 'kate')
+
+        from logistics_app.forms import ShipmentForm
+        karl = User.objects.get(username='karl')
+        form = ShipmentForm({'status': 'PENDING', 'origin': 'A', 'destination': 'B', 'delivery_person': karl.pk})
+        self.assertIn('delivery_person', form.errors)
+
+    def test_results_are_paged_and_cached_until_a_change(self):
+        from logistics_app.models import Item
+        for i in range(25):
+            Item.objects.create(name=f'Ball {i:02}', category='Gear')
+        self.client.force_login(User.objects.create_superuser(username='root'))
+        field_id = self.field_id(self.client.get(reverse('order_create')), 'items')
+        first = self.search(field_id, 'ball')
+        self.assertEqual(len(first['results']), 20)
+        self.assertTrue(first['more'])
+        self.assertEqual(len(self.search(field_id, 'ball', page=2)['results']), 5)
+
+        with self.assertNumQueries(2):          # session and user only
+            self.assertEqual(self.search(field_id, 'ball'), first)
+        Item.objects.create(name='Ball 00a', category='Gear')
+        self.assertIn('Ball 00a', [r['text'] for r in self.search(field_id, 'ball')['results']])
+
+    def test_other_processes_see_widgets_and_invalidations(self):
+        from django.core.cache import cache, caches
+        from logistics_app import autocomplete
+        from logistics_app.models import Event
+        self.client.force_login(User.objects.create_superuser(username='root'))
+        field_id = self.field_id(self.client.get(reverse('shipment_create')), 'event')
+        before = autocomplete.generation(Event)
+        cache.clear()                           # as in a worker that didn't render the form
+        self.assertEqual(self.search(field_id, 'e'), {'results': [], 'more': False})
+        Event.objects.create(name='Expo', date=timezone.now(), location='Cork')
+        self.assertNotEqual(caches['shared'].get('autocomplete:gen:logistics_app.event'), before)
+
+    def test_requires_login(self):
+        field_id = self.field_id(self.client.get(reverse('shipment_create')), 'event')
+        self.client.logout()
+        response = self.client.get(reverse('autocomplete'), {'field_id': field_id, 'term': 'a'})
+        self.assertEqual(response.status_code, 302)
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        from logistics_app.models import Item
+        self.client = Client()
+        self.admin = User.objects.create_superuser(username='root', password='ComplexPass123!')
+        self.client.login(username='root', password='ComplexPass123!')
+        self.ball = Item.objects.create(name='Ball', category='Gear', quantity_in_stock=2)
+        self.net  = Item.objects.create(name='Net', category='Gear', quantity_in_stock=1)
+
+    def stock(self):
+        self.ball.refresh_from_db()
+        self.net.refresh_from_db()
+        return self.ball.quantity_in_stock, self.net.quantity_in_stock
+
+    def test_order_reserves_all_items_or_none(self):
+        from logistics_app.models import Order
+        url = reverse('order-list')
+        data = {'order_number': 'A1', 'customer': self.admin.pk, 'items': [self.ball.pk, self.net.pk]}
+        self.assertEqual(self.client.post(url, data, content_type='application/json').status_code, 201)
+        self.assertEqual(self.stock(), (1, 0))
+
+        data['order_number'] = 'A2'
+        response = self.client.post(url, data, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['shortages'],
+                         [{'item': self.net.pk, 'name': 'Net', 'requested': 1, 'available': 0}])
+        self.assertEqual(self.stock(), (1, 0))
+        self.assertFalse(Order.objects.filter(order_number='A2').exists())
+
+        order = Order.objects.get(order_number='A1')
+        self.client.patch(reverse('order-detail', args=[order.pk]), {'items': [self.ball.pk]},
+                          content_type='application/json')
+        self.assertEqual(self.stock(), (1, 1))
+        self.client.delete(reverse('order-detail', args=[order.pk]))
+        self.assertEqual(self.stock(), (2, 1))
+
+    def test_order_form_reports_shortage(self):
+        from django.contrib.messages import get_messages
+        from logistics_app.models import Order
+        data = {'order_number': 'F1', 'status': 'PENDING', 'customer': self.admin.pk,
+                'items': [self.net.pk]}
+        response = self.client.post(reverse('order_create'), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)], ["Order created successfully!"])
+        data['order_number'] = 'F2'
+        response = self.client.post(reverse('order_create'), data)
+        self.assertContains(response, 'Not enough stock: Net (1 requested, 0 left)')
+        # still only the first order's message
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)], ["Order created successfully!"])
+        self.assertEqual(list(Order.objects.values_list('order_number', flat=True)), ['F1'])
+
+    def test_bulk_reservation(self):
+        url = reverse('order-reserve')
+        response = self.client.post(url, [{'item': self.ball.pk, 'quantity': 2}, {'item': self.net.pk}],
+                                    content_type='application/json')
+        self.assertEqual(response.json(), [{'item': self.ball.pk, 'quantity': 2, 'remaining': 0},
+                                           {'item': self.net.pk, 'quantity': 1, 'remaining': 0}])
+        response = self.client.post(url, [{'item': self.ball.pk}, {'item': 999}], content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([s['item'] for s in response.json()['shortages']], [self.ball.pk, 999])
+        response = self.client.post(url, [{'item': self.ball.pk, 'quantity': 0}], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class StockReservationConcurrencyTests(TransactionTestCase):
+    def test_parallel_reservations_never_oversell(self):
+        import threading
+        from django.db import connection
+        from logistics_app import inventory
+        from logistics_app.models import Item
+        scarce = Item.objects.create(name='Ball', category='Gear', quantity_in_stock=25)
+        plenty = Item.objects.create(name='Cone', category='Gear', quantity_in_stock=1000)
+        outcomes, start = [], threading.Barrier(8)
+
+        def place_orders():
+            start.wait()
+            try:
+                for _ in range(10):
+                    try:
+                        inventory.reserve(inventory.units([scarce.pk, plenty.pk]))
+                        outcomes.append(True)
+                    except inventory.InsufficientStock:
+                        outcomes.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=place_orders) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        scarce.refresh_from_db()
+        plenty.refresh_from_db()
+        self.assertEqual(len(outcomes), 80)
+        self.assertEqual(outcomes.count(True), 25)
+        self.assertEqual(scarce.quantity_in_stock, 0)
+        # the failed orders didn't keep their unit of the plentiful item
+        self.assertEqual(plenty.quantity_in_stock, 1000 - 25)
+
+
+class WarehouseUtilisationTests(TestCase):
+    def setUp(self):
+        from logistics_app.models import Item, Warehouse
+        self.ball = Item.objects.create(name='Ball', category='Gear', quantity_in_stock=30)
+        self.net  = Item.objects.create(name='Net', category='Gear', quantity_in_stock=10)
+        self.depot = Warehouse.objects.create(name='Depot', location='Dublin', capacity=50)
+
+    def counters(self, warehouse=None):
+        from logistics_app.models import Warehouse
+        w = Warehouse.objects.get(pk=(warehouse or self.depot).pk)
+        return w.sku_count, w.units_on_hand, w.utilisation
+
+    def test_counters_follow_inventory_and_stock(self):
+        from logistics_app import inventory
+        from logistics_app.models import Warehouse
+        self.depot.inventory.add(self.ball, self.net)
+        self.assertEqual(self.counters(), (2, 40, 80.0))
+        self.depot.inventory.add(self.ball)                 # already stocked
+        self.net.warehouses.remove(self.depot)
+        self.depot.inventory.remove(self.net)               # no longer stocked
+        self.assertEqual(self.counters(), (1, 30, 60.0))
+
+        self.ball.quantity_in_stock = 55
+        self.ball.save()
+        self.assertEqual(self.counters(), (1, 55, 110.0))
+        inventory.reserve({self.ball.pk: 5})
+        self.assertEqual(self.counters(), (1, 50, 100.0))
+
+        # a full save of a stale copy keeps the counters; capacity feeds utilisation
+        stale = Warehouse.objects.get(pk=self.depot.pk)
+        self.net.warehouses.add(stale)
+        stale.capacity = 120
+        stale.save()
+        self.assertEqual(self.counters(), (2, 60, 50.0))
+
+        self.ball.delete()
+        self.assertEqual(self.counters(), (1, 10, 10.0 * 100 / 120))
+        self.depot.inventory.clear()
+        self.assertEqual(self.counters(), (0, 0, 0.0))
+
+    def test_reconcile_fixes_drift(self):
+        from django.core.management import call_command
+        from io import StringIO
+        from logistics_app.models import Item, Warehouse
+        self.depot.inventory.add(self.ball)
+        Item.objects.filter(pk=self.ball.pk).update(quantity_in_stock=45)      # bypasses the counters
+        Warehouse.objects.create(name='Empty', location='Cork', capacity=10)
+        out = StringIO()
+        call_command('reconcile_warehouses', stdout=out)
+        self.assertIn('1 corrected', out.getvalue())
+        self.assertEqual(self.counters(), (1, 45, 90.0))
+
+    def test_list_sorts_and_filters_without_per_row_queries(self):
+        from logistics_app.models import Warehouse
+        admin = User.objects.create_superuser(username='root', password='ComplexPass123!')
+        self.client.force_login(admin)
+        self.depot.inventory.add(self.ball, self.net)                     # 80%
+        for name, capacity in (('Annex', 20), ('Hub', 400)):              # 200%, 10%
+            Warehouse.objects.create(name=name, location='X', capacity=capacity, manager=admin).inventory.add(self.ball, self.net)
+
+        def names(**params):
+            response = self.client.get(reverse('warehouse_list'), params)
+            return [w.name for w in response.context['warehouses']]
+
+        self.assertEqual(names(), ['Annex', 'Depot', 'Hub'])
+        self.assertEqual(names(sort='emptiest'), ['Hub', 'Depot', 'Annex'])
+        self.assertEqual(names(sort='name', fullness='busy'), ['Depot'])
+        self.assertEqual(names(fullness='over'), ['Annex'])
+        self.assertContains(self.client.get(reverse('warehouse_list')), '200%')
+
+        with self.assertNumQueries(3):          # session, user, warehouses
+            self.client.get(reverse('warehouse_list'))
+        for i in range(5):
+            Warehouse.objects.create(name=f'W{i}', location='X', capacity=10, manager=admin).inventory.add(self.ball)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('warehouse_list'))
+
+
+class OrderTotalTests(TestCase):
+    def setUp(self):
+        from logistics_app.models import Item, Order
+        self.ball = Item.objects.create(name='Ball', category='Gear', price='12.50', quantity_in_stock=5)
+        self.net  = Item.objects.create(name='Net', category='Gear', price='40.00', quantity_in_stock=5)
+        self.free = Item.objects.create(name='Flyer', category='Print', quantity_in_stock=5)
+        self.customer = User.objects.create_user(username='buyer', password='ComplexPass123!')
+        self.order = Order.objects.create(order_number='T1', customer=self.customer)
+
+    def total(self, order=None):
+        from logistics_app.models import Order
+        return Order.objects.get(pk=(order or self.order).pk).total_price
+
+    def test_total_follows_items_and_prices(self):
+        from decimal import Decimal
+        from logistics_app.models import Order
+        self.order.items.add(self.ball, self.net, self.free)
+        self.assertEqual(self.order.total_price, Decimal('52.50'))        # refreshed in place
+        self.assertEqual(self.total(), Decimal('52.50'))
+        self.ball.orders.remove(self.order)
+        self.assertEqual(self.total(), Decimal('40.00'))
+
+        other = Order.objects.create(order_number='T2', customer=self.customer)
+        self.net.orders.add(other)
+        self.net.price = '45.25'
+        self.net.save()
+        self.assertEqual((self.total(), self.total(other)), (Decimal('45.25'), Decimal('45.25')))
+
+        # a full save of a stale copy keeps the total
+        stale = Order.objects.get(pk=self.order.pk)
+        self.order.items.add(self.ball)
+        stale.status = 'SHIPPED'
+        stale.save()
+        self.assertEqual(self.total(), Decimal('57.75'))
+
+        self.net.delete()
+        self.assertEqual((self.total(), self.total(other)), (Decimal('12.50'), Decimal('0.00')))
+        self.ball.orders.clear()
+        self.assertEqual(self.total(), Decimal('0.00'))
+
+    def test_total_is_read_only_through_form_and_api(self):
+        from decimal import Decimal
+        from logistics_app.models import Order
+        admin = User.objects.create_superuser(username='root', password='ComplexPass123!')
+        self.client.force_login(admin)
+        data = {'order_number': 'F1', 'status': 'PENDING', 'customer': self.customer.pk,
+                'items': [self.ball.pk, self.net.pk], 'total_price': '1.00'}
+        self.assertEqual(self.client.post(reverse('order_create'), data).status_code, 302)
+        self.assertEqual(Order.objects.get(order_number='F1').total_price, Decimal('52.50'))
+
+        data['order_number'] = 'A1'
+        response = self.client.post(reverse('order-list'), data, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['total_price'], '52.50')
+
+    def test_recompute_command_fixes_drift_in_chunks(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from logistics_app.models import Order
+        orders = [self.order] + [Order.objects.create(order_number=f'T{i}', customer=self.customer)
+                                 for i in range(2, 6)]
+        for order in orders:
+            order.items.add(self.ball)
+        Order.items.through.objects.bulk_create(                          # bypasses the signals
+            [Order.items.through(order_id=o.pk, item_id=self.net.pk) for o in orders[:3]])
+        out = StringIO()
+        call_command('recompute_order_totals', chunk_size=2, stdout=out)
+        self.assertIn('3 corrected', out.getvalue())
+        self.assertEqual([str(self.total(o)) for o in orders], ['52.50'] * 3 + ['12.50'] * 2)
@@ -0,0 +1,121 @@
+"""
+Server-computed order totals.
+
+``Order.total_price`` is the sum of its items' prices (an item without a
+price counts as 0).  It is stored rather than typed in, so revenue reports
+are a plain SUM over ``order`` -- covered by ``order_revenue_idx`` for
+date ranges -- instead of joining and summing the items of every order.
+
+Each recompute is one UPDATE with a correlated SUM over the order's items,
+so concurrent changes to the same order can't leave a stale total behind:
+
+  - ``m2m_changed`` on Order.items (either side) recomputes the orders
+    whose items changed;
+  - an Item save that changes ``price`` recomputes every order containing
+    it, and an Item delete (whose order rows go by cascade, without
+    m2m_changed) recomputes them without it.
+
+The UPDATEs also set ``updated_at``, so the order change feed picks the new
+totals up.  ``bulk_create()`` of order items bypasses signals; run
+``manage.py recompute_order_totals`` afterwards, which works through the
+orders in primary-key chunks and fixes any that drifted.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DEFERRED, DecimalField, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+from django.db.models.signals import m2m_changed, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Item, Order
+
+Line = Order.items.through
+
+CHUNK_SIZE = 10_000
+
+
+def _total(lines):
+    """Correlated subquery: summed item price of ``lines`` for the outer order."""
+    output = Order._meta.get_field('total_price')
+    rows = lines.filter(order=OuterRef('pk')).values('order')
+    return Coalesce(
+        Subquery(rows.annotate(total=Round(Sum('item__price'), 2)).values('total')),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=output.max_digits, decimal_places=output.decimal_places),
+    )
+
+
+def recompute(orders, lines=None):
+    """
+    Recompute the totals of ``orders`` (a queryset) from ``lines`` (default:
+    all order items) in one UPDATE.  Returns the number of orders updated.
+    """
+    lines = Line.objects.all() if lines is None else lines
+    return orders.update(total_price=_total(lines), updated_at=timezone.now())
+
+
+def _containing(item_pk):
+    return Order.objects.filter(pk__in=Line.objects.filter(item=item_pk).values('order'))
+
+
+# ——————————————————————————————————————————————————————
+# Signal receivers
+# ——————————————————————————————————————————————————————
+@receiver(m2m_changed, sender=Line)
+def update_on_items_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            recompute(Order.objects.filter(pk=instance.pk))
+            # the caller (a form, a serializer) may go on to show or save it
+            instance.refresh_from_db(fields=['total_price', 'updated_at'])
+    elif action in ('post_add', 'post_remove'):
+        recompute(Order.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        # afterwards there'd be no way to tell which orders had the item
+        recompute(_containing(instance.pk), Line.objects.exclude(item=instance.pk))
+
+
+@receiver(post_init, sender=Item)
+def remember_loaded_price(sender, instance, **kwargs):
+    instance._loaded_price = instance.__dict__.get('price', DEFERRED)
+
+
+@receiver(post_save, sender=Item)
+def update_on_price_change(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    if instance._loaded_price is not DEFERRED and instance.price != instance._loaded_price:
+        recompute(_containing(instance.pk))
+    instance._loaded_price = instance.price
+
+
+@receiver(pre_delete, sender=Item)
+def update_on_item_delete(sender, instance, **kwargs):
+    recompute(_containing(instance.pk), Line.objects.exclude(item=instance.pk))
+
+
+# ——————————————————————————————————————————————————————
+# Batch recompute
+# ——————————————————————————————————————————————————————
+def recompute_all(chunk_size=CHUNK_SIZE):
+    """
+    Recompute every order's total, ``chunk_size`` primary keys per
+    transaction so no statement holds the write lock for long, rewriting
+    only the orders whose stored total is wrong.  Yields ``(last pk in the
+    chunk, orders corrected)`` as it goes.
+    """
+    last = Order.objects.aggregate(last=Max('pk'))['last'] or 0
+    actual = _total(Line.objects.all())
+    for start in range(1, last + 1, chunk_size):
+        end = min(start + chunk_size - 1, last)
+        with transaction.atomic():
+            fixed = (
+                Order.objects
+                .filter(pk__gte=start, pk__lte=end)
+                .annotate(actual=actual)
+                .filter(~Q(total_price=F('actual')))
+                .update(total_price=actual, updated_at=timezone.now())
+            )
+        yield end, fixed
@@ -0,0 +1,130 @@
+"""
+Lookups for the public ``track_shipment`` page.
+
+A complete code as produced by ``generate_tracking_number`` (SL + YYYYMMDD
++ 6 hex) is an exact match on the unique index and goes through a
+read-through cache; Shipment saves/deletes evict the cached entry once
+their transaction commits, so neither a rolled-back write nor a lookup
+racing the commit can leave the old row cached.
+Partial input becomes an index range scan on the prefix, and only if that
+finds nothing do we fall back to a substring search via the search index.
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import metrics, search
+from .models import Shipment
+
+TRACKING_RE = re.compile(r'^SL\d{8}[0-9A-F]{6}$')
+
+# cached stand-in for "no such shipment", so repeated misses stay cheap too
+_MISSING = 'missing'
+
+
+def cache_key(tracking_number):
+    return f'track:{tracking_number}'
+
+
+def cache_timeout():
+    return getattr(settings, 'TRACKING_CACHE_TIMEOUT', 300)
+
+
+def max_results():
+    return getattr(settings, 'TRACKING_MAX_RESULTS', 50)
+
+
+def normalise(term):
+    return term.strip().upper()
+
+
+def is_full_code(term):
+    return bool(TRACKING_RE.match(term))
+
+
+def get_by_tracking_number(tracking_number):
+    """Exact lookup through the cache; returns a Shipment or None."""
+    key = cache_key(tracking_number)
+    cached = cache.get(key)
+    metrics.cache_lookup('tracking', cached is not None)
+    if cached is None:
+        shipment = Shipment.objects.filter(tracking_number=tracking_number).first()
+        cache.set(key, shipment or _MISSING, timeout=cache_timeout())
+        return shipment
+    return None if cached == _MISSING else cached
+
+
+async def aget_by_tracking_number(tracking_number):
+    key = cache_key(tracking_number)
+    cached = await cache.aget(key)
+    metrics.cache_lookup('tracking', cached is not None)
+    if cached is None:
+        shipment = await Shipment.objects.filter(tracking_number=tracking_number).afirst()
+        await cache.aset(key, shipment or _MISSING, timeout=cache_timeout())
+        return shipment
+    return None if cached == _MISSING else cached
+
+
+def _prefix_range(prefix):
+    """[prefix, upper) bounds matching every string that starts with prefix."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _prefix_queryset(term):
+    lower, upper = _prefix_range(term)
+    return (
+        Shipment.objects
+        .filter(tracking_number__gte=lower, tracking_number__lt=upper)
+        .order_by('tracking_number')[:max_results()]
+    )
+
+
+def _substring_queryset(term):
+    qs = Shipment.objects.all()
+    return search.filter_queryset(qs, term).order_by('tracking_number')[:max_results()]
+
+
+def find(term):
+    """Shipments matching ``term`` (at most TRACKING_MAX_RESULTS of them)."""
+    term = normalise(term)
+    if not term:
+        return []
+    if is_full_code(term):
+        shipment = get_by_tracking_number(term)
+        return [shipment] if shipment else []
+
+    matches = list(_prefix_queryset(term))
+    if not matches:
+        matches = list(_substring_queryset(term))
+    return matches
+
+
+async def afind(term):
+    """``find`` for async views."""
+    term = normalise(term)
+    if not term:
+        return []
+    if is_full_code(term):
+        shipment = await aget_by_tracking_number(term)
+        return [shipment] if shipment else []
+
+    matches = [s async for s in _prefix_queryset(term)]
+    if not matches:
+        matches = [s async for s in _substring_queryset(term)]
+    return matches
+
+
+@receiver(post_save, sender=Shipment)
+@receiver(post_delete, sender=Shipment)
+def evict_tracked_shipment(sender, instance, **kwargs):
+    evict_on_commit([instance.tracking_number])
+
+
+def evict_on_commit(tracking_numbers):
+    """Drop the cached lookups of ``tracking_numbers`` once the current transaction commits."""
+    keys = [cache_key(code) for code in tracking_numbers]
+    transaction.on_commit(lambda: cache.delete_many(keys), robust=True)
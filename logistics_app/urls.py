@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, autocomplete, views
 
 # Register API ViewSets
 router = DefaultRouter()
@@ -9,13 +10,30 @@ router.register(r'shipments', views.ShipmentViewSet)
 router.register(r'orders',    views.OrderViewSet)
 router.register(r'events',    views.EventViewSet)
 
+# ASGI deployments serve the read-heavy endpoints from async views
+if settings.ASYNC_VIEWS:
+    track_shipment, analytics_data = async_views.track_shipment, async_views.analytics_data
+    live_feed = async_views.live_feed
+    async_api = [
+        path('api/shipments/',          async_views.api_view(views.ShipmentViewSet),              name='shipment-list'),
+        path('api/shipments/<int:pk>/', async_views.api_view(views.ShipmentViewSet, detail=True), name='shipment-detail'),
+        path('api/orders/',             async_views.api_view(views.OrderViewSet),                 name='order-list'),
+        path('api/orders/<int:pk>/',    async_views.api_view(views.OrderViewSet, detail=True),    name='order-detail'),
+        path('api/events/',             async_views.api_view(views.EventViewSet),                 name='event-list'),
+        path('api/events/<int:pk>/',    async_views.api_view(views.EventViewSet, detail=True),    name='event-detail'),
+    ]
+else:
+    track_shipment, analytics_data = views.track_shipment, views.analytics_data
+    live_feed = views.live_feed
+    async_api = []
+
 urlpatterns = [
     # ============================================
     # Public Routes (No Login Required)
     # ============================================
     path('',            views.index,          name='index'),           # Landing Page
     path('register/',   views.register,       name='register'),        # User Registration
-    path('track/',      views.track_shipment, name='track_shipment'),  # Public Shipment Tracking
+    path('track/',      track_shipment,       name='track_shipment'),  # Public Shipment Tracking
 
     # ============================================
     # Authentication (Login, Logout, Password)
@@ -45,13 +63,25 @@ urlpatterns = [
     # Analytics (Authenticated Users)
     # ============================================
     path('analytics/',      views.analytics_view, name='analytics'),
-    path('analytics/data/', views.analytics_data, name='analytics_data'),
+    path('analytics/data/', analytics_data,       name='analytics_data'),
+    path('analytics/live/', live_feed,            name='live_feed'),
+
+    # ============================================
+    # Data Export (Authenticated Users)
+    # ============================================
+    path('export/<str:name>.<str:fmt>', views.export_data, name='export_data'),
+
+    # ============================================
+    # Autocomplete for the form selects (Authenticated Users)
+    # ============================================
+    path('autocomplete/', autocomplete.AutocompleteView.as_view(), name='autocomplete'),
 
     # ============================================
     # Shipment Management (Warehouse Managers)
     # ============================================
     path('shipments/',               views.ShipmentListView.as_view(),   name='shipment_list'),
     path('shipments/create/',        views.ShipmentCreateView.as_view(), name='shipment_create'),
+    path('shipments/import/',        views.ShipmentImportView.as_view(), name='shipment_import'),
     path('shipments/<int:pk>/',      views.ShipmentDetailView.as_view(), name='shipment_detail'),
     path('shipments/<int:pk>/update/', views.ShipmentUpdateView.as_view(), name='shipment_update'),
     path('shipments/<int:pk>/delete/', views.ShipmentDeleteView.as_view(), name='shipment_delete'),
@@ -82,8 +112,19 @@ urlpatterns = [
     path('warehouses/<int:pk>/update/', views.WarehouseUpdateView.as_view(), name='warehouse_update'),
     path('warehouses/<int:pk>/delete/', views.WarehouseDeleteView.as_view(), name='warehouse_delete'),
 
+    # ============================================
+    # Metrics (Prometheus scrape target)
+    # ============================================
+    path('metrics', views.metrics_view, name='metrics'),
+
+    # ============================================
+    # Profiler Output (Staff)
+    # ============================================
+    path('profiling/stacks/', views.profiler_stacks, name='profiler_stacks'),
+
     # ============================================
     # API Endpoints (Django REST Framework)
     # ============================================
+    *async_api,
     path('api/', include(router.urls)),
 ]
@@ -0,0 +1,118 @@
+"""
+Incrementally maintained warehouse utilisation.
+
+Each Warehouse stores ``sku_count`` (items stocked there) and
+``units_on_hand`` (their summed ``quantity_in_stock``); ``utilisation``
+(percent of capacity) is a generated column over those, so the warehouse
+list can sort and filter by fullness on an index instead of aggregating
+the inventory of every row.
+
+The counters are adjusted with relative UPDATEs (``x = x + n``), so
+concurrent writers can't lose each other's changes:
+
+  - ``m2m_changed`` on Warehouse.inventory (either side) for items
+    stocked or removed;
+  - Item saves that change ``quantity_in_stock``, and Item deletes (whose
+    inventory rows go by cascade, without m2m_changed);
+  - ``stock_changed()`` from write paths that change stock with queryset
+    ``update()`` (inventory.reserve / release).
+
+``manage.py reconcile_warehouses`` recomputes them from the source tables
+and fixes any drift.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Item, Warehouse
+
+Membership = Warehouse.inventory.through
+
+
+def _per_warehouse(memberships, aggregate):
+    """Correlated subquery: ``aggregate`` of ``memberships`` for the outer warehouse."""
+    rows = memberships.filter(warehouse=OuterRef('pk')).values('warehouse')
+    return Coalesce(Subquery(rows.annotate(value=aggregate).values('value')), 0)
+
+
+def _apply(memberships, sign):
+    """Add (sign=1) or take away (sign=-1) ``memberships`` from the counters."""
+    Warehouse.objects.filter(pk__in=memberships.values('warehouse')).update(
+        sku_count=F('sku_count') + sign * _per_warehouse(memberships, Count('pk')),
+        units_on_hand=F('units_on_hand') + sign * _per_warehouse(memberships, Sum('item__quantity_in_stock')),
+    )
+
+
+def stock_changed(deltas):
+    """
+    Call after changing ``quantity_in_stock`` without Item.save();
+    ``deltas`` maps item id -> change in units.  One UPDATE per distinct
+    delta.
+    """
+    by_delta = {}
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(pk)
+    for delta, ids in by_delta.items():
+        memberships = Membership.objects.filter(item_id__in=ids)
+        Warehouse.objects.filter(pk__in=memberships.values('warehouse')).update(
+            units_on_hand=F('units_on_hand') + delta * _per_warehouse(memberships, Count('pk')),
+        )
+
+
+# ——————————————————————————————————————————————————————
+# Signal receivers
+# ——————————————————————————————————————————————————————
+@receiver(m2m_changed, sender=Membership)
+def update_on_inventory_change(sender, instance, action, reverse, pk_set, **kwargs):
+    side, other = ('item', 'warehouse') if reverse else ('warehouse', 'item')
+    memberships = Membership.objects.filter(**{side: instance.pk})
+    if action == 'post_add':
+        # pk_set holds only the newly added rows
+        _apply(memberships.filter(**{f'{other}__in': pk_set}), 1)
+    elif action == 'pre_remove':
+        # pk_set is whatever was passed to remove(); count only real rows
+        _apply(memberships.filter(**{f'{other}__in': pk_set}), -1)
+    elif action == 'pre_clear':
+        _apply(memberships, -1)
+
+
+@receiver(post_init, sender=Item)
+def remember_loaded_stock(sender, instance, **kwargs):
+    # don't trigger a query for deferred fields
+    instance._loaded_stock = instance.__dict__.get('quantity_in_stock')
+
+
+@receiver(post_save, sender=Item)
+def update_on_stock_change(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    if instance._loaded_stock is not None:
+        stock_changed({instance.pk: instance.quantity_in_stock - instance._loaded_stock})
+    instance._loaded_stock = instance.quantity_in_stock
+
+
+@receiver(pre_delete, sender=Item)
+def update_on_item_delete(sender, instance, **kwargs):
+    _apply(Membership.objects.filter(item=instance.pk), -1)
+
+
+# ——————————————————————————————————————————————————————
+# Reconciliation
+# ——————————————————————————————————————————————————————
+@transaction.atomic
+def reconcile():
+    """
+    Recompute every warehouse's counters from the inventory and fix the
+    ones that drifted.  Returns the number of warehouses corrected.
+    """
+    sku_count = _per_warehouse(Membership.objects.all(), Count('pk'))
+    units_on_hand = _per_warehouse(Membership.objects.all(), Sum('item__quantity_in_stock'))
+    return (
+        Warehouse.objects
+        .annotate(actual_skus=sku_count, actual_units=units_on_hand)
+        .filter(~Q(sku_count=F('actual_skus')) | ~Q(units_on_hand=F('actual_units')))
+        .update(sku_count=sku_count, units_on_hand=units_on_hand)
+    )
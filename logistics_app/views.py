@@ -1,23 +1,37 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView, FormView
 from django.utils import timezone
 from django.contrib.auth.mixins import UserPassesTestMixin, LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import login
-from django.http import JsonResponse
-from datetime import timedelta
-from rest_framework import viewsets
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse, HttpResponseBadRequest, Http404
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from datetime import datetime, time, timedelta
+import csv
+import io
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Avg, F, ExpressionWrapper, DurationField
 from django.contrib import messages
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 
 from .models import Shipment, Order, Event, UserProfile, Warehouse
 from .forms import (
     ShipmentForm, OrderForm, EventForm,
-    UserProfileForm, UserRegistrationForm, WarehouseForm
+    UserProfileForm, UserRegistrationForm, WarehouseForm, ShipmentUploadForm
 )
-from .serializers import ShipmentSerializer, OrderSerializer, EventSerializer
+from .importers import import_shipments
+from .serializers import ShipmentSerializer, OrderSerializer, EventSerializer, ReservationSerializer
+from . import analytics, exporters, inventory, metrics, profiling, roles, rollups, search, tracking
+from .pagination import KeysetPaginationMixin
+from .fastpath import FastListMixin
+from .changes import ChangeFeedMixin
 
 
 # ====================================
@@ -27,14 +41,7 @@ class RoleRequiredMixin(UserPassesTestMixin):
     allowed_roles = []
 
     def test_func(self):
-        user = self.request.user
-        if user.is_superuser:
-            return True
-        return (
-            user.is_authenticated and
-            hasattr(user, 'profile') and
-            user.profile.role in self.allowed_roles
-        )
+        return roles.has_role(self.request.user, self.allowed_roles)
 
     def handle_no_permission(self):
         return redirect('dashboard')
@@ -55,7 +62,7 @@ def register(request):
                 user=new_user,
                 defaults={'role': form.cleaned_data['role']}
             )
-            login(request, new_user)
+            login(request, new_user, backend=settings.AUTHENTICATION_BACKENDS[0])
             return redirect('dashboard')
     else:
         form = UserRegistrationForm()
@@ -92,32 +99,35 @@ def dashboard(request):
       - summary stats
       - 7‑day shipments chart (date_labels, shipment_counts)
       - recent shipments list
+
+    Counts come from the rollup tables (see rollups.py) rather than
+    counting Shipment/Order on every hit.
     """
-    today = timezone.now().date()
+    today = timezone.localdate()
+    days  = [today - timedelta(days=i) for i in range(6, -1, -1)]
 
     # Shipments per day (last 7 days)
-    shipments_by_date = [
-        {
-            'date': (today - timedelta(days=i)).strftime("%Y-%m-%d"),
-            'count': Shipment.objects.filter(
-                date_created__date=today - timedelta(days=i)
-            ).count()
-        }
-        for i in range(6, -1, -1)
-    ]
+    per_day = rollups.daily_counts('shipment', days[0], today)
 
     # Extract two simple lists for Chart.js
-    date_labels     = [d['date']  for d in shipments_by_date]
-    shipment_counts = [d['count'] for d in shipments_by_date]
+    date_labels     = [d.strftime("%Y-%m-%d") for d in days]
+    shipment_counts = [per_day.get(d, 0)      for d in days]
+
+    totals = rollups.counters(
+        rollups.counter_key('shipment'),
+        rollups.counter_key('order', 'PENDING'),
+    )
 
-    # 5 most recent shipments
+    # 5 most recent shipments; a plain range on date_created (not __date,
+    # which wraps the column in a function) so the index can be used
+    week_start = timezone.make_aware(datetime.combine(today - timedelta(days=7), time.min))
     recent_shipments = Shipment.objects.filter(
-        date_created__date__gte=today - timedelta(days=7)
-    ).order_by('-date_created')[:5]
+        date_created__gte=week_start
+    ).order_by('-date_created', '-id')[:5]
 
     context = {
-        'total_shipments':   Shipment.objects.count(),
-        'pending_orders':    Order.objects.filter(status='PENDING').count(),
+        'total_shipments':   totals[rollups.counter_key('shipment')],
+        'pending_orders':    totals[rollups.counter_key('order', 'PENDING')],
         'upcoming_events':   Event.objects.filter(date__gte=timezone.now()).count(),
         'date_labels':       date_labels,
         'shipment_counts':   shipment_counts,
@@ -129,46 +139,30 @@ def dashboard(request):
 # ====================================
 # Analytics Endpoints & View
 # ====================================
+def _analytics_entry(request):
+    # one cache round-trip per request, shared by the ETag/Last-Modified checks and the body
+    if not hasattr(request, '_analytics_entry'):
+        request._analytics_entry = analytics.get_cached()
+    return request._analytics_entry
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(
+    etag_func=lambda request: _analytics_entry(request)['etag'],
+    last_modified_func=lambda request: _analytics_entry(request)['last_modified'],
+)
 def analytics_data(request):
     """
     Returns JSON:
       - shipments_by_date (last 7 days)
       - orders_by_status
       - avg delivery time (last 30 days, in seconds)
-    """
-    today = timezone.now().date()
-    shipments_by_date = [
-        {
-            'date': (today - timedelta(days=i)).strftime("%Y-%m-%d"),
-            'count': Shipment.objects.filter(
-                date_created__date=today - timedelta(days=i)
-            ).count()
-        }
-        for i in range(6, -1, -1)
-    ]
-    orders_by_status = list(
-        Order.objects
-             .values('status')
-             .annotate(count=Count('id'))
-             .order_by('status')
-    )
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    avg_delta = Shipment.objects.filter(
-        date_delivered__gte=thirty_days_ago
-    ).annotate(
-        delivery_time=ExpressionWrapper(
-            F('date_delivered') - F('date_created'),
-            output_field=DurationField()
-        )
-    ).aggregate(avg=Avg('delivery_time'))['avg']
-    avg_seconds = avg_delta.total_seconds() if avg_delta else None
 
-    return JsonResponse({
-        'shipments_by_date':    shipments_by_date,
-        'orders_by_status':     orders_by_status,
-        'avg_delivery_seconds': avg_seconds,
-    })
+    Served from the versioned analytics cache; conditional requests
+    that still match get a 304 without touching the database.
+    """
+    return JsonResponse(_analytics_entry(request)['payload'])
 
 
 @login_required
@@ -177,6 +171,47 @@ def analytics_view(request):
     return render(request, 'logistics_app/analytics.html')
 
 
+@login_required
+def live_feed(request):
+    """
+    The live SSE stream (async_views.live_feed) needs the ASGI deployment;
+    a 204 tells EventSource not to reconnect, so pages just stay static.
+    """
+    return HttpResponse(status=204)
+
+
+# ====================================
+# Streaming Exports
+# ====================================
+EXPORT_CONTENT_TYPES = {
+    'csv':    'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+@login_required
+def export_data(request, name, fmt):
+    """
+    Stream shipments/orders/events as CSV or NDJSON.
+    Optional filters: ?status=, ?since= (inclusive), ?until= (exclusive).
+    """
+    if name not in exporters.EXPORTS or fmt not in exporters.FORMATS:
+        raise Http404("Unknown export")
+    try:
+        since = exporters.parse_bound(request.GET.get('since'))
+        until = exporters.parse_bound(request.GET.get('until'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    rows = exporters.export_rows(name, status=request.GET.get('status'), since=since, until=until)
+    response = StreamingHttpResponse(
+        exporters.render(name, rows, fmt),
+        content_type=EXPORT_CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    return response
+
+
 # ====================================
 # Shipment Tracking View
 # ====================================
@@ -185,16 +220,15 @@ def track_shipment(request):
     Search by full or partial tracking number:
       - if exactly 1 match → detail view
       - otherwise → list view
+    Full codes hit the unique index (and a read-through cache); partial
+    input is a prefix search.  See tracking.py.
     """
     term = (request.GET.get('tracking_number') or "").strip()
-    if term:
-        shipments = Shipment.objects.filter(tracking_number__icontains=term)
-    else:
-        shipments = Shipment.objects.none()
+    shipments = tracking.find(term) if term else []
 
-    if term and shipments.count() == 1:
+    if len(shipments) == 1:
         return render(request, 'logistics_app/track_shipment_detail.html', {
-            'shipment': shipments.first()
+            'shipment': shipments[0]
         })
 
     return render(request, 'logistics_app/track_shipment_list.html', {
@@ -206,20 +240,18 @@ def track_shipment(request):
 # ====================================
 # Shipment CRUD
 # ====================================
-class ShipmentListView(LoginRequiredMixin, ListView):
+class ShipmentListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Shipment
+    keyset_ordering = ('-date_created', '-id')
     template_name = 'logistics_app/shipments.html'
     context_object_name = 'shipments'
 
     def get_queryset(self):
         qs = super().get_queryset()
-        q  = self.request.GET.get('q')
+        q  = (self.request.GET.get('q') or '').strip()
         if q:
-            qs = qs.filter(
-                Q(tracking_number__icontains=q) |
-                Q(origin__icontains=q) |
-                Q(destination__icontains=q)
-            )
+            # tracking number / origin / destination via the search index
+            qs = search.filter_queryset(qs, q)
         return qs
 
     def get_context_data(self, **kwargs):
@@ -231,6 +263,7 @@ class ShipmentListView(LoginRequiredMixin, ListView):
 
 class ShipmentDetailView(LoginRequiredMixin, DetailView):
     model = Shipment
+    queryset = Shipment.objects.select_related('event', 'delivery_person')
     template_name = 'logistics_app/shipment_detail.html'
     context_object_name = 'shipment'
 
@@ -243,6 +276,37 @@ class ShipmentCreateView(RoleRequiredMixin, CreateView):
     success_url   = reverse_lazy('shipment_list')
 
 
+class ShipmentImportView(RoleRequiredMixin, FormView):
+    """Upload a CSV manifest; rows are streamed in via importers.py."""
+    allowed_roles = ['warehouse_manager']
+    form_class    = ShipmentUploadForm
+    template_name = 'logistics_app/shipment_import.html'
+    max_errors_shown = 100
+
+    def form_valid(self, form):
+        upload = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+        progress = {'created': 0}
+        try:
+            result = import_shipments(upload, on_batch=lambda r: progress.update(created=r.created))
+        except (UnicodeDecodeError, csv.Error) as exc:
+            if isinstance(exc, UnicodeDecodeError):
+                error = "The file is not UTF-8 text."
+            else:
+                error = f"The file is not valid CSV: {exc}."
+            # batches before the bad one are already committed
+            if progress['created']:
+                error += f" {progress['created']} shipment(s) were imported before it."
+            form.add_error('file', error)
+            return self.form_invalid(form)
+        if result.created:
+            messages.success(self.request, f"Imported {result.created} shipment(s).")
+        return self.render_to_response(self.get_context_data(
+            form=form,
+            result=result,
+            errors=result.errors[:self.max_errors_shown],
+        ))
+
+
 class ShipmentUpdateView(RoleRequiredMixin, UpdateView):
     allowed_roles = ['warehouse_manager']
     model         = Shipment
@@ -261,48 +325,69 @@ class ShipmentDeleteView(RoleRequiredMixin, DeleteView):
 # ====================================
 # Order CRUD
 # ====================================
-class OrderListView(LoginRequiredMixin, ListView):
+class OrderListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Order
+    keyset_ordering = ('-order_date', '-id')
     template_name = 'logistics_app/orders.html'
     context_object_name = 'orders'
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        q  = self.request.GET.get('q')
+        qs = super().get_queryset().select_related('customer')
+        q  = (self.request.GET.get('q') or '').strip()
         if q:
-            qs = qs.filter(
-                Q(order_number__icontains=q) |
-                Q(status__icontains=q)
-            )
+            # order number / status via the search index
+            qs = search.filter_queryset(qs, q)
         return qs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx['search_query'] = self.request.GET.get('q', '')
-        if self.request.user.profile.role == 'admin':
+        if roles.role_of(self.request.user) == 'admin':
             ctx['form'] = OrderForm()
         return ctx
 
 
 class OrderDetailView(LoginRequiredMixin, DetailView):
     model             = Order
+    queryset          = Order.objects.select_related('customer').prefetch_related('items')
     template_name     = 'logistics_app/order_detail.html'
     context_object_name = 'order'
 
 
-class OrderCreateView(RoleRequiredMixin, CreateView):
-    allowed_roles = ['admin']
-    model         = Order
-    form_class    = OrderForm
-    template_name = 'logistics_app/order_form.html'
-    success_url   = reverse_lazy('order_list')
+class ReserveStockMixin:
+    """
+    Order create/update views: stock for items added to the order is
+    reserved (and for items removed, released) in the transaction that
+    saves it; a shortage is reported on the items field instead.
+    ``success_message`` is shown once the order is saved.
+    """
+    success_message = None
 
     def form_valid(self, form):
-        messages.success(self.request, "Order created successfully!")
-        return super().form_valid(form)
-
-
-class OrderUpdateView(RoleRequiredMixin, UpdateView):
+        before = set(self.object.items.values_list('pk', flat=True)) if self.object else set()
+        after  = {item.pk for item in form.cleaned_data['items']}
+        try:
+            with transaction.atomic():
+                inventory.adjust(before, after)
+                response = super().form_valid(form)
+        except inventory.InsufficientStock as exc:
+            form.add_error('items', str(exc))
+            return self.form_invalid(form)
+        if self.success_message:
+            messages.success(self.request, self.success_message)
+        return response
+
+
+class OrderCreateView(RoleRequiredMixin, ReserveStockMixin, CreateView):
+    allowed_roles   = ['admin']
+    model           = Order
+    form_class      = OrderForm
+    template_name   = 'logistics_app/order_form.html'
+    success_url     = reverse_lazy('order_list')
+    success_message = "Order created successfully!"
+
+
+class OrderUpdateView(RoleRequiredMixin, ReserveStockMixin, UpdateView):
     allowed_roles = ['admin']
     model         = Order
     form_class    = OrderForm
@@ -316,12 +401,24 @@ class OrderDeleteView(RoleRequiredMixin, DeleteView):
     template_name = 'logistics_app/order_confirm_delete.html'
     success_url   = reverse_lazy('order_list')
 
+    def form_valid(self, form):
+        with transaction.atomic():
+            release_stock(self.object)
+            return super().form_valid(form)
+
+
+def release_stock(order):
+    """A pending order being deleted gives its reserved stock back."""
+    if order.status == 'PENDING':
+        inventory.release(inventory.units(order.items.values_list('pk', flat=True)))
+
 
 # ====================================
 # Event CRUD
 # ====================================
-class EventListView(LoginRequiredMixin, ListView):
+class EventListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Event
+    keyset_ordering = ('date', 'id')
     template_name = 'logistics_app/events.html'
     context_object_name = 'events'
 
@@ -358,12 +455,49 @@ class EventDeleteView(RoleRequiredMixin, DeleteView):
 # ====================================
 # Warehouse CRUD
 # ====================================
-class WarehouseListView(RoleRequiredMixin, ListView):
+class WarehouseListView(RoleRequiredMixin, KeysetPaginationMixin, ListView):
+    """
+    Warehouses with their stored utilisation (see utilisation.py), sorted
+    by ``?sort=`` and filtered to a ``?fullness=`` band.
+    """
     allowed_roles      = ['admin', 'warehouse_manager']
     model              = Warehouse
+    queryset           = Warehouse.objects.select_related('manager')
     template_name      = 'logistics_app/warehouses.html'
     context_object_name = 'warehouses'
 
+    SORTS = {
+        'fullest':  ('-utilisation', '-id'),
+        'emptiest': ('utilisation', 'id'),
+        'name':     ('name', 'id'),
+    }
+    # percent of capacity
+    FULLNESS = {
+        'over':  Q(utilisation__gt=100),
+        'full':  Q(utilisation__gte=90),
+        'busy':  Q(utilisation__gte=50, utilisation__lt=90),
+        'spare': Q(utilisation__lt=50),
+    }
+
+    def get_queryset(self):
+        self.sort = self.request.GET.get('sort')
+        if self.sort not in self.SORTS:
+            self.sort = 'fullest'
+        self.keyset_ordering = self.SORTS[self.sort]
+        self.fullness = self.request.GET.get('fullness')
+        qs = super().get_queryset()
+        if self.fullness in self.FULLNESS:
+            qs = qs.filter(self.FULLNESS[self.fullness])
+        return qs
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx['sort']     = self.sort
+        ctx['sorts']    = list(self.SORTS)
+        ctx['fullness'] = self.fullness if self.fullness in self.FULLNESS else ''
+        ctx['bands']    = list(self.FULLNESS)
+        return ctx
+
 
 class WarehouseCreateView(RoleRequiredMixin, CreateView):
     allowed_roles = ['admin', 'warehouse_manager']
@@ -391,23 +525,152 @@ class WarehouseDeleteView(RoleRequiredMixin, DeleteView):
 # ====================================
 # API ViewSets
 # ====================================
-class ShipmentViewSet(viewsets.ModelViewSet):
+class ShipmentViewSet(ChangeFeedMixin, FastListMixin, viewsets.ModelViewSet):
     queryset         = Shipment.objects.all()
     serializer_class = ShipmentSerializer
+    filter_backends  = [search.IndexedSearchFilter]
+    keyset_ordering  = ('-date_created', '-id')
     permission_classes = [IsAuthenticated]
 
+    @action(detail=False, methods=['post', 'put', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        POST a list to create, PUT/PATCH a list of objects with ``id`` to
+        update.  The batch is validated as a whole and written in one
+        transaction; errors are reported per item (a list aligned with the
+        input, or keyed by item index for PATCH).
+        """
+        data, limit = request.data, getattr(settings, 'BULK_MAX_ITEMS', 1000)
+        if isinstance(data, list) and len(data) > limit:
+            return Response(
+                {'detail': f"At most {limit} items per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset         = Order.objects.all()
+        # read, validate and write in one transaction: updates write whole
+        # field values (and rollup deltas from the old statuses) taken from
+        # the instances read here, so nothing may change them in between
+        with transaction.atomic():
+            if request.method == 'POST':
+                serializer = self.get_serializer(data=data, many=True)
+                response_status = status.HTTP_201_CREATED
+            else:
+                ids = [item.get('id') for item in data if isinstance(item, dict)] if isinstance(data, list) else []
+                instances = list(self.get_queryset().filter(pk__in=[i for i in ids if isinstance(i, int)]))
+                serializer = self.get_serializer(
+                    instances, data=data, many=True, partial=request.method == 'PATCH',
+                )
+                response_status = status.HTTP_200_OK
+
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data, status=response_status)
+
+
+class OrderViewSet(ChangeFeedMixin, FastListMixin, viewsets.ModelViewSet):
+    queryset         = Order.objects.prefetch_related('items')
     serializer_class = OrderSerializer
+    filter_backends  = [search.IndexedSearchFilter]
+    keyset_ordering  = ('-order_date', '-id')
     permission_classes = [IsAuthenticated]
 
+    # stock for an order's items is reserved in the transaction that saves it
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            inventory.reserve(inventory.units(serializer.validated_data.get('items', [])))
+            serializer.save()
+
+    def perform_update(self, serializer):
+        before = set(serializer.instance.items.values_list('pk', flat=True))
+        after  = {item.pk for item in serializer.validated_data['items']} if 'items' in serializer.validated_data else before
+        with transaction.atomic():
+            inventory.adjust(before, after)
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            release_stock(instance)
+            instance.delete()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, inventory.InsufficientStock):
+            return Response(
+                {'detail': "Insufficient stock.", 'shortages': exc.shortages},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return super().handle_exception(exc)
+
+    @action(detail=False, methods=['post'], url_path='reserve')
+    def reserve(self, request):
+        """
+        POST ``[{"item": id, "quantity": n}, ...]`` to take stock out
+        without placing an order.  All or nothing: if any item is short
+        (or unknown) nothing is reserved and the response is 409 with the
+        shortages.  Returns each item's remaining stock.
+        """
+        data, limit = request.data, getattr(settings, 'BULK_MAX_ITEMS', 1000)
+        if isinstance(data, list) and len(data) > limit:
+            return Response(
+                {'detail': f"At most {limit} items per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = ReservationSerializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+        quantities = {}
+        for line in serializer.validated_data:
+            quantities[line['item']] = quantities.get(line['item'], 0) + line['quantity']
+
+        inventory.reserve(quantities)
+        remaining = inventory.stock_levels(quantities)
+        return Response([
+            {'item': pk, 'quantity': n, 'remaining': remaining[pk]} for pk, n in quantities.items()
+        ])
 
-class EventViewSet(viewsets.ModelViewSet):
+
+class EventViewSet(ChangeFeedMixin, FastListMixin, viewsets.ModelViewSet):
     queryset         = Event.objects.all()
     serializer_class = EventSerializer
+    keyset_ordering  = ('date', 'id')
     permission_classes = [IsAuthenticated]
 
+# ====================================
+# Metrics Exporter
+# ====================================
+def metrics_view(request):
+    """
+    Prometheus text-format metrics, aggregated across worker processes.
+    Requires ``Authorization: Bearer <METRICS_TOKEN>`` when that is set.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+# ====================================
+# Profiler Output (Staff)
+# ====================================
+@staff_member_required
+def profiler_stacks(request):
+    """
+    Collapsed stacks gathered by the sampling profiler in this process.
+    Without ?view= lists views and sample counts; with it, returns the
+    view's stacks as text for flamegraph.pl / speedscope.
+    """
+    stacks = profiling.snapshot()
+    name = request.GET.get('view')
+    if name:
+        if name not in stacks:
+            raise Http404("No samples for that view")
+        response = HttpResponse(profiling.render_collapsed(stacks[name]), content_type='text/plain')
+        response['Content-Disposition'] = f'attachment; filename="{name}.collapsed"'
+        return response
+    return JsonResponse({
+        'enabled': profiling.enabled(),
+        'views':   {view: sum(c.values()) for view, c in sorted(stacks.items())},
+    })
+
+
 # ====================================
 # Custom Logout View (GET-safe)
 # ====================================
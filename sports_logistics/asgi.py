@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sports_logistics.settings')
+# async views for the public/read-heavy endpoints (settings.ASYNC_VIEWS)
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Opt-in sampling profiler (settings.PROFILER_ENABLED); a no-op when disabled
+from logistics_app.profiling import wrap_asgi  # noqa: E402
+
+application = wrap_asgi(application)
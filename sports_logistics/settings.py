@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'logistics_app.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,7 +41,8 @@ ROOT_URLCONF = 'sports_logistics.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also reports render time to RequestTimingMiddleware
+        'BACKEND': 'logistics_app.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -48,6 +51,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'logistics_app.roles.permissions',
             ],
         },
     },
@@ -55,14 +59,48 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'sports_logistics.wsgi.application'
 
+# Serve the async track_shipment / analytics_data / read-only API views
+# (logistics_app/async_views.py); sports_logistics/asgi.py turns this on
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
 # Database
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # keep connections (and their pragmas and page cache) across requests
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # BEGIN IMMEDIATE: take the write lock when a transaction starts
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 5,
+        },
+        # a file, not the default in-memory database: tests that run several
+        # threads need SQLite's real (WAL) locking, which shared-cache memory
+        # databases replace with table locks that fail instead of waiting
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Applied to every new SQLite connection (logistics_app/sqlite.py); None = defaults there
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous':  'NORMAL',
+    'busy_timeout': 5000,
+    'temp_store':   'MEMORY',
+    'mmap_size':    268435456,
+    'cache_size':   -64000,
+}
+
+# The session's user is loaded with its profile, so resolving the role
+# (logistics_app/roles.py) needs no query of its own.  ModelBackend stays
+# listed for sessions that were logged in through it.
+AUTHENTICATION_BACKENDS = [
+    'logistics_app.roles.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -79,6 +117,127 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Cache (local memory by default; point at Redis/Memcached in production
+# so invalidation is shared between worker processes)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # entries every worker process must see: select2 widget registrations
+    # (an /autocomplete/ request may reach a process that didn't render the
+    # form) and the autocomplete invalidation generations
+    'shared': {
+        'BACKEND':  'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'run' / 'cache',
+        'OPTIONS':  {'MAX_ENTRIES': 10_000},
+    },
+}
+SELECT2_CACHE_BACKEND = 'shared'
+
+# Seconds an autocomplete page (logistics_app/autocomplete.py) stays cached
+# in the process that served it; saving or deleting a row of the model
+# invalidates it sooner, in every process, through the shared cache
+AUTOCOMPLETE_CACHE_TIMEOUT = 300
+
+# Upper bound (seconds) on how stale the cached analytics_data payload may be
+ANALYTICS_CACHE_TIMEOUT = 60
+
+# Keyset pagination for list views and the API (see logistics_app/pagination.py)
+KEYSET_PAGE_SIZE     = 50
+KEYSET_MAX_PAGE_SIZE = 200
+
+# Public tracking: cache lifetime (seconds) for exact tracking-number lookups,
+# and the most matches shown for partial input
+TRACKING_CACHE_TIMEOUT = 300
+TRACKING_MAX_RESULTS   = 50
+
+# Rows per bulk INSERT (and per transaction) for CSV shipment imports
+SHIPMENT_IMPORT_BATCH_SIZE = 1000
+
+# Rows fetched per database round-trip by the streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Shipment/order search index (see logistics_app/search.py); use
+# 'logistics_app.search.LikeBackend' on databases without FTS5
+SEARCH_BACKEND = 'logistics_app.search.SQLiteFTSBackend'
+
+# Change feeds (/api/<resource>/changes/, logistics_app/changes.py): changes
+# younger than CHANGES_SETTLE_SECONDS are held back so a slow commit can't land
+# behind a client's cursor; tombstones are kept CHANGES_RETENTION_DAYS (prune
+# with `manage.py prune_tombstones`), older cursors must re-sync.
+CHANGES_SETTLE_SECONDS = 2
+CHANGES_RETENTION_DAYS = 30
+
+# Largest list accepted by the bulk API endpoints (/api/shipments/bulk/)
+BULK_MAX_ITEMS = 1000
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'logistics_app.pagination.KeysetCursorPagination',
+    # orjson-backed when installed, plain JSONRenderer otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'logistics_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Per-request instrumentation (logistics_app/instrumentation.py): Server-Timing
+# header, a JSON log line per request on 'logistics_app.perf', and a warning
+# when a view runs more queries than its budget.  Budgets keyed by URL name
+# apply to GET/HEAD; budget a write with a (url_name, method) key
+REQUEST_TIMING_ENABLED = True
+SERVER_TIMING_HEADER   = True
+DEFAULT_QUERY_BUDGET   = None
+QUERY_BUDGETS = {
+    'dashboard':      6,
+    'analytics_data': 5,
+    'track_shipment': 3,
+    'shipment_list':  4,
+    'order_list':     4,
+    'event_list':     3,
+    'shipment-list':  3,
+    'order-list':     4,
+    'event-list':     3,
+}
+
+# Metrics exporter at /metrics (logistics_app/metrics.py).  Set METRICS_DIR to
+# a writable directory (cleared on deploy) to aggregate across worker
+# processes; None keeps metrics in-process.  METRICS_TOKEN, when set, is
+# required as a Bearer token to scrape.
+METRICS_DIR   = None
+METRICS_TOKEN = None
+
+# Sampling profiler (logistics_app/profiling.py).  Profiles requests whose URL
+# name is listed, plus a random fraction of the rest; collapsed stacks per view
+# land in PROFILER_OUTPUT_DIR (merge with `manage.py dump_profiles`)
+PROFILER_ENABLED     = False
+PROFILER_SAMPLE_RATE = 0.01
+PROFILER_URL_NAMES   = []
+PROFILER_INTERVAL    = 0.005
+PROFILER_OUTPUT_DIR  = BASE_DIR / 'profiles'
+
+# Live dashboard updates over Server-Sent Events (logistics_app/live.py); the
+# stream is only served by the ASGI deployment.  LIVE_CHANNEL carries updates
+# between worker processes: LocalChannel (one worker), UnixSocketChannel
+# (sockets in LIVE_SOCKET_DIR) or SQLitePollChannel (LIVE_SQLITE_PATH, polled
+# every LIVE_POLL_INTERVAL seconds).
+LIVE_CHANNEL       = 'logistics_app.live.LocalChannel'
+LIVE_SOCKET_DIR    = BASE_DIR / 'run' / 'live'
+LIVE_SQLITE_PATH   = BASE_DIR / 'live.sqlite3'
+LIVE_POLL_INTERVAL = 0.5
+LIVE_HEARTBEAT     = 15       # seconds between keepalive comments
+LIVE_QUEUE_SIZE    = 100      # messages buffered per stream before it is dropped
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'logistics_app.perf': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
 # Internationalization
 LANGUAGE_CODE = 'en-gb'
 TIME_ZONE = 'Europe/Dublin'
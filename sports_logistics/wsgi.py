@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sports_logistics.settings')
 
 application = get_wsgi_application()
+
+# Opt-in sampling profiler (settings.PROFILER_ENABLED); a no-op when disabled
+from logistics_app.profiling import wrap_wsgi  # noqa: E402
+
+application = wrap_wsgi(application)